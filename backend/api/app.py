@@ -1,11 +1,36 @@
+import asyncio
+import json
 import shutil
+import threading
+import time
 import uuid
 from pathlib import Path
+from typing import Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from api.schemas import HandRequest, PredictionResponse
-from engine.model import predict_best_discard
+from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from api.schemas import (
+    HandRequest, PredictionResponse, WaitsResponse,
+    BatchHandRequest, BatchPredictionResponse, SimulatedPredictionResponse,
+    SearchPredictionResponse
+)
+import config.server_config as server_config
+from api.batching import MicroBatcher
+from api.instrumentation import MetricsMiddleware
+import engine.metrics as metrics
+import engine.model as model
+import engine.monte_carlo as monte_carlo
+import engine.search as search
+from engine.session import SessionStore
+from engine.model import predict_best_discards
+from engine.prediction_cache import (
+    cached_predict_best_discard, cached_predict_best_discards, prediction_cache_stats
+)
 import representation.hand as hand
+import rules.win_checker as win_checker
+from rules.scoring_profile import ScoringProfile, profile_cache_stats, scoring_profile
+from rules.waits import find_waits
 
 '''
 # Image tile detection
@@ -17,22 +42,428 @@ app = FastAPI(
     title="Mahjong Best Discard API",
     version="1.0.0"
 )
+app.add_middleware(MetricsMiddleware)
 
 UPLOAD_DIR = Path("vision/tile_images")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+MAX_COPIES = 4
+MAX_HAND_TILES = 14
+
+
+def _predict_queued(items: list) -> list:
+    hands, profiles = zip(*items)
+    return cached_predict_best_discards(list(hands), list(profiles))
+
+
+# Micro-batching serving mode (MAHJONG_MICRO_BATCH=1): /predict requests
+# are queued and answered in batches by cached_predict_best_discards
+BATCHER = MicroBatcher(
+    _predict_queued,
+    max_size=server_config.get_micro_batch_max_size(),
+    max_wait_ms=server_config.get_micro_batch_max_wait_ms()
+)
+
+# Live game sessions of /ws/session
+SESSIONS = SessionStore()
+_session_sweeper = None
+
+# Warm-up progress reported by /ready (the model's state is read live)
+_STARTED_AT = time.monotonic()
+READINESS = {
+    "meld_cache": False,
+    "warmup_seconds": None,
+    "error": None
+}
+
+
+def _serving_metrics() -> list:
+    meld_cache = win_checker.MELD_CACHE
+    return [
+        ("mahjong_meld_cache_lookups_total", "counter", "Meld cache lookups.",
+         [({"result": "hit"}, meld_cache.hits), ({"result": "miss"}, meld_cache.misses)]),
+        ("mahjong_batcher_batches_total", "counter", "Micro-batches run.",
+         [({}, BATCHER.batches)]),
+        ("mahjong_batcher_items_total", "counter", "Requests answered by micro-batches.",
+         [({}, BATCHER.items)]),
+        ("mahjong_sessions_active", "gauge", "Live game sessions held.",
+         [({}, len(SESSIONS))])
+    ]
+
+
+metrics.register_collector(_serving_metrics)
+
+
+def encode_request(req: HandRequest):
+    with metrics.stage("encode_hand"):
+        return hand.encode_hand(req.concealed, req.flowers, req.display)
+
+
+def validate_hand(req: HandRequest) -> None:
+    """
+    400 for hands no prediction can answer: no concealed tiles, unknown
+    tiles or flowers, more than 4 copies of a tile or more than 14 tiles.
+    """
+    try:
+        checked = hand.Hand.from_tiles(req.concealed, req.flowers, req.display)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if checked.concealed_size() == 0:
+        raise HTTPException(status_code=400, detail="The hand has no concealed tiles")
+    held = [c + d for c, d in zip(checked.concealed_counts(), checked.display_counts())]
+    if max(held) > MAX_COPIES:
+        raise HTTPException(status_code=400, detail="More than 4 copies of a tile")
+    if checked.concealed_size() + checked.display_size() > MAX_HAND_TILES:
+        raise HTTPException(status_code=400, detail=f"More than {MAX_HAND_TILES} tiles")
+
+
+def tile_count(req: HandRequest) -> int:
+    """
+    Concealed plus display tiles (display and flowers may be null).
+    """
+    return len(req.concealed) + len(req.display or [])
+
+
+def clamp_query(name: str, value, maximum, allow_zero: bool = False):
+    """
+    A query parameter capped at its server maximum; 400 when it is not
+    positive (or negative, with allow_zero). None keeps the default.
+    """
+    if value is None:
+        return None
+    if value < 0 or (value == 0 and not allow_zero):
+        bound = "at least 0" if allow_zero else "positive"
+        raise HTTPException(status_code=400, detail=f"{name} must be {bound}")
+    return min(value, maximum)
+
+
+def request_profile(req: HandRequest) -> ScoringProfile:
+    """
+    Scoring profile of the request's game context (the configured one when
+    the request has none).
+    """
+    context = req.context.model_dump() if req.context is not None else {}
+    try:
+        return scoring_profile(**context)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def warm_up() -> None:
+    """
+    Fills the meld cache and loads the discard model (when a model file
+    exists). Requests served before it finishes still work: the model
+    loads on first use.
+    """
+    try:
+        win_checker.warm_meld_cache()
+        READINESS["meld_cache"] = True
+        if model.file_version() is not None:
+            model.get_model()
+    except Exception as e:
+        READINESS["error"] = str(e)
+    READINESS["warmup_seconds"] = time.monotonic() - _STARTED_AT
+
+
+@app.on_event("startup")
+def start_warm_up():
+    # In the background by default, so the port opens (and liveness
+    # passes) while the model loads; /ready reports when it is done
+    if server_config.get_background_warmup():
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        warm_up()
+    model.start_model_watcher()
+
+
+@app.on_event("startup")
+async def start_batcher():
+    if server_config.get_micro_batch_enabled():
+        BATCHER.start()
+
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    global _session_sweeper
+
+    async def sweep():
+        interval = min(max(SESSIONS.idle_seconds / 4, 1.0), 60.0)
+        while True:
+            await asyncio.sleep(interval)
+            SESSIONS.evict_idle()
+
+    _session_sweeper = asyncio.get_running_loop().create_task(sweep())
+
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    if _session_sweeper is not None:
+        _session_sweeper.cancel()
+
+
+@app.on_event("shutdown")
+def stop_simulation_pool():
+    monte_carlo.shutdown_pool()
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await BATCHER.stop()
+
+
+# -------------------------
+# Liveness and readiness
+# -------------------------
+@app.get("/health")
+def health():
+    return {"status": "alive"}
+
+
+def model_state():
+    """
+    True once a model is loaded, "absent" while there is no model file
+    (the watcher loads one when it appears), False while it loads.
+    """
+    if model.MODEL is not None:
+        return True
+    return "absent" if model.file_version() is None else False
+
+
+@app.get("/ready")
+def ready():
+    status = dict(READINESS)
+    status["model"] = model_state()
+    status["ready"] = status["meld_cache"] and status["model"] is True
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+# -------------------------
+# Loaded model
+# -------------------------
+@app.get("/model")
+def model_info():
+    return model.model_info()
+
+
+# -------------------------
+# Cache statistics
+# -------------------------
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "meld_cache": win_checker.meld_cache_stats(),
+        "predict_cache": prediction_cache_stats(),
+        "scoring_profiles": profile_cache_stats(),
+        "sessions": SESSIONS.stats()
+    }
+
+
+# -------------------------
+# Prometheus metrics
+# -------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# -------------------------
+# Serving mode
+# -------------------------
+@app.get("/serving")
+def serving_info():
+    return {
+        "mode": "micro_batch" if BATCHER.running else "direct",
+        "batcher": BATCHER.stats()
+    }
+
 
 # -------------------------
 # JSON-based prediction
 # -------------------------
 @app.post("/predict", response_model=PredictionResponse)
-def predict(req: HandRequest):
-    my_hand = hand.encode_hand(
-        req.concealed,
-        req.flowers,
-        req.display
-    )
-    return predict_best_discard(my_hand)
+async def predict(req: HandRequest):
+    # Checked before queueing: a batch only holds hands the model can answer
+    validate_hand(req)
+    my_hand = encode_request(req)
+    profile = request_profile(req)
+    if BATCHER.running:
+        with metrics.stage("micro_batch"):
+            result = await BATCHER.submit((my_hand, profile))
+    else:
+        result = await run_in_threadpool(cached_predict_best_discard, my_hand, profile)
+    metrics.record_prediction(result)
+    return result
+
+
+# -------------------------
+# Batch prediction
+# -------------------------
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(req: BatchHandRequest):
+    max_size = server_config.get_max_batch_size()
+    if len(req.hands) > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {max_size} hands per batch"
+        )
+
+    for i, h in enumerate(req.hands):
+        try:
+            validate_hand(h)
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Hand {i}: {e.detail}")
+
+    hands = [encode_request(h) for h in req.hands]
+    profiles = [request_profile(h) for h in req.hands]
+    results = predict_best_discards(hands, profiles)
+    for result in results:
+        metrics.record_prediction(result)
+    return {"results": results}
+
+
+# -------------------------
+# Monte Carlo prediction
+# -------------------------
+@app.post("/predict/simulate", response_model=SimulatedPredictionResponse)
+def predict_simulate(
+    req: HandRequest,
+    budget_ms: Optional[float] = None,
+    max_draws: Optional[int] = None
+):
+    validate_hand(req)
+    if tile_count(req) != 14:
+        raise HTTPException(
+            status_code=400,
+            detail="Simulation needs 14 tiles (concealed plus display)"
+        )
+    budget_ms = clamp_query("budget_ms", budget_ms, server_config.get_simulation_max_budget_ms())
+    max_draws = clamp_query("max_draws", max_draws, server_config.get_simulation_draws_limit())
+
+    my_hand = encode_request(req)
+    try:
+        return monte_carlo.evaluate_discards_mc(
+            my_hand,
+            budget_ms=budget_ms,
+            max_draws=max_draws,
+            profile=request_profile(req)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -------------------------
+# Expectimax search prediction
+# -------------------------
+@app.post("/predict/search", response_model=SearchPredictionResponse)
+def predict_search(
+    req: HandRequest,
+    budget_ms: Optional[float] = None,
+    max_depth: Optional[int] = None
+):
+    validate_hand(req)
+    if tile_count(req) != 14:
+        raise HTTPException(
+            status_code=400,
+            detail="Search needs 14 tiles (concealed plus display)"
+        )
+    # The unlimited budget (budget_ms=0) is for offline labeling only
+    budget_ms = clamp_query("budget_ms", budget_ms, server_config.get_search_max_budget_ms())
+    max_depth = clamp_query("max_depth", max_depth, server_config.get_search_depth_limit(), allow_zero=True)
+
+    my_hand = encode_request(req)
+    try:
+        return search.search_best_discard(
+            my_hand,
+            budget_ms=budget_ms,
+            max_depth=max_depth,
+            profile=request_profile(req)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -------------------------
+# Winning tiles of a ready hand
+# -------------------------
+@app.post("/waits", response_model=WaitsResponse)
+def waits(req: HandRequest):
+    validate_hand(req)
+    if tile_count(req) != 13:
+        raise HTTPException(
+            status_code=400,
+            detail="Waits need 13 tiles (concealed plus display)"
+        )
+
+    my_hand = encode_request(req)
+    found = find_waits(my_hand, profile=request_profile(req))
+    return {"tenpai": bool(found), "waits": found}
+
+# -------------------------
+# Live game session
+# -------------------------
+#
+# Client messages are JSON objects. {"op": "start", "concealed", "flowers",
+# "display", "context"} opens a session (or restarts the current one); the
+# other ops are the deltas of engine.session. Every message is answered
+# with {"session_id", "moves", "advice"} or {"error"}. Reconnect with
+# ?session_id=... to resume a session until it is evicted.
+@app.websocket("/ws/session")
+async def session_socket(websocket: WebSocket, session_id: Optional[str] = None):
+    await websocket.accept()
+    session = None
+    if session_id is not None:
+        session = SESSIONS.get(session_id)
+        if session is None or session.connected:
+            await websocket.send_json({"error": "Unknown, expired or already connected session"})
+            await websocket.close(code=4404)
+            return
+        session.connected = True
+
+    max_bytes = server_config.get_session_max_message_bytes()
+    try:
+        while True:
+            text = await websocket.receive_text()
+            if len(text) > max_bytes:
+                await websocket.send_json({"error": f"Messages are limited to {max_bytes} bytes"})
+                continue
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Messages are JSON objects")
+                if message.get("op") == "start":
+                    req = HandRequest(**{k: v for k, v in message.items() if k != "op"})
+                    my_hand = hand.Hand.from_tiles(req.concealed, req.flowers, req.display)
+                    profile = scoring_profile(**(req.context.model_dump() if req.context else {}))
+                    if session is None:
+                        created = SESSIONS.create(my_hand, profile)
+                        try:
+                            advice = await run_in_threadpool(created.advice)
+                        except Exception:
+                            SESSIONS.remove(created.session_id)
+                            raise
+                        session = created
+                        session.connected = True
+                    else:
+                        advice = await run_in_threadpool(session.reset_and_advise, my_hand, profile)
+                elif session is None:
+                    raise ValueError("Send a start message first")
+                else:
+                    advice = await run_in_threadpool(session.apply_and_advise, message)
+                SESSIONS.touch(session)
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            await websocket.send_json({
+                "session_id": session.session_id,
+                "moves": session.moves,
+                "advice": advice
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if session is not None:
+            session.connected = False
+
 
 '''
 # -------------------------
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+# ----------------------------
+# Micro-batching queue
+# ----------------------------
+#
+# Requests put (item, future) on an asyncio queue and await the future. A
+# single worker task takes the first waiting item, then keeps collecting
+# until it has max_size items or max_wait_ms has passed since the first
+# one, and hands the whole batch to fn in a thread pool, so the event loop
+# keeps accepting requests while the batch runs. Requests that arrive
+# during a batch are picked up together as soon as it finishes.
+#
+# When fn raises for a batch, its items are run again one at a time, so a
+# bad item fails only its own request and the rest of the batch is served.
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_size: int,
+        max_wait_ms: float,
+        executor: ThreadPoolExecutor = None
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.fn = fn
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._task = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.split_batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Starts the worker task; call from inside the running event loop.
+        """
+        if self.running:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batcher")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the worker and fails every request still waiting.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, item: Any) -> Any:
+        if not self.running:
+            raise RuntimeError("Batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_size:
+            # Whatever is already queued goes in without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _call_each(self, items: list) -> list:
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((self.fn([item])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def _call(self, items: list) -> list:
+        """
+        (result, exception) per item. Runs fn on the whole batch and, if
+        that raises, on each item alone.
+        """
+        try:
+            return [(result, None) for result in self.fn(items)]
+        except Exception as e:
+            if len(items) == 1:
+                return [(None, e)]
+        with self._lock:
+            self.split_batches += 1
+        return self._call_each(items)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests whose client went away are dropped before running
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                outcomes = await loop.run_in_executor(self._executor, self._call, [item for item, _ in batch])
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Batcher stopped"))
+                raise
+
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "max_size": self.max_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "split_batches": self.split_batches
+            }
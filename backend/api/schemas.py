@@ -1,10 +1,18 @@
 from pydantic import BaseModel
 from typing import List, Optional, Union
 
+class GameContext(BaseModel):
+    # Unset fields fall back to config.game_config
+    seat_wind: Optional[str] = None
+    round_wind: Optional[str] = None
+    seat_number: Optional[int] = None
+    use_flowers: Optional[bool] = None
+
 class HandRequest(BaseModel):
     concealed: List[str]
     flowers: Optional[List[str]] = []
     display: Optional[List[str]] = []
+    context: Optional[GameContext] = None
 
 class DiscardResponse(BaseModel):
     winning: bool
@@ -17,3 +25,52 @@ class WinBreakdownResponse(BaseModel):
     breakdown: List[str]
 
 PredictionResponse = Union[DiscardResponse, WinBreakdownResponse]
+
+class BatchHandRequest(BaseModel):
+    hands: List[HandRequest]
+
+class BatchPredictionResponse(BaseModel):
+    results: List[PredictionResponse]
+
+class WaitResponse(BaseModel):
+    tile: str
+    tai: int
+    breakdown: List[str]
+    live: int
+
+class WaitsResponse(BaseModel):
+    tenpai: bool
+    waits: List[WaitResponse]
+
+class SimulatedDiscardResponse(BaseModel):
+    discard: str
+    expected_tai: float
+    win_rate: float
+    ci_low: Optional[float] = None
+    ci_high: Optional[float] = None
+    simulations: int
+    pruned: bool
+
+class SimulationResponse(BaseModel):
+    winning: bool
+    best_discard: Optional[str] = None
+    candidates: List[SimulatedDiscardResponse]
+    simulations: int
+    elapsed_ms: float
+    stopped: str
+
+SimulatedPredictionResponse = Union[SimulationResponse, WinBreakdownResponse]
+
+class SearchedDiscardResponse(BaseModel):
+    discard: str
+    value: float
+
+class SearchResponse(BaseModel):
+    winning: bool
+    best_discard: Optional[str] = None
+    depth: int
+    candidates: List[SearchedDiscardResponse]
+    nodes: int
+    elapsed_ms: float
+
+SearchPredictionResponse = Union[SearchResponse, WinBreakdownResponse]
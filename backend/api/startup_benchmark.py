@@ -0,0 +1,118 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# ----------------------------
+# Cold start benchmark
+# ----------------------------
+#
+# Every run is a fresh interpreter, so nothing is already in sys.modules:
+#   python -m api.startup_benchmark --runs 5 --max-import-ms 400
+# reports the import time of api.app, the wall time of a process that
+# only imports it (next to an empty interpreter, the floor), the time
+# warm_up() then takes to load the model and fill the caches, and the
+# packages that cost the most to import (self time summed per top-level
+# package, from python -X importtime). With --max-import-ms it exits 1
+# when the median import is slower, so it can guard CI.
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, time
+start = time.perf_counter()
+import {module} as app_module
+imported = time.perf_counter()
+warm_ms = None
+if {warm}:
+    app_module.warm_up()
+    warm_ms = (time.perf_counter() - imported) * 1000
+print(json.dumps({{"import_ms": (imported - start) * 1000, "warm_up_ms": warm_ms}}))
+"""
+
+
+def _run(args: list) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def _process_ms(code: str) -> float:
+    start = time.perf_counter()
+    _run(["-c", code])
+    return (time.perf_counter() - start) * 1000
+
+
+def import_profile(module: str = "api.app") -> dict:
+    """
+    Import milliseconds (self time) per top-level package, from one
+    python -X importtime run.
+    """
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    by_package = defaultdict(float)
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():
+            continue
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+    return dict(by_package)
+
+
+def run_benchmark(module: str = "api.app", runs: int = 5, warm: bool = True, top: int = 10) -> dict:
+    interpreter = statistics.median(_process_ms("pass") for _ in range(runs))
+    process = statistics.median(_process_ms(f"import {module}") for _ in range(runs))
+
+    imports, warm_ups = [], []
+    for _ in range(runs):
+        result = json.loads(_run(["-c", _CHILD.format(module=module, warm=warm)]).stdout.splitlines()[-1])
+        imports.append(result["import_ms"])
+        if result["warm_up_ms"] is not None:
+            warm_ups.append(result["warm_up_ms"])
+
+    packages = sorted(import_profile(module).items(), key=lambda item: -item[1])
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": {
+            "min": min(imports),
+            "median": statistics.median(imports),
+            "max": max(imports)
+        },
+        "process_ms": process,
+        "interpreter_ms": interpreter,
+        "warm_up_ms": statistics.median(warm_ups) if warm_ups else None,
+        "heaviest_packages": [{"package": name, "ms": ms} for name, ms in packages[:top]]
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the API's cold start.")
+    parser.add_argument("--module", default="api.app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-warm-up", action="store_true")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--output", default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.module, args.runs, not args.no_warm_up, args.top)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text)
+
+    if args.max_import_ms is not None and report["import_ms"]["median"] > args.max_import_ms:
+        print(f"Median import {report['import_ms']['median']:.0f} ms exceeds {args.max_import_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a fixed number of entries and an optional
+    time-to-live in seconds. Keeps hit, miss, eviction and expiration
+    counters for monitoring.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._expires = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING and self.ttl is not None \
+                    and self._expires[key] <= time.monotonic():
+                del self._data[key]
+                del self._expires[key]
+                self.expirations += 1
+                value = _MISSING
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            if len(self._data) > self.maxsize:
+                self._evict_oldest()
+                self.evictions += 1
+
+    def _evict_oldest(self) -> None:
+        old_key, _ = self._data.popitem(last=False)
+        self._expires.pop(old_key, None)
+
+    def resize(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._evict_oldest()
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the cache: the table plus keys and values.
+        """
+        with self._lock:
+            items = list(self._data.items())
+        return sys.getsizeof(self._data) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in items
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bytes": self.size_bytes()
+        }
@@ -0,0 +1,113 @@
+import os
+
+
+def get_meld_cache_size():
+    return int(os.environ.get("MAHJONG_MELD_CACHE_SIZE", 50_000))
+
+
+def get_meld_cache_warmup():
+    return int(os.environ.get("MAHJONG_MELD_CACHE_WARMUP", 5_000))
+
+
+def get_predict_cache_size():
+    return int(os.environ.get("MAHJONG_PREDICT_CACHE_SIZE", 100_000))
+
+
+def get_predict_cache_ttl():
+    return float(os.environ.get("MAHJONG_PREDICT_CACHE_TTL", 3600))
+
+
+def get_model_reload_interval():
+    return float(os.environ.get("MAHJONG_MODEL_RELOAD_INTERVAL", 5))
+
+
+def get_model_mmap():
+    return os.environ.get("MAHJONG_MODEL_MMAP", "1") != "0"
+
+
+def get_max_batch_size():
+    return int(os.environ.get("MAHJONG_MAX_BATCH_SIZE", 10_000))
+
+
+def get_simulation_budget_ms():
+    return float(os.environ.get("MAHJONG_SIMULATION_BUDGET_MS", 2000))
+
+
+def get_simulation_max_budget_ms():
+    return float(os.environ.get("MAHJONG_SIMULATION_MAX_BUDGET_MS", 10_000))
+
+
+def get_simulation_draws_limit():
+    return int(os.environ.get("MAHJONG_SIMULATION_DRAWS_LIMIT", 60))
+
+
+def get_simulation_workers():
+    return int(os.environ.get("MAHJONG_SIMULATION_WORKERS", os.cpu_count() or 1))
+
+
+def get_simulation_draws():
+    return int(os.environ.get("MAHJONG_SIMULATION_DRAWS", 15))
+
+
+def get_simulation_batch_size():
+    return int(os.environ.get("MAHJONG_SIMULATION_BATCH_SIZE", 100))
+
+
+def get_simulation_max_per_discard():
+    return int(os.environ.get("MAHJONG_SIMULATION_MAX_PER_DISCARD", 5_000))
+
+
+def get_search_budget_ms():
+    return float(os.environ.get("MAHJONG_SEARCH_BUDGET_MS", 500))
+
+
+def get_search_max_depth():
+    return int(os.environ.get("MAHJONG_SEARCH_MAX_DEPTH", 4))
+
+
+def get_search_max_budget_ms():
+    return float(os.environ.get("MAHJONG_SEARCH_MAX_BUDGET_MS", 5000))
+
+
+def get_search_depth_limit():
+    return int(os.environ.get("MAHJONG_SEARCH_DEPTH_LIMIT", 8))
+
+
+def get_search_draws():
+    return int(os.environ.get("MAHJONG_SEARCH_DRAWS", 15))
+
+
+def get_micro_batch_enabled():
+    return os.environ.get("MAHJONG_MICRO_BATCH", "0") != "0"
+
+
+def get_micro_batch_max_size():
+    return int(os.environ.get("MAHJONG_MICRO_BATCH_MAX_SIZE", 64))
+
+
+def get_micro_batch_max_wait_ms():
+    return float(os.environ.get("MAHJONG_MICRO_BATCH_MAX_WAIT_MS", 2))
+
+
+def get_metrics_enabled():
+    return os.environ.get("MAHJONG_METRICS", "1") != "0"
+
+
+def get_debug_timing():
+    return os.environ.get("MAHJONG_DEBUG_TIMING", "0") != "0"
+
+
+def get_session_max():
+    return int(os.environ.get("MAHJONG_SESSION_MAX", 10_000))
+
+
+def get_session_idle_seconds():
+    return float(os.environ.get("MAHJONG_SESSION_IDLE_SECONDS", 600))
+
+
+def get_session_max_message_bytes():
+    return int(os.environ.get("MAHJONG_SESSION_MAX_MESSAGE_BYTES", 4096))
+
+
+def get_background_warmup():
+    return os.environ.get("MAHJONG_BACKGROUND_WARMUP", "1") != "0"
@@ -0,0 +1,68 @@
+from itertools import permutations
+from typing import Tuple
+
+from representation.all_tiles import ALL_TILES, SUITS, TILE_INDEX
+from representation.hand import Hand, CONCEALED_OFFSET, DISPLAY_OFFSET
+
+# ----------------------------
+# Canonical hand form
+# ----------------------------
+#
+# Hands are already order-free as counts. On top of that BAM, CHAR and DOT
+# are interchangeable for suit-blind rules, so the canonical form relabels
+# the suits to the permutation that gives the smallest count bytes.
+# A permutation `perm` places source suit perm[i] at canonical position i.
+
+NUM_RANKS = 9
+NUM_SUITED = NUM_RANKS * len(SUITS)
+
+IDENTITY = (0, 1, 2)
+SUIT_PERMUTATIONS = list(permutations(range(len(SUITS))))
+
+
+def _suit_blocks(raw: bytes, offset: int):
+    return [
+        raw[offset + s * NUM_RANKS:offset + (s + 1) * NUM_RANKS]
+        for s in range(len(SUITS))
+    ]
+
+
+def canonical_key(hand: Hand, suit_symmetric: bool = True) -> Tuple[bytes, Tuple[int, ...]]:
+    """
+    Returns (key, perm). With suit_symmetric=False the suits are kept as
+    they are and perm is the identity.
+    """
+    raw = hand.counts.tobytes()
+    if not suit_symmetric:
+        return raw, IDENTITY
+
+    concealed = _suit_blocks(raw, CONCEALED_OFFSET)
+    display = _suit_blocks(raw, DISPLAY_OFFSET)
+    concealed_honors = raw[CONCEALED_OFFSET + NUM_SUITED:DISPLAY_OFFSET]
+    display_rest = raw[DISPLAY_OFFSET + NUM_SUITED:]
+
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        key = (
+            b"".join(concealed[s] for s in perm) + concealed_honors +
+            b"".join(display[s] for s in perm) + display_rest
+        )
+        if best is None or key < best[0]:
+            best = (key, perm)
+    return best
+
+
+def to_canonical_tile(tile: str, perm: Tuple[int, ...]) -> str:
+    i = TILE_INDEX[tile]
+    if i >= NUM_SUITED:
+        return tile
+    suit, rank = divmod(i, NUM_RANKS)
+    return ALL_TILES[perm.index(suit) * NUM_RANKS + rank]
+
+
+def from_canonical_tile(tile: str, perm: Tuple[int, ...]) -> str:
+    i = TILE_INDEX[tile]
+    if i >= NUM_SUITED:
+        return tile
+    position, rank = divmod(i, NUM_RANKS)
+    return ALL_TILES[perm[position] * NUM_RANKS + rank]
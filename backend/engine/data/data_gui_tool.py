@@ -1,8 +1,11 @@
 import csv
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 CSV_FILE = "backend/engine/data/raw_data.csv"  # your CSV path
+TRAIN_POLL_MS = 200
 
 class MahjongEditor:
     def __init__(self, master):
@@ -10,6 +13,8 @@ class MahjongEditor:
         self.master.title("Mahjong Best Discard Editor")
         self.data = []
         self.index = 0
+        # Outcome queue of the training thread while one runs
+        self.training = None
 
         # Load CSV
         self.load_csv()
@@ -43,6 +48,8 @@ class MahjongEditor:
         tk.Button(btn_frame, text="Previous", command=self.prev_row).grid(row=0, column=0, padx=5)
         tk.Button(btn_frame, text="Next", command=self.next_row).grid(row=0, column=1, padx=5)
         tk.Button(btn_frame, text="Save CSV", command=self.save_csv).grid(row=0, column=2, padx=5)
+        self.update_button = tk.Button(btn_frame, text="Update Model", command=self.update_model)
+        self.update_button.grid(row=0, column=3, padx=5)
 
         self.show_row()
 
@@ -82,3 +89,50 @@ class MahjongEditor:
             writer.writeheader()
             writer.writerows(self.data)
         messagebox.showinfo("Saved", "CSV saved successfully!")
+
+    def update_model(self):
+        """
+        Saves the CSV and trains only the rows the model has not seen yet.
+        Training runs in a worker thread so the editor stays responsive;
+        the running server hot-reloads the result.
+        """
+        if self.training is not None:
+            return
+        self.save_csv()
+        self.update_button.config(state=tk.DISABLED, text="Training...")
+        self.training = queue.Queue()
+        threading.Thread(target=self._train, args=(self.training,), daemon=True).start()
+        self.master.after(TRAIN_POLL_MS, self._check_training)
+
+    def _train(self, outcomes):
+        # Worker thread: no Tk calls here, the outcome goes back via the queue
+        from engine.model import train_incremental
+
+        try:
+            outcomes.put((train_incremental(CSV_FILE), None))
+        except Exception as e:
+            outcomes.put((None, e))
+
+    def _check_training(self):
+        try:
+            result, error = self.training.get_nowait()
+        except queue.Empty:
+            self.master.after(TRAIN_POLL_MS, self._check_training)
+            return
+        self.training = None
+        self.update_button.config(state=tk.NORMAL, text="Update Model")
+
+        if error is not None:
+            messagebox.showerror("Model", f"Training failed: {error}")
+            return
+        if result["status"] == "up_to_date":
+            messagebox.showinfo("Model", "No new labeled rows to train.")
+            return
+
+        accuracy = result["accuracy_after"]
+        accuracy_text = "n/a" if accuracy is None else f"{accuracy:.3f}"
+        messagebox.showinfo(
+            "Model",
+            f"{result['status'].capitalize()}: {result['new_rows']} new rows, "
+            f"held-out accuracy {accuracy_text} ({result['seconds']:.1f}s)"
+        )
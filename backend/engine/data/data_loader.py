@@ -1,15 +1,55 @@
 import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
 import representation.hand as hand
 import representation.all_tiles as all_tiles
-from engine.encoder import encode_hand, encode_single_tile
+from engine.encoder import encode_batch, encode_hand, ENCODED_SIZE
 
 def parse_tiles(tile_str):
     if not tile_str:
         return []
     return [t.strip() for t in tile_str.split(";") if t.strip()]
 
+def parse_row(row):
+    """
+    Hand dict and label of one CSV row.
+    The label is the discard's position among the sorted concealed tiles.
+    """
+    concealed = parse_tiles(row["concealed"])
+    display = parse_tiles(row["display"])
+    flowers = parse_tiles(row["flowers"])
+    best_discard = row["best_discard"].strip()
+
+    hand_obj = hand.encode_hand(
+        concealed,
+        display_list=display,
+        flowers_list=flowers
+    )
+
+    sorted_concealed = sorted(concealed, key = all_tiles.TILE_INDEX.__getitem__)
+    if best_discard not in sorted_concealed:
+        label = 0
+    else:
+        label = sorted_concealed.index(best_discard)
+    return hand_obj, label
+
+def encode_row(row):
+    """
+    Encoded features (bytes) and label of one CSV row.
+    """
+    hand_obj, label = parse_row(row)
+    return bytes(encode_hand(hand_obj)), label
+
 def load_training_data(csv_path, max_rows = None):
-    X = []
+    # Encoded rows are appended as raw bytes: 68 bytes per hand
+    X = bytearray()
     y = []
 
     with open(csv_path, newline="", encoding="utf-8") as f:
@@ -17,23 +57,149 @@ def load_training_data(csv_path, max_rows = None):
         for i,row in enumerate(reader):
             if max_rows is not None and i >= max_rows:
                 break
-            concealed = parse_tiles(row["concealed"])
-            display = parse_tiles(row["display"])
-            flowers = parse_tiles(row["flowers"])
-            best_discard = row["best_discard"].strip()
-
-            hand_obj = hand.encode_hand(
-                concealed,
-                display_list=display,
-                flowers_list=flowers
-            )
-
-            encoded = encode_hand(hand_obj)
-            X.append(encoded)
-            sorted_concealed = sorted(concealed, key = lambda x: all_tiles.ALL_TILES.index(x))
-            if best_discard not in sorted_concealed:
-                y.append(0)
-            else:
-                discard_idx = sorted_concealed.index(best_discard)
-                y.append(discard_idx)
+            features, label = encode_row(row)
+            X += features
+            y.append(label)
+    return np.frombuffer(X, dtype=np.uint8).reshape(-1, ENCODED_SIZE), y
+
+# ----------------------------
+# Cached binary dataset
+# ----------------------------
+#
+# A CSV is converted once into <csv dir>/.dataset_cache/<stem>-<hash>-v<n>/
+# with X.npy (N, 68) uint8 features, y.npy (N,) int8 labels, keys.npy
+# (N, 20) uint8 row keys (see row_key) and labeled.npy (N,) bool, true
+# where best_discard is set. The hash is of the CSV contents, so editing
+# the CSV produces a new cache entry; n is DATASET_VERSION, bumped when the
+# files change.
+
+CACHE_DIR_NAME = ".dataset_cache"
+DATASET_VERSION = 2
+HASH_CHUNK = 1 << 20
+KEY_BYTES = 20
+
+def row_key(row) -> bytes:
+    """
+    SHA-1 of all four columns of a CSV row, so a changed label is a new key.
+    """
+    text = "|".join(row[c].strip() for c in ("concealed", "display", "flowers", "best_discard"))
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+def csv_hash(csv_path) -> str:
+    digest = hashlib.sha1()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def dataset_dir(csv_path, cache_root=None) -> Path:
+    csv_path = Path(csv_path)
+    root = Path(cache_root) if cache_root else csv_path.parent / CACHE_DIR_NAME
+    return root / f"{csv_path.stem}-{csv_hash(csv_path)}-v{DATASET_VERSION}"
+
+def write_npy(raw_path, npy_path, dtype, shape) -> None:
+    # Prepend an .npy header to rows already written as raw bytes
+    with open(npy_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(
+            out,
+            {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": shape}
+        )
+        shutil.copyfileobj(raw, out, HASH_CHUNK)
+
+def convert_csv_to_dataset(csv_path, cache_root=None, chunk_rows=100_000) -> Path:
+    """
+    Converts the CSV into the binary dataset (once per CSV contents) and
+    returns its directory. Rows are encoded and written in chunks, so
+    memory stays bounded for any CSV size.
+    """
+    target = dataset_dir(csv_path, cache_root)
+    if (target / "meta.json").exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+    try:
+        rows = 0
+        with open(csv_path, newline="", encoding="utf-8") as f, \
+                open(tmp / "X.raw", "wb") as x_raw, open(tmp / "y.raw", "wb") as y_raw, \
+                open(tmp / "keys.raw", "wb") as keys_raw, open(tmp / "labeled.raw", "wb") as labeled_raw:
+            reader = csv.DictReader(f)
+            hands, y_buf, keys_buf, labeled_buf = [], bytearray(), bytearray(), bytearray()
+            for row in reader:
+                hand_obj, label = parse_row(row)
+                hands.append(hand_obj)
+                y_buf.append(label)
+                keys_buf += row_key(row)
+                labeled_buf.append(bool(row["best_discard"].strip()))
+                rows += 1
+                if len(y_buf) >= chunk_rows:
+                    x_raw.write(encode_batch(hands).tobytes())
+                    y_raw.write(y_buf)
+                    keys_raw.write(keys_buf)
+                    labeled_raw.write(labeled_buf)
+                    hands, y_buf, keys_buf, labeled_buf = [], bytearray(), bytearray(), bytearray()
+            x_raw.write(encode_batch(hands).tobytes())
+            y_raw.write(y_buf)
+            keys_raw.write(keys_buf)
+            labeled_raw.write(labeled_buf)
+
+        for name, dtype, shape in (
+            ("X", np.uint8, (rows, ENCODED_SIZE)),
+            ("y", np.int8, (rows,)),
+            ("keys", np.uint8, (rows, KEY_BYTES)),
+            ("labeled", np.bool_, (rows,))
+        ):
+            write_npy(tmp / f"{name}.raw", tmp / f"{name}.npy", dtype, shape)
+            (tmp / f"{name}.raw").unlink()
+
+        (tmp / "meta.json").write_text(json.dumps({
+            "source": str(csv_path),
+            "rows": rows,
+            "features": ENCODED_SIZE
+        }))
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Another process finished the same conversion first
+            if not (target / "meta.json").exists():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return target
+
+def load_dataset(csv_path, max_rows=None, mmap=True, cache_root=None):
+    """
+    X (N, 68) uint8 and y (N,) int8 for the CSV, converting it on first use.
+    With mmap the arrays are read-only memory maps.
+    """
+    target = convert_csv_to_dataset(csv_path, cache_root)
+    mode = "r" if mmap else None
+    X = np.load(target / "X.npy", mmap_mode=mode)
+    y = np.load(target / "y.npy", mmap_mode=mode)
+    if max_rows is not None:
+        X, y = X[:max_rows], y[:max_rows]
     return X, y
+
+def load_row_keys(csv_path, max_rows=None, cache_root=None):
+    """
+    keys (N, 20) uint8 and labeled (N,) bool for the CSV, as read-only
+    memory maps, converting it on first use.
+    """
+    target = convert_csv_to_dataset(csv_path, cache_root)
+    keys = np.load(target / "keys.npy", mmap_mode="r")
+    labeled = np.load(target / "labeled.npy", mmap_mode="r")
+    if max_rows is not None:
+        keys, labeled = keys[:max_rows], labeled[:max_rows]
+    return keys, labeled
+
+def iter_dataset_chunks(csv_path, chunk_rows=100_000, cache_root=None):
+    """
+    Streams (X, y) chunks of the cached dataset.
+    """
+    X, y = load_dataset(csv_path, cache_root=cache_root)
+    for start in range(0, len(y), chunk_rows):
+        yield (
+            np.asarray(X[start:start + chunk_rows]),
+            np.asarray(y[start:start + chunk_rows])
+        )
@@ -1,15 +1,25 @@
 # =========================
 # Standard library imports
 # =========================
-import csv
+import contextlib
+import json
+import os
 import random
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 # =========================
 # Third-party imports
 # =========================
+import numpy as np
 import pandas as pd
 
+# =========================
+# Project imports
+# =========================
+from engine.encoder import encode_matrices, ENCODED_SIZE, ENCODER_ORDER, NUM_TILE_TYPES
+from engine.data.data_loader import write_npy
+
 # =========================
 # Constants
 # =========================
@@ -26,52 +36,151 @@ FLOWERS = [
 
 ALL_TILES = [f"{n}_{s}" for s in SUITS for n in NUMBERS] + WINDS + DRAGONS
 HONORS = set(WINDS + DRAGONS)
+TILE_ID = {t: i for i, t in enumerate(ALL_TILES)}
+NUM_SUITED = len(SUITS) * len(NUMBERS)
+
+# Physical wall as tile ids (4 copies of each ALL_TILES entry)
+WALL_IDS = np.repeat(np.arange(len(ALL_TILES), dtype=np.uint8), 4)
+WALL = [ALL_TILES[i] for i in WALL_IDS]
+
+HAND_SIZE = 14
+MAX_FLOWERS = 2
+CSV_HEADER = ["concealed", "display", "flowers", "best_discard"]
+WRITE_BUFFER = 1 << 20
+# Up to this many hands, starting a process pool costs more than it saves
+IN_PROCESS_MAX_HANDS = 20_000
 
 # =========================
 # Random hand generation
 # =========================
 def generate_random_concealed_hand() -> list[str]:
-    counts = Counter()
-    hand_tiles = []
+    hand_tiles = random.sample(WALL, HAND_SIZE)
+    hand_tiles.sort(key=TILE_ID.__getitem__)
+    return hand_tiles
 
-    while len(hand_tiles) < 14:
-        tile = random.choice(ALL_TILES)
-        if counts[tile] < 4:
-            counts[tile] += 1
-            hand_tiles.append(tile)
+def generate_hand_batch(rng: np.random.Generator, num_hands: int):
+    """
+    Deals num_hands hands from independently shuffled walls.
 
-    return hand_tiles
+    Returns (tiles, flowers): tiles is (N, 14) uint8 tile ids sorted in
+    ALL_TILES order, flowers is (N, 12) bool marking 0-2 random flowers.
+    """
+    walls = rng.permuted(np.broadcast_to(WALL_IDS, (num_hands, len(WALL_IDS))), axis=1)
+    tiles = np.sort(walls[:, :HAND_SIZE], axis=1)
 
-def write_random_hands_to_csv(csv_path: str, num_hands: int = 1_000):
-    def draw_tile(pool):
-        choices = [t for t, c in pool.items() if c > 0]
-        tile = random.choice(choices)
-        pool[tile] -= 1
-        return tile
+    # Random subset of 0..MAX_FLOWERS flowers: rank a random key per flower
+    num_flowers = rng.integers(0, MAX_FLOWERS + 1, size=num_hands)
+    ranks = rng.random((num_hands, len(FLOWERS))).argsort(axis=1).argsort(axis=1)
+    flowers = ranks < num_flowers[:, None]
+
+    return tiles, flowers
+
+def _csv_chunk(seed, num_hands: int) -> str:
+    rng = np.random.default_rng(seed)
+    tiles, flowers = generate_hand_batch(rng, num_hands)
+
+    lines = []
+    for hand_ids, hand_flowers in zip(tiles.tolist(), flowers.tolist()):
+        concealed = ";".join(ALL_TILES[i] for i in hand_ids)
+        picked = ";".join(f for f, has in zip(FLOWERS, hand_flowers) if has)
+        lines.append(f'"{concealed}","","{picked}",""\n')
+    return "".join(lines)
+
+def _npy_chunk(seed, num_hands: int):
+    rng = np.random.default_rng(seed)
+    tiles, flowers = generate_hand_batch(rng, num_hands)
+
+    counts = np.zeros((num_hands, len(ALL_TILES)), dtype=np.uint8)
+    np.add.at(counts, (np.arange(num_hands)[:, None], tiles), 1)
+    display = np.zeros_like(counts)
+    return encode_matrices(counts, display).tobytes(), flowers.astype(np.uint8).tobytes()
+
+def _chunk_plan(num_hands: int, chunk_size: int, seed: int):
+    sizes = [chunk_size] * (num_hands // chunk_size)
+    if num_hands % chunk_size:
+        sizes.append(num_hands % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return seeds, sizes
+
+def generate_hands(
+    output_path: str,
+    num_hands: int,
+    fmt: str = "csv",
+    seed: int = 0,
+    workers: int | None = None,
+    chunk_size: int = 50_000
+) -> str:
+    """
+    Generates num_hands random hands across a process pool (in this
+    process for small counts, a single chunk or workers=1).
+
+    Each chunk gets its own SeedSequence child of `seed`, so output only
+    depends on seed and chunk_size, not on the number of workers.
+
+    fmt="csv": appends rows to output_path (header written if new).
+    fmt="npy": writes a dataset directory like data_loader's cache:
+    X.npy (N, 68) uint8 features, y.npy (N,) int8 labels (-1 = unlabeled),
+    flowers.npy (N, 12) uint8 and meta.json.
+    """
+    if fmt not in ("csv", "npy"):
+        raise ValueError(f"Unknown format: {fmt}")
+
+    seeds, sizes = _chunk_plan(num_hands, chunk_size, seed)
+    worker = _csv_chunk if fmt == "csv" else _npy_chunk
 
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+    in_process = workers == 1 or len(sizes) == 1 or num_hands <= IN_PROCESS_MAX_HANDS
+    pool_context = contextlib.nullcontext() if in_process else ProcessPoolExecutor(max_workers=workers)
 
-        for _ in range(num_hands):
-            pool = {t: 4 for t in ALL_TILES}
-            display = []
+    with pool_context as pool:
+        chunks = map(worker, seeds, sizes) if pool is None else pool.map(worker, seeds, sizes)
 
-            concealed = [draw_tile(pool) for _ in range(14)]
-            concealed.sort(key=ALL_TILES.index)
+        if fmt == "csv":
+            new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+            with open(output_path, "a", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+                if new_file:
+                    f.write(",".join(CSV_HEADER) + "\n")
+                for text in chunks:
+                    f.write(text)
+            return output_path
 
-            flowers = random.sample(FLOWERS, k=random.randint(0, 2))
+        out_dir = Path(output_path)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / "X.raw", "wb", buffering=WRITE_BUFFER) as x_raw, \
+                open(out_dir / "flowers.raw", "wb", buffering=WRITE_BUFFER) as f_raw:
+            for features, flowers in chunks:
+                x_raw.write(features)
+                f_raw.write(flowers)
 
-            writer.writerow([
-                ";".join(concealed),
-                ";".join(display),
-                ";".join(flowers),
-                ""
-            ])
+    write_npy(out_dir / "X.raw", out_dir / "X.npy", np.uint8, (num_hands, ENCODED_SIZE))
+    write_npy(out_dir / "flowers.raw", out_dir / "flowers.npy", np.uint8, (num_hands, len(FLOWERS)))
+    (out_dir / "X.raw").unlink()
+    (out_dir / "flowers.raw").unlink()
+    np.save(out_dir / "y.npy", np.full(num_hands, -1, dtype=np.int8))
+    (out_dir / "meta.json").write_text(json.dumps({
+        "source": "generate_hands",
+        "rows": num_hands,
+        "features": ENCODED_SIZE,
+        "seed": seed,
+        "chunk_size": chunk_size
+    }))
+    return str(out_dir)
+
+def write_random_hands_to_csv(csv_path: str, num_hands: int = 1_000):
+    generate_hands(
+        csv_path,
+        num_hands,
+        seed=random.getrandbits(64),
+        workers=1
+    )
 
 # =========================
 # Heuristic labeling
 # =========================
 def calculate_best_discard(concealed: str, flowers: str | None) -> str | None:
+    """
+    Highest-scoring tile to discard. Equal scores go to the first tile in
+    ALL_TILES order, as in best_discard_ids.
+    """
     if not concealed or pd.isna(concealed):
         return None
 
@@ -84,8 +193,10 @@ def calculate_best_discard(concealed: str, flowers: str | None) -> str | None:
     }
     dominant_suit = max(suit_counts, key=suit_counts.get)
 
+    # Scored in ALL_TILES order so max() keeps the first of equal scores
+    # (set order depends on the process's string hash seed)
     scores = {}
-    for t in set(tiles):
+    for t in sorted(set(tiles), key=TILE_ID.__getitem__):
         count = tiles.count(t)
 
         if t in HONORS:
@@ -106,13 +217,103 @@ def calculate_best_discard(concealed: str, flowers: str | None) -> str | None:
 
     return max(scores, key=scores.get)
 
-def process_csv(input_path: str, output_path: str):
-    df = pd.read_csv(input_path)
-    mask = df["best_discard"].isna() | (df["best_discard"] == "")
+def tiles_to_counts(concealed: pd.Series) -> np.ndarray:
+    """
+    ';'-joined tile strings -> (N, 34) uint8 counts in ALL_TILES order.
+    Missing values give empty hands.
+    """
+    counts = np.zeros((len(concealed), len(ALL_TILES)), dtype=np.uint8)
+    exploded = concealed.fillna("").astype(str).reset_index(drop=True).str.split(";").explode()
+    exploded = exploded[exploded != ""]
+    ids = exploded.map(TILE_ID)
+    if ids.isna().any():
+        raise ValueError(f"Unknown tile: {exploded[ids.isna()].iloc[0]}")
+    np.add.at(counts, (exploded.index.to_numpy(), ids.to_numpy(dtype=np.intp)), 1)
+    return counts
 
-    df.loc[mask, "best_discard"] = df[mask].apply(
-        lambda r: calculate_best_discard(r["concealed"], r.get("flowers")),
-        axis=1
-    )
+def best_discard_ids(counts: np.ndarray, has_flowers: np.ndarray) -> np.ndarray:
+    """
+    Vectorized calculate_best_discard over (N, 34) counts.
+    Returns the ALL_TILES id of the discard, or -1 for empty hands.
+    Ties go to the first tile in ALL_TILES order.
+    """
+    n = counts.shape[0]
+    counts = counts.astype(np.int16)
+    suited = counts[:, :NUM_SUITED].reshape(n, len(SUITS), len(NUMBERS))
+
+    dominant = suited.sum(axis=2).argmax(axis=1)
+    off_suit = np.arange(len(SUITS))[None, :] != dominant[:, None]
+
+    padded = np.pad(suited, ((0, 0), (0, 0), (1, 1)))
+    has_neighbor = (padded[:, :, :-2] > 0) | (padded[:, :, 2:] > 0)
+    isolated = (suited == 1) & ~has_neighbor
+
+    suited_scores = np.where(isolated, 100, 20) + 10 * off_suit[:, :, None]
+
+    honors = counts[:, NUM_SUITED:]
+    honor_scores = np.where(honors == 1, 80, 40) + 20 * ~has_flowers[:, None]
+
+    scores = np.concatenate([suited_scores.reshape(n, NUM_SUITED), honor_scores], axis=1)
+    scores = np.where(counts > 0, scores, -1)
+
+    best = scores.argmax(axis=1)
+    best[counts.sum(axis=1) == 0] = -1
+    return best
+
+def label_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fills missing best_discard values of one DataFrame chunk.
+    """
+    df["best_discard"] = df["best_discard"].astype(object)
+    mask = (df["best_discard"].isna() | (df["best_discard"] == "")).to_numpy()
+    if not mask.any():
+        return df
+
+    rows = df[mask]
+    counts = tiles_to_counts(rows["concealed"])
+    if "flowers" in rows:
+        flowers = rows["flowers"]
+        has_flowers = (flowers.notna() & (flowers.astype(str) != "")).to_numpy()
+    else:
+        has_flowers = np.zeros(len(rows), dtype=bool)
+
+    best = best_discard_ids(counts, has_flowers)
+    names = np.array(ALL_TILES + [None], dtype=object)
+    df.loc[mask, "best_discard"] = names[best]
+    return df
+
+def process_csv(input_path: str, output_path: str, chunk_rows: int = 200_000):
+    for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_rows)):
+        label_chunk(chunk).to_csv(
+            output_path,
+            mode="w" if i == 0 else "a",
+            header=i == 0,
+            index=False
+        )
+
+def label_dataset(dataset_dir: str) -> np.ndarray:
+    """
+    Labels an unlabeled dataset written by generate_hands(fmt="npy").
+    Labels follow data_loader.encode_row: the discard's position among the
+    sorted concealed tiles.
+    """
+    dataset_dir = Path(dataset_dir)
+    X = np.load(dataset_dir / "X.npy", mmap_mode="r")
+    flowers = np.load(dataset_dir / "flowers.npy", mmap_mode="r")
+    y = np.load(dataset_dir / "y.npy", mmap_mode="r+")
+
+    # Encoder columns back to ALL_TILES order
+    to_all_tiles = np.argsort(ENCODER_ORDER)
+
+    chunk = 200_000
+    for start in range(0, len(y), chunk):
+        counts = np.asarray(X[start:start + chunk, :NUM_TILE_TYPES])[:, to_all_tiles]
+        has_flowers = np.asarray(flowers[start:start + chunk]).any(axis=1)
+        best = best_discard_ids(counts, has_flowers)
+
+        before = counts.cumsum(axis=1, dtype=np.int16) - counts
+        labels = before[np.arange(len(best)), np.maximum(best, 0)]
+        y[start:start + chunk] = np.where(best >= 0, labels, 0)
 
-    df.to_csv(output_path, index=False)
\ No newline at end of file
+    y.flush()
+    return y
@@ -1,4 +1,7 @@
-from collections import Counter
+import numpy as np
+
+from representation.hand import Hand, CONCEALED_OFFSET, DISPLAY_OFFSET, HAND_SIZE
+from representation.all_tiles import TILE_INDEX
 
 SUITS = ["DOT", "CHAR", "BAM"]
 NUMBERS = list(range(1, 10))
@@ -20,31 +23,140 @@ for w in WINDS:
 NUM_TILE_TYPES = len(ALL_TILES)
 ENCODED_SIZE = NUM_TILE_TYPES * 2
 
+# all_tiles.ALL_TILES column feeding every encoder slot. ALL_TILES above is
+# only the feature layout trained models expect: tiles are looked up with
+# all_tiles.TILE_INDEX and mapped to their slot through SLOT_OF_ID
+ENCODER_ORDER = np.array([TILE_INDEX[t] for t in ALL_TILES])
+if sorted(ENCODER_ORDER.tolist()) != list(range(len(TILE_INDEX))):
+    raise ImportError("The encoder layout is not a permutation of all_tiles.ALL_TILES")
+
+# Encoder slot of every all_tiles tile id
+SLOT_OF_ID = [0] * NUM_TILE_TYPES
+for _slot, _tile_id in enumerate(ENCODER_ORDER.tolist()):
+    SLOT_OF_ID[_tile_id] = _slot
+
+# Hand.counts position of every encoder slot
+HAND_SLOTS = (
+    [CONCEALED_OFFSET + TILE_INDEX[t] for t in ALL_TILES] +
+    [DISPLAY_OFFSET + TILE_INDEX[t] for t in ALL_TILES]
+)
+
 
 def encode_hand(hand_obj):
     """
     Encode hand as:
     [ concealed counts | displayed counts ]
     """
-    arr = [0] * ENCODED_SIZE
+    if isinstance(hand_obj, Hand):
+        counts = hand_obj.counts
+        return [counts[i] for i in HAND_SLOTS]
 
-    concealed = Counter(hand_obj.get("concealed", {}))
-    display = Counter(hand_obj.get("display", {}))
+    arr = [0] * ENCODED_SIZE
 
     # concealed part
-    for i, tile in enumerate(ALL_TILES):
-        arr[i] = concealed.get(tile, 0)
+    for tile, count in hand_obj.get("concealed", {}).items():
+        i = encode_single_tile(tile)
+        if i is not None:
+            arr[i] = count
 
     # displayed part
     offset = NUM_TILE_TYPES
-    for i, tile in enumerate(ALL_TILES):
-        arr[offset + i] = display.get(tile, 0)
+    for tile, count in hand_obj.get("display", {}).items():
+        i = encode_single_tile(tile)
+        if i is not None:
+            arr[offset + i] = count
 
     return arr
 
 
+def encode_batch(hands) -> np.ndarray:
+    """
+    Encode many hands (dicts or Hands) into a preallocated
+    (N, ENCODED_SIZE) uint8 array, one encode_hand row per hand.
+    """
+    n = len(hands)
+    out = np.zeros((n, ENCODED_SIZE), dtype=np.uint8)
+    if n == 0:
+        return out
+
+    if all(isinstance(h, Hand) for h in hands):
+        raw = np.frombuffer(b"".join(h.counts.tobytes() for h in hands), dtype=np.uint8)
+        out[:] = raw.reshape(n, HAND_SIZE)[:, HAND_SLOTS]
+        return out
+
+    rows, cols, values = [], [], []
+    for row, hand_obj in enumerate(hands):
+        if isinstance(hand_obj, Hand):
+            out[row] = np.frombuffer(hand_obj.counts, dtype=np.uint8)[HAND_SLOTS]
+            continue
+        for offset, part in ((0, "concealed"), (NUM_TILE_TYPES, "display")):
+            for tile, count in hand_obj.get(part, {}).items():
+                i = encode_single_tile(tile)
+                if i is not None:
+                    rows.append(row)
+                    cols.append(offset + i)
+                    values.append(count)
+
+    if rows:
+        out[rows, cols] = values
+    return out
+
+
+def encode_matrices(concealed: np.ndarray, display: np.ndarray) -> np.ndarray:
+    """
+    Encode (N, 34) concealed/display count matrices in all_tiles.ALL_TILES
+    order (as used by rules.batch) into (N, ENCODED_SIZE) uint8 rows.
+    """
+    out = np.empty((concealed.shape[0], ENCODED_SIZE), dtype=np.uint8)
+    out[:, :NUM_TILE_TYPES] = concealed[:, ENCODER_ORDER]
+    out[:, NUM_TILE_TYPES:] = display[:, ENCODER_ORDER]
+    return out
+
+
 def encode_single_tile(tile):
-    try:
-        return ALL_TILES.index(tile)
-    except ValueError:
-        return None
\ No newline at end of file
+    i = TILE_INDEX.get(tile)
+    return SLOT_OF_ID[i] if i is not None else None
+
+
+# ----------------------------
+# Feature encodings
+# ----------------------------
+#
+# Alternative views of the (N, ENCODED_SIZE) count rows, compared by
+# engine.sweep. The served model uses "counts".
+
+NUM_SUITED = 27
+NUM_RANKS = 9
+
+
+def _unary(X: np.ndarray) -> np.ndarray:
+    """
+    Concealed counts as >=1..>=4 indicator columns, display counts as is.
+    """
+    concealed = X[:, :NUM_TILE_TYPES]
+    levels = [(concealed >= k).astype(np.uint8) for k in range(1, 5)]
+    return np.hstack(levels + [X[:, NUM_TILE_TYPES:]])
+
+
+def _suit_totals(X: np.ndarray) -> np.ndarray:
+    """
+    Counts plus concealed tiles per suit and honors in total.
+    """
+    concealed = X[:, :NUM_TILE_TYPES].astype(np.uint8)
+    suits = concealed[:, :NUM_SUITED].reshape(-1, 3, NUM_RANKS).sum(axis=2, dtype=np.uint8)
+    honors = concealed[:, NUM_SUITED:].sum(axis=1, dtype=np.uint8)[:, None]
+    return np.hstack([X, suits, honors])
+
+
+FEATURE_ENCODINGS = {
+    "counts": lambda X: X,
+    "concealed": lambda X: X[:, :NUM_TILE_TYPES],
+    "unary": _unary,
+    "suit_totals": _suit_totals
+}
+
+
+def encode_features(X: np.ndarray, encoding: str = "counts") -> np.ndarray:
+    if encoding not in FEATURE_ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    return np.ascontiguousarray(FEATURE_ENCODINGS[encoding](np.asarray(X)))
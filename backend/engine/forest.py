@@ -0,0 +1,308 @@
+# =========================
+# Standard library imports
+# =========================
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# =========================
+# Third-party imports
+# =========================
+import numpy as np
+
+# =========================
+# Flat forest
+# =========================
+#
+# A trained RandomForestClassifier flattened into NumPy arrays, so the API
+# can predict without sklearn. All trees share one node array; tree t
+# starts at roots[t]. leaf_slot maps a leaf to its row in leaf_value
+# (per-class probabilities, as sklearn's predict_proba sees them) and is
+# -1 for split nodes; leaves point to themselves on both sides.
+#
+# The .npz is the published artifact, but its members cannot be memory
+# mapped. load_forest(path, mmap=True) unpacks it once per file contents
+# into <dir>/.forest_cache/<stem>-<hash>-v<n>/, one .npy per array plus
+# the stacked children, and maps those read-only: forked API workers
+# share the pages instead of each holding a copy. n is FORMAT_VERSION.
+
+FORMAT_VERSION = 1
+CACHE_DIR_NAME = ".forest_cache"
+HASH_CHUNK = 1 << 20
+
+# Elements of the per-tree leaf values gathered at once for small batches
+SMALL_BATCH = 1 << 16
+
+ARRAYS = (
+    "roots", "feature", "threshold", "left", "right",
+    "leaf_slot", "leaf_value", "classes"
+)
+
+class FlatForest:
+    def __init__(self, arrays: dict, max_depth: int):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.max_depth = int(max_depth)
+        self.n_trees = len(self.roots)
+        # Left and right child side by side: one gather per step
+        if "children" in arrays:
+            self.children = arrays["children"]
+        else:
+            self.children = np.stack([self.left, self.right], axis=1)
+
+    @classmethod
+    def from_model(cls, model, compact: bool = True) -> "FlatForest":
+        """
+        Flattens a fitted RandomForestClassifier. compact stores feature
+        indices in the smallest unsigned type that holds n_features_in_
+        (uint8 for the 68 encoded counts), thresholds and probabilities as
+        float32; otherwise the int64/float64 values of sklearn are kept.
+        """
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = [t.node_count for t in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        feature, threshold, left, right, leaf_slot, leaf_value = [], [], [], [], [], []
+        n_leaves = 0
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+            slots = np.full(tree.node_count, -1, dtype=np.int64)
+            slots[is_leaf] = np.arange(is_leaf.sum()) + n_leaves
+            leaf_slot.append(slots)
+            n_leaves += is_leaf.sum()
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[is_leaf, 0, :]
+            leaf_value.append(value / value.sum(axis=1, keepdims=True))
+
+        index_dtype = np.int32 if offsets[-1] + sizes[-1] < 2 ** 31 else np.int64
+        feature_dtype = np.min_scalar_type(max(model.n_features_in_ - 1, 0)) if compact else np.int64
+        arrays = {
+            "roots": offsets.astype(index_dtype),
+            "feature": np.concatenate(feature).astype(feature_dtype),
+            "threshold": np.concatenate(threshold).astype(np.float32 if compact else np.float64),
+            "left": np.concatenate(left).astype(index_dtype),
+            "right": np.concatenate(right).astype(index_dtype),
+            "leaf_slot": np.concatenate(leaf_slot).astype(index_dtype),
+            "leaf_value": np.concatenate(leaf_value).astype(np.float32 if compact else np.float64),
+            "classes": np.asarray(model.classes_)
+        }
+        max_depth = max(t.max_depth for t in trees)
+        return cls(arrays, max_depth)
+
+    @classmethod
+    def load(cls, path: Path) -> "FlatForest":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported flat forest format in {path}")
+            arrays = {name: data[name] for name in ARRAYS}
+            max_depth = int(data["max_depth"])
+        return cls(arrays, max_depth)
+
+    def save(self, path: Path) -> None:
+        """
+        Writes an uncompressed .npz next to path and renames it into place.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=FORMAT_VERSION,
+                max_depth=self.max_depth,
+                **{name: getattr(self, name) for name in ARRAYS}
+            )
+        os.replace(tmp_path, path)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        (N, n_trees) global leaf node reached by each row in each tree.
+        Only (row, tree) pairs that have not reached a leaf keep walking.
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        n = X.shape[0]
+        nodes = np.tile(self.roots, n)
+        row_of = np.repeat(np.arange(n), self.n_trees)
+        flat_X = X.ravel()
+        n_features = X.shape[1]
+
+        active = np.flatnonzero(self.leaf_slot[nodes] < 0)
+        while active.size:
+            current = nodes[active]
+            values = flat_X[row_of[active] * n_features + self.feature[current]]
+            go_right = values > self.threshold[current]
+            nxt = self.children[current, go_right.view(np.uint8)]
+            nodes[active] = nxt
+            active = active[self.leaf_slot[nxt] < 0]
+        return nodes.reshape(n, self.n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        slots = self.leaf_slot[self.apply(X)]
+        # Summed tree by tree in float64, like sklearn's forest (cumsum is
+        # sequential; large batches loop to avoid an (N, trees, classes) copy)
+        if slots.size * self.leaf_value.shape[1] <= SMALL_BATCH:
+            values = self.leaf_value[slots].astype(np.float64)
+            return values.cumsum(axis=1)[:, -1] / self.n_trees
+
+        proba = np.zeros((slots.shape[0], self.leaf_value.shape[1]), dtype=np.float64)
+        for t in range(self.n_trees):
+            proba += self.leaf_value[slots[:, t]]
+        return proba / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+def export_forest(model, path: Path, compact: bool = True) -> FlatForest:
+    forest = FlatForest.from_model(model, compact=compact)
+    forest.save(path)
+    return forest
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def mmap_dir(path: Path) -> Path:
+    path = Path(path)
+    return path.parent / CACHE_DIR_NAME / f"{path.stem}-{_file_hash(path)}-v{FORMAT_VERSION}"
+
+def unpack_forest(path: Path) -> Path:
+    """
+    Unpacks the .npz into its .npy directory (once per file contents) and
+    returns the directory. Unpacks of earlier contents of the same file
+    are removed; workers still mapping them keep their pages.
+    """
+    path = Path(path)
+    target = mmap_dir(path)
+    if (target / "meta.json").exists():
+        return target
+
+    loaded = FlatForest.load(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+    try:
+        for name in ARRAYS + ("children",):
+            np.save(tmp / f"{name}.npy", getattr(loaded, name))
+        (tmp / "meta.json").write_text(json.dumps({
+            "source": str(path),
+            "max_depth": loaded.max_depth
+        }))
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Another process finished the same unpack first
+            if not (target / "meta.json").exists():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for old in target.parent.glob(f"{path.stem}-{'?' * 16}-v*"):
+        if old != target:
+            shutil.rmtree(old, ignore_errors=True)
+    return target
+
+def load_forest(path: Path, mmap: bool = False) -> FlatForest:
+    """
+    Loads a flat forest .npz, into memory or (mmap) as read-only maps of
+    its unpacked arrays.
+    """
+    if not mmap:
+        return FlatForest.load(path)
+    target = unpack_forest(path)
+    meta = json.loads((target / "meta.json").read_text())
+    # Plain ndarray views of the maps: no np.memmap overhead per gather
+    arrays = {
+        name: np.asarray(np.load(target / f"{name}.npy", mmap_mode="r"))
+        for name in ARRAYS + ("children",)
+    }
+    return FlatForest(arrays, meta["max_depth"])
+
+def combine_forests(forests: list) -> FlatForest:
+    """
+    One forest holding every tree of the given forests, with equal weight
+    per tree. Leaf probabilities are padded out to the union of classes.
+    """
+    classes = np.unique(np.concatenate([f.classes for f in forests]))
+    arrays = {name: [] for name in ARRAYS if name != "classes"}
+
+    node_offset = leaf_offset = 0
+    for f in forests:
+        arrays["roots"].append(f.roots.astype(np.int64) + node_offset)
+        arrays["feature"].append(f.feature)
+        arrays["threshold"].append(f.threshold)
+        arrays["left"].append(f.left.astype(np.int64) + node_offset)
+        arrays["right"].append(f.right.astype(np.int64) + node_offset)
+        slots = f.leaf_slot.astype(np.int64)
+        arrays["leaf_slot"].append(np.where(slots >= 0, slots + leaf_offset, -1))
+
+        values = np.zeros((len(f.leaf_value), len(classes)), dtype=f.leaf_value.dtype)
+        values[:, np.searchsorted(classes, f.classes)] = f.leaf_value
+        arrays["leaf_value"].append(values)
+
+        node_offset += len(f.feature)
+        leaf_offset += len(f.leaf_value)
+
+    index_dtype = np.int32 if node_offset < 2 ** 31 else np.int64
+    combined = {name: np.concatenate(parts) for name, parts in arrays.items()}
+    for name in ("roots", "left", "right", "leaf_slot"):
+        combined[name] = combined[name].astype(index_dtype)
+    combined["classes"] = classes
+    return FlatForest(combined, max(f.max_depth for f in forests))
+
+# =========================
+# Benchmark
+# =========================
+def benchmark(model, forest: FlatForest, X, single_rows: int = 200) -> dict:
+    """
+    Agreement and latency of the flat forest against the sklearn model:
+    one row at a time (as predict_best_discard calls it) and one batch.
+    """
+    X = np.asarray(X)
+    single = X[:single_rows]
+
+    start = time.perf_counter()
+    for row in single:
+        model.predict([row])
+    sklearn_single = (time.perf_counter() - start) / len(single)
+
+    start = time.perf_counter()
+    for row in single:
+        forest.predict(row)
+    flat_single = (time.perf_counter() - start) / len(single)
+
+    start = time.perf_counter()
+    expected = model.predict(X)
+    sklearn_batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = forest.predict(X)
+    flat_batch = time.perf_counter() - start
+
+    return {
+        "rows": len(X),
+        "agreement": float(np.mean(expected == got)),
+        "sklearn_single_ms": sklearn_single * 1000,
+        "flat_single_ms": flat_single * 1000,
+        "sklearn_batch_rows_per_s": len(X) / sklearn_batch,
+        "flat_batch_rows_per_s": len(X) / flat_batch,
+        "flat_nbytes": forest.nbytes
+    }
@@ -0,0 +1,261 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config.server_config as server_config
+
+# ----------------------------
+# Serving metrics
+# ----------------------------
+#
+# Histograms, counters and gauges kept in process and rendered in the
+# Prometheus text format. An observation is a bisect and a few additions
+# under a per-metric lock, so instrumentation stays on in production;
+# MAHJONG_METRICS=0 turns every stage timer into a no-op.
+#
+# Stage timers also add their time to the current request's breakdown
+# when one is open (see track_breakdown), which the API turns into a
+# Server-Timing header in debug mode. The breakdown lives in a ContextVar
+# and follows the request into run_in_threadpool.
+
+ENABLED = server_config.get_metrics_enabled()
+
+# Seconds; an implicit +Inf bucket follows
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_breakdown", default=None)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Family:
+    """
+    One metric name with a child per label value tuple.
+    """
+
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), bounds=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.bounds = bounds
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.bounds)
+
+    def _render_child(self, values, child: Histogram) -> List[str]:
+        counts, total, count = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, c in zip(self.bounds + (float("inf"),), counts):
+            cumulative += c
+            le = _format_labels(self.label_names, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _render_child(self, values, child: _Value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+
+class GaugeFamily(CounterFamily):
+    kind = "gauge"
+
+
+STAGE_SECONDS = HistogramFamily(
+    "mahjong_stage_seconds", "Time spent in each serving stage.", ("stage",)
+)
+REQUEST_SECONDS = HistogramFamily(
+    "mahjong_request_seconds", "HTTP request latency by route.", ("path",)
+)
+REQUESTS = CounterFamily(
+    "mahjong_requests_total", "HTTP requests by route and status.", ("path", "status")
+)
+IN_FLIGHT = GaugeFamily(
+    "mahjong_requests_in_flight", "HTTP requests being served."
+)
+PREDICTIONS = CounterFamily(
+    "mahjong_predictions_total", "Prediction results by kind.", ("result",)
+)
+
+FAMILIES = [STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, IN_FLIGHT, PREDICTIONS]
+
+# Callables returning [(name, kind, help, [(labels dict, value)])], read at
+# render time, for values other modules already count (cache hits...)
+_collectors: List[Callable[[], list]] = []
+
+
+def register_collector(collector: Callable[[], list]) -> None:
+    _collectors.append(collector)
+
+
+# -------------------------
+# Stage timing
+# -------------------------
+class _StageTimer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def stage(name: str):
+    """
+    Context manager timing one stage: with metrics.stage("model_predict"): ...
+    """
+    return _StageTimer(name) if ENABLED else _NO_TIMER
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(name).observe(seconds)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+
+def track_breakdown() -> Dict[str, float]:
+    """
+    Opens a stage breakdown for the current context and returns it; stage
+    timers add their seconds to it from then on.
+    """
+    breakdown = {}
+    _breakdown.set(breakdown)
+    return breakdown
+
+
+def record_prediction(result: dict) -> None:
+    if ENABLED:
+        PREDICTIONS.labels("winning" if result.get("winning") else "discard").inc()
+
+
+# -------------------------
+# Prometheus text format
+# -------------------------
+def render() -> str:
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.render())
+    for collector in _collectors:
+        for name, kind, help_text, samples in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(
+                    f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
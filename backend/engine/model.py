@@ -1,31 +1,57 @@
 # =========================
 # Standard library imports
 # =========================
+import json
+import logging
+import os
+import shutil
+import threading
+import time
 from pathlib import Path
 
 # =========================
 # Third-party imports
 # =========================
-import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+# joblib and sklearn are imported where they are used: serving a flat
+# forest needs neither, and they dominate the API's import time
+import numpy as np
 
 # =========================
 # Project imports
 # =========================
+import config.server_config as server_config
 from representation import hand
 import representation.all_tiles as all_tiles
 import rules.win_checker as win_checker
 import rules.tai_calc as tai_calc
+import rules.batch as batch
+from rules.scoring_profile import ScoringProfile
 import engine.encoder as encoder
+import engine.forest as forest
+import engine.metrics as metrics
 import engine.data.data_loader as dl
 
 # =========================
 # Constants
 # =========================
+logger = logging.getLogger(__name__)
+
 MODEL_PATH = Path(__file__).resolve().parent.parent.parent / "best_discard_model.joblib"
+# Flat NumPy export of the same forest (engine.forest), served when present
+FOREST_PATH = MODEL_PATH.with_suffix(".npz")
 MODEL = None
+MODEL_INFO = {
+    "path": str(MODEL_PATH),
+    "format": None,
+    "version": None,
+    "loaded_at": None,
+    "load_seconds": None,
+    "mmap": None
+}
+
+# The forest is trained on raw DOT/CHAR/BAM encodings, so its discards are
+# not interchangeable between suits
+SUIT_SYMMETRIC = False
 
 # =========================
 # Training
@@ -33,18 +59,22 @@ MODEL = None
 def train_best_discard_model(
     csv_path: str,
     model_path: Path = MODEL_PATH,
-    max_rows: int | None = None
+    max_rows: int | None = None,
+    n_estimators: int = 100,
+    max_depth: int | None = 20,
+    min_samples_leaf: int = 5
 ) -> float:
-    X, y = dl.load_training_data(csv_path, max_rows)
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    # Held-out rows (see is_holdout) are never trained, so the accuracy
+    # here and the incremental updates' checks are on unseen hands
+    X_train, X_test, y_train, y_test = split_dataset(csv_path, max_rows)
 
     model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=20,
-        min_samples_leaf=5,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
         n_jobs=-1,
         random_state=42
     )
@@ -52,29 +82,421 @@ def train_best_discard_model(
     model.fit(X_train, y_train)
 
     acc = accuracy_score(y_test, model.predict(X_test))
-    joblib.dump(model, model_path)
+    save_model(model, model_path)
+    forest_path = Path(model_path).with_suffix(".npz")
+    forest.export_forest(model, forest_path)
+    reset_incremental(csv_path, forest_path, max_rows)
 
     return acc
 
+def save_model(model, model_path: Path = MODEL_PATH) -> None:
+    """
+    Writes the model next to its final path and renames it into place, so
+    a watching server never sees a half-written file. Stored uncompressed
+    so it can be memory-mapped.
+    """
+    import joblib
+
+    model_path = Path(model_path)
+    tmp_path = model_path.with_name(model_path.name + ".tmp")
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+
+def export_flat_model(
+    model_path: Path = MODEL_PATH,
+    forest_path: Path = FOREST_PATH,
+    compact: bool = True
+) -> forest.FlatForest:
+    """
+    Flattens an existing joblib forest into the .npz the server prefers.
+    """
+    import joblib
+
+    return forest.export_forest(joblib.load(model_path), forest_path, compact=compact)
+
 # =========================
-# Prediction
+# Incremental training
 # =========================
-def predict_best_discard(hand_obj: dict) -> dict:
-    if win_checker.is_winning(hand_obj):
-        calc = tai_calc.calculate_tai(hand_obj)
-        return {
-            "winning": True,
-            "tai": calc["tai"],
-            "breakdown": calc["breakdown"]
+#
+# Newly labeled or relabeled CSV rows are trained into a small sub-forest
+# and merged (engine.forest.combine_forests) with the full model and the
+# earlier sub-forests, then written over the served .npz so the watcher
+# hot-reloads it. Next to the forest:
+#   <stem>.base.npz        the forest of the last full training
+#   <stem>.batches/        one .npz per incremental batch
+#   <stem>.manifest.json   row keys already trained, per batch
+# A row's key hashes all four columns, so a changed label is a new row.
+# Only labeled rows train, and rows whose key falls in the held-out bucket
+# never do, neither in the full training nor incrementally; they score
+# every update. Keys and labeled flags are cached with the dataset
+# (engine.data.data_loader), so neither path re-reads the CSV.
+
+BATCH_TREES = 10
+MAX_BATCHES = 20
+HOLDOUT_BUCKETS = 5
+MAX_ACCURACY_DROP = 0.01
+
+def row_key(row: dict) -> str:
+    return dl.row_key(row).hex()
+
+def is_holdout(key: str) -> bool:
+    return int(key[:8], 16) % HOLDOUT_BUCKETS == 0
+
+def _holdout_rows(keys: np.ndarray) -> np.ndarray:
+    # is_holdout over (N, 20) key bytes: the first 4 bytes are key[:8]
+    return np.ascontiguousarray(keys[:, :4]).view(">u4").ravel() % HOLDOUT_BUCKETS == 0
+
+def holdout_masks(csv_path, max_rows: int | None = None):
+    """
+    (train, test) boolean masks over the CSV rows, in dataset order:
+    labeled rows outside the held-out bucket train, labeled rows inside it
+    test. Read from the cached dataset, not the CSV.
+    """
+    keys, labeled = dl.load_row_keys(csv_path, max_rows)
+    holdout = _holdout_rows(keys)
+    labeled = np.asarray(labeled)
+    return labeled & ~holdout, labeled & holdout
+
+def split_dataset(csv_path, max_rows: int | None = None, test_size: float = 0.2):
+    """
+    X_train, X_test, y_train, y_test as train_best_discard_model trains and
+    scores: split by holdout_masks, or a seeded random split of the labeled
+    rows when none falls in the held-out bucket.
+    """
+    from sklearn.model_selection import train_test_split
+
+    X, y = dl.load_dataset(csv_path, max_rows)
+    train, test = holdout_masks(csv_path, max_rows)
+    if test.any():
+        return X[train], X[test], y[train], y[test]
+    return train_test_split(X[train], y[train], test_size=test_size, random_state=42)
+
+def _incremental_paths(forest_path: Path) -> dict:
+    forest_path = Path(forest_path)
+    return {
+        "base": forest_path.with_suffix(".base.npz"),
+        "batches": forest_path.with_suffix(".batches"),
+        "manifest": forest_path.with_suffix(".manifest.json")
+    }
+
+def _write_manifest(path: Path, manifest: dict) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path)
+
+def reset_incremental(csv_path, forest_path: Path = FOREST_PATH, max_rows: int | None = None) -> None:
+    """
+    Starts incremental training over from the forest of a full training:
+    every labeled row of the CSV outside the held-out bucket counts as
+    included.
+    """
+    paths = _incremental_paths(forest_path)
+    shutil.copyfile(forest_path, paths["base"])
+    shutil.rmtree(paths["batches"], ignore_errors=True)
+    keys, _ = dl.load_row_keys(csv_path, max_rows)
+    train, _ = holdout_masks(csv_path, max_rows)
+    _write_manifest(paths["manifest"], {
+        "base_rows": sorted({bytes(key).hex() for key in keys[train]}),
+        "batches": []
+    })
+
+def train_incremental(
+    csv_path,
+    forest_path: Path = FOREST_PATH,
+    batch_trees: int = BATCH_TREES,
+    max_batches: int = MAX_BATCHES,
+    max_accuracy_drop: float = MAX_ACCURACY_DROP
+) -> dict:
+    """
+    Trains the CSV rows not yet in the model into a new sub-forest and
+    publishes the merged forest if held-out accuracy drops by at most
+    max_accuracy_drop. Falls back to a full training when there is no
+    base forest yet or max_batches sub-forests have piled up.
+
+    Returns {"status", "new_rows", "holdout_rows", "accuracy_before",
+    "accuracy_after", "trees", "seconds"}; status is "updated",
+    "up_to_date", "rejected" or "retrained".
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    start = time.perf_counter()
+    forest_path = Path(forest_path)
+    paths = _incremental_paths(forest_path)
+    result = {
+        "status": "up_to_date",
+        "new_rows": 0,
+        "holdout_rows": 0,
+        "accuracy_before": None,
+        "accuracy_after": None,
+        "trees": None,
+        "seconds": None
+    }
+
+    if not paths["base"].exists() or not paths["manifest"].exists():
+        acc = train_best_discard_model(csv_path, forest_path.with_suffix(".joblib"))
+        result.update(status="retrained", accuracy_after=acc)
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    manifest = json.loads(paths["manifest"].read_text())
+    included = set(manifest["base_rows"])
+    for entry in manifest["batches"]:
+        included.update(entry["rows"])
+
+    # Rows come from the cached dataset of the CSV's current contents
+    keys, _ = dl.load_row_keys(csv_path)
+    train, test = holdout_masks(csv_path)
+    included_keys = np.array([bytes.fromhex(key) for key in included], dtype=f"S{dl.KEY_BYTES}")
+    new_rows = train & ~np.isin(np.ascontiguousarray(keys).view(f"S{dl.KEY_BYTES}").ravel(), included_keys)
+    new = sorted({bytes(key).hex() for key in keys[new_rows]})
+    result["new_rows"] = len(new)
+    result["holdout_rows"] = int(test.sum())
+    if not new:
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    if len(manifest["batches"]) >= max_batches:
+        acc = train_best_discard_model(csv_path, forest_path.with_suffix(".joblib"))
+        result.update(status="retrained", accuracy_after=acc)
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    X, y = dl.load_dataset(csv_path)
+    X_new, y_new = X[new_rows], y[new_rows]
+    sub_model = RandomForestClassifier(
+        n_estimators=batch_trees,
+        max_depth=20,
+        min_samples_leaf=5,
+        n_jobs=-1,
+        random_state=len(manifest["batches"])
+    )
+    sub_model.fit(X_new, y_new)
+    sub_forest = forest.FlatForest.from_model(sub_model)
+
+    parts = [forest.load_forest(paths["base"])]
+    parts += [forest.load_forest(paths["batches"] / entry["file"]) for entry in manifest["batches"]]
+    before = forest.combine_forests(parts)
+    after = forest.combine_forests(parts + [sub_forest])
+    result["trees"] = after.n_trees
+
+    if test.any():
+        X_test, y_test = X[test], y[test]
+        result["accuracy_before"] = float(np.mean(before.predict(X_test) == y_test))
+        result["accuracy_after"] = float(np.mean(after.predict(X_test) == y_test))
+        if result["accuracy_after"] < result["accuracy_before"] - max_accuracy_drop:
+            result["status"] = "rejected"
+            result["seconds"] = time.perf_counter() - start
+            return result
+
+    paths["batches"].mkdir(exist_ok=True)
+    batch_file = f"batch-{len(manifest['batches']):04d}.npz"
+    sub_forest.save(paths["batches"] / batch_file)
+    manifest["batches"].append({
+        "file": batch_file,
+        "rows": new,
+        "trees": batch_trees,
+        "accuracy": result["accuracy_after"]
+    })
+    after.save(forest_path)
+    _write_manifest(paths["manifest"], manifest)
+
+    result["status"] = "updated"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+# =========================
+# Model registry
+# =========================
+_load_lock = threading.RLock()
+_watcher = None
+
+def serving_path() -> Path:
+    """
+    The flat forest if one has been exported, else the joblib model.
+    """
+    return FOREST_PATH if FOREST_PATH.exists() else MODEL_PATH
+
+def file_version(model_path: Path | None = None):
+    """
+    Version of the model on disk: the contents of <model>.version if
+    present, else the file's modification time. None if there is no model.
+    """
+    model_path = Path(model_path or serving_path())
+    version_file = model_path.with_name(model_path.name + ".version")
+    try:
+        return version_file.read_text().strip()
+    except FileNotFoundError:
+        pass
+    try:
+        return str(model_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+def load_model(model_path: Path | None = None, mmap: bool | None = None):
+    """
+    Loads the model and swaps it in. Requests keep using the previous
+    model until the new one is fully loaded. .npz files are flat forests
+    (no sklearn needed); anything else goes through joblib. With mmap the
+    weights are read-only memory maps shared by every process serving
+    the same file.
+    """
+    global MODEL, MODEL_INFO
+    model_path = Path(model_path or serving_path())
+    flat = model_path.suffix == ".npz"
+    if mmap is None:
+        mmap = server_config.get_model_mmap()
+
+    with _load_lock:
+        version = file_version(model_path)
+        start = time.perf_counter()
+        with metrics.stage("model_load"):
+            if flat:
+                model = forest.load_forest(model_path, mmap=mmap)
+            else:
+                import joblib
+
+                model = joblib.load(model_path, mmap_mode="r" if mmap else None)
+        info = {
+            "path": str(model_path),
+            "format": "flat" if flat else "joblib",
+            "version": version,
+            "loaded_at": time.time(),
+            "load_seconds": time.perf_counter() - start,
+            "mmap": mmap
         }
+        # MODEL is rebound before MODEL_INFO, so a version read by a request
+        # never names a model newer than the one it used
+        MODEL, MODEL_INFO = model, info
+    return model
+
+def get_model():
+    """
+    The loaded model, loading it on first use.
+    """
+    if MODEL is None:
+        with _load_lock:
+            if MODEL is None:
+                load_model()
+    return MODEL
+
+def reload_if_changed(model_path: Path | None = None) -> bool:
+    model_path = Path(model_path or serving_path())
+    version = file_version(model_path)
+    if version is None or (version == MODEL_INFO["version"] and str(model_path) == MODEL_INFO["path"]):
+        return False
+    load_model(model_path)
+    return True
+
+def start_model_watcher(interval: float | None = None) -> threading.Thread:
+    """
+    Starts a daemon thread that reloads the model when its file version
+    changes.
+    """
+    global _watcher
+    if interval is None:
+        interval = server_config.get_model_reload_interval()
+    if _watcher is not None and _watcher.is_alive():
+        return _watcher
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_if_changed()
+            except Exception:
+                # The previous model keeps serving; retried next interval
+                logger.exception("Model reload failed")
 
-    model = joblib.load(MODEL_PATH)
-    encoded = encoder.encode_hand(hand_obj)
+    _watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+    _watcher.start()
+    return _watcher
+
+def model_info() -> dict:
+    return dict(MODEL_INFO)
+
+def model_version():
+    """
+    Version of the model serving predictions (the file version until one
+    is loaded).
+    """
+    if MODEL is not None:
+        return MODEL_INFO["version"]
+    return file_version()
+
+# =========================
+# Prediction
+# =========================
+def predict_best_discard(hand_obj: dict, profile: ScoringProfile = None) -> dict:
+    with metrics.stage("is_winning"):
+        winning = win_checker.is_winning(hand_obj)
+    if winning:
+        return _winning_result(hand_obj, profile)
+
+    model = get_model()
+    with metrics.stage("encode_features"):
+        encoded = encoder.encode_batch([hand_obj])
+
+    with metrics.stage("model_predict"):
+        discard_idx = model.predict(encoded)[0]
+    return _discard_result(hand_obj, discard_idx)
+
+def predict_best_discards(hand_objs: list, profiles: list = None) -> list:
+    """
+    Batch version of predict_best_discard, results in input order.
+    Winning hands are found with one vectorized win check and the rest go
+    through a single model.predict call. profiles optionally gives each
+    hand its own scoring profile.
+    """
+    results = [None] * len(hand_objs)
+    profiles = profiles or [None] * len(hand_objs)
+
+    rows, hands = [], []
+    for i, hand_obj in enumerate(hand_objs):
+        try:
+            h = hand.Hand.from_dict(hand_obj)
+        except ValueError:
+            h = None
+        if h is None or max(h.concealed_counts()) > 4:
+            results[i] = predict_best_discard(hand_obj, profiles[i])
+            continue
+        rows.append(i)
+        hands.append(h)
+
+    if not hands:
+        return results
+
+    concealed, display, _ = batch.hands_to_matrices(hands)
+    with metrics.stage("is_winning"):
+        winning = batch.is_winning_batch(concealed, display)
+    for i, is_win in zip(rows, winning):
+        if is_win:
+            results[i] = _winning_result(hand_objs[i], profiles[i])
+
+    if not winning.all():
+        model = get_model()
+        with metrics.stage("encode_features"):
+            encoded = encoder.encode_batch([h for h, is_win in zip(hands, winning) if not is_win])
+        with metrics.stage("model_predict"):
+            predicted = model.predict(encoded)
+        discard_rows = [i for i, is_win in zip(rows, winning) if not is_win]
+        for i, discard_idx in zip(discard_rows, predicted):
+            results[i] = _discard_result(hand_objs[i], discard_idx)
+
+    return results
+
+def _winning_result(hand_obj, profile: ScoringProfile = None) -> dict:
+    with metrics.stage("calculate_tai"):
+        calc = tai_calc.calculate_max_tai(hand_obj, profile)
+    return {
+        "winning": True,
+        "tai": calc["tai"],
+        "breakdown": calc["breakdown"]
+    }
 
-    discard_idx = model.predict([encoded])[0]
+def _discard_result(hand_obj, discard_idx) -> dict:
     concealed_sorted = sorted(
         hand_obj["concealed"],
-        key=lambda t: all_tiles.ALL_TILES.index(t)
+        key=all_tiles.TILE_INDEX.__getitem__
     )
 
     return {
@@ -0,0 +1,354 @@
+import math
+import random
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional, Tuple
+
+import config.server_config as server_config
+import rules.decomposition as decomp
+import rules.tai_calc as tai_calc
+import rules.win_checker as win_checker
+from representation.all_tiles import ALL_TILES, TILE_INDEX
+from representation.hand import Hand
+from representation.wall import create_full_wall, remove_hand_from_wall
+from rules.scoring_profile import ScoringProfile, default_profile
+from rules.shanten import ShantenShape
+
+# ----------------------------
+# Monte Carlo discard evaluation
+# ----------------------------
+#
+# For every candidate discard, play out random draw sequences from the live
+# wall with a greedy policy: keep a drawn tile only if it lowers shanten
+# (discarding a tile that keeps the new shanten), otherwise throw it back.
+# A sequence scores the tai of the hand if it wins within max_draws, else 0.
+#
+# Batches of sequences run on a process pool. Candidates whose 95%
+# confidence interval falls below the leader's are dropped, and the run
+# stops when one candidate is left, every candidate hit its cap, or the
+# time budget runs out. Batches shrink to what the measured rate fits in
+# the remaining budget, and batches still running when the run stops are
+# waited for, so they do not hold the pool for the next request.
+#
+# Policy graphs mutate their shapes while they are walked. Pool workers
+# run one batch at a time and keep theirs in _GRAPHS; in-process runs
+# (which may share the API's threads) build their own per request.
+
+Z_95 = 1.96
+MIN_SIMULATIONS = 200
+MAX_GRAPHS = 64
+
+# Policy graphs of a pool worker process, oldest first
+_GRAPHS = OrderedDict()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def live_wall_counts(hand_obj: Hand, tile_wall: Counter = None) -> List[int]:
+    """
+    Copies of each tile (ALL_TILES order) left in the wall once the hand's
+    own tiles are removed. Flowers are left out of the draws.
+    """
+    if tile_wall is None:
+        tile_wall = create_full_wall(include_flowers=False)
+    remaining = remove_hand_from_wall(tile_wall, hand_obj.to_dict())
+    return [max(remaining[tile], 0) for tile in ALL_TILES]
+
+
+def _won_tai(hand_obj: Hand, counts: List[int], profile: ScoringProfile) -> int:
+    won = hand_obj.copy()
+    won.counts[:decomp.NUM_TILE_TYPES] = array("B", counts)
+    return tai_calc.calculate_max_tai(won, profile)["tai"]
+
+
+class _Node:
+    """
+    One 13-tile shape reached by the policy. moves caches, per drawn tile,
+    the node the policy moves to or the tai of the win.
+    """
+
+    __slots__ = ("shape", "shanten", "moves")
+
+    def __init__(self, shape: ShantenShape):
+        self.shape = shape
+        self.shanten = shape.shanten()
+        self.moves = {}
+
+
+def _step(node: _Node, tile: int, hand_obj: Hand, nodes: dict, profile: ScoringProfile):
+    shape = node.shape
+    after = shape.shanten_with(tile, 1)
+    if after == -1:
+        shape.counts[tile] += 1
+        tai = _won_tai(hand_obj, shape.counts, profile)
+        shape.counts[tile] -= 1
+        return tai
+    if after >= node.shanten:
+        return node
+
+    drawn = shape.after(tile, 1)
+    for i, c in enumerate(drawn.counts):
+        if c and drawn.shanten_with(i, -1) == after:
+            key = tuple(drawn.counts)
+            key = key[:i] + (key[i] - 1,) + key[i + 1:]
+            if key not in nodes:
+                nodes[key] = _Node(drawn.after(i, -1))
+            return nodes[key]
+    return node
+
+
+def _policy_graph(
+    hand_obj: Hand,
+    discard: int,
+    live: List[int],
+    profile: ScoringProfile,
+    graphs: OrderedDict
+) -> Tuple[_Node, dict]:
+    """
+    Root node and node index for one (hand, discard, wall, profile), kept
+    in `graphs` so later batches of the same request reuse the cached moves.
+    """
+    key = (hand_obj.counts.tobytes(), discard, tuple(live), profile)
+    graph = graphs.pop(key, None)
+    if graph is None:
+        counts = hand_obj.concealed_counts()
+        counts[discard] -= 1
+        root = _Node(ShantenShape(counts, hand_obj.display_size()))
+        graph = (root, {tuple(counts): root})
+        while len(graphs) >= MAX_GRAPHS:
+            graphs.popitem(last=False)
+    graphs[key] = graph
+    return graph
+
+
+def simulate_discard(
+    hand_obj: Hand,
+    discard: int,
+    live: List[int],
+    n: int,
+    max_draws: int,
+    seed: int,
+    profile: ScoringProfile = None,
+    graphs: OrderedDict = None
+) -> Tuple[int, int, int, int]:
+    """
+    Plays n draw sequences after discarding tile id `discard`.
+    Returns (n, wins, sum of tai, sum of squared tai). graphs defaults to
+    the process's _GRAPHS, which only one thread may use at a time.
+    """
+    rng = random.Random(seed)
+    profile = profile or default_profile()
+    graphs = _GRAPHS if graphs is None else graphs
+    root, nodes = _policy_graph(hand_obj, discard, live, profile, graphs)
+
+    wall = [i for i, c in enumerate(live) for _ in range(c)]
+    draws = min(max_draws, len(wall))
+
+    wins = total = total_sq = 0
+    for _ in range(n):
+        node = root
+        for tile in rng.sample(wall, draws):
+            nxt = node.moves.get(tile)
+            if nxt is None:
+                nxt = node.moves[tile] = _step(node, tile, hand_obj, nodes, profile)
+            if not isinstance(nxt, _Node):
+                wins += 1
+                total += nxt
+                total_sq += nxt * nxt
+                break
+            node = nxt
+
+    return n, wins, total, total_sq
+
+
+class _Tally:
+    __slots__ = ("n", "wins", "total", "total_sq", "pending")
+
+    def __init__(self):
+        self.n = self.wins = self.total = self.total_sq = self.pending = 0
+
+    def add(self, result: Tuple[int, int, int, int]) -> None:
+        n, wins, total, total_sq = result
+        self.n += n
+        self.wins += wins
+        self.total += total
+        self.total_sq += total_sq
+
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def half_width(self) -> float:
+        if self.n < 2:
+            return math.inf
+        mean = self.mean()
+        var = max(self.total_sq / self.n - mean * mean, 0.0)
+        return Z_95 * math.sqrt(var / self.n)
+
+
+def _winning_result(hand_obj: Hand, profile: ScoringProfile) -> dict:
+    calc = tai_calc.calculate_max_tai(hand_obj, profile)
+    return {"winning": True, "tai": calc["tai"], "breakdown": calc["breakdown"]}
+
+
+def evaluate_discards_mc(
+    hand_obj,
+    tile_wall: Counter = None,
+    budget_ms: Optional[float] = None,
+    max_draws: Optional[int] = None,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    profile: ScoringProfile = None
+) -> dict:
+    """
+    Ranks every distinct discard of a 14-tile hand by expected tai over
+    simulated draws from the live wall.
+
+    Returns {"winning": True, "tai", "breakdown"} for a winning hand, else
+    {"winning": False, "best_discard", "candidates": [...], "simulations",
+    "elapsed_ms", "stopped"}, candidates sorted best first. workers <= 1
+    runs the simulations in-process.
+    """
+    hand_obj = hand_obj if isinstance(hand_obj, Hand) else Hand.from_dict(hand_obj)
+    profile = profile or default_profile()
+    if win_checker.is_winning(hand_obj):
+        return _winning_result(hand_obj, profile)
+
+    budget = (budget_ms if budget_ms is not None else server_config.get_simulation_budget_ms()) / 1000
+    max_draws = max_draws if max_draws is not None else server_config.get_simulation_draws()
+    workers = workers if workers is not None else server_config.get_simulation_workers()
+    batch_size = server_config.get_simulation_batch_size()
+    cap = server_config.get_simulation_max_per_discard()
+
+    start = time.perf_counter()
+    deadline = start + budget
+    rng = random.Random(seed)
+    live = live_wall_counts(hand_obj, tile_wall)
+
+    concealed = hand_obj.concealed_counts()
+    tallies = {i: _Tally() for i, c in enumerate(concealed) if c}
+    active = set(tallies)
+    stopped = "max_simulations"
+
+    def next_candidate() -> Optional[int]:
+        open_ = [i for i in active if tallies[i].n + tallies[i].pending < cap]
+        if not open_:
+            return None
+        return min(open_, key=lambda i: tallies[i].n + tallies[i].pending)
+
+    def prune() -> None:
+        ready = [i for i in active if tallies[i].n >= MIN_SIMULATIONS]
+        if len(ready) < len(active):
+            return
+        leader_low = max(tallies[i].mean() - tallies[i].half_width() for i in active)
+        for i in list(active):
+            if tallies[i].mean() + tallies[i].half_width() < leader_low:
+                active.discard(i)
+
+    if workers <= 1 or len(tallies) == 1:
+        graphs = OrderedDict()
+        while active:
+            if time.perf_counter() >= deadline:
+                stopped = "budget"
+                break
+            tile = next_candidate()
+            if tile is None:
+                break
+            tallies[tile].add(simulate_discard(
+                hand_obj, tile, live, batch_size, max_draws, rng.getrandbits(63), profile, graphs
+            ))
+            prune()
+            if len(active) == 1 and len(tallies) > 1:
+                stopped = "separated"
+                break
+    else:
+        pool = _get_pool(workers)
+        pending = {}
+
+        def next_size() -> int:
+            # Simulations one worker fits in the remaining budget, at the
+            # rate measured so far
+            done = sum(t.n for t in tallies.values())
+            elapsed = time.perf_counter() - start
+            if not done or elapsed <= 0:
+                return batch_size
+            fits = int((deadline - time.perf_counter()) * done / elapsed / workers)
+            return max(1, min(batch_size, fits))
+
+        def refill() -> None:
+            while len(pending) < 2 * workers:
+                tile = next_candidate()
+                if tile is None:
+                    return
+                size = next_size()
+                future = pool.submit(
+                    simulate_discard, hand_obj, tile, live,
+                    size, max_draws, rng.getrandbits(63), profile
+                )
+                tallies[tile].pending += size
+                pending[future] = (tile, size)
+
+        refill()
+        while pending:
+            remaining = deadline - time.perf_counter()
+            done = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)[0]
+            if not done:
+                stopped = "budget"
+                break
+            for future in done:
+                tile, size = pending.pop(future)
+                tallies[tile].pending -= size
+                tallies[tile].add(future.result())
+            prune()
+            if len(active) == 1:
+                stopped = "separated"
+                break
+            refill()
+
+        # Queued batches are cancelled; running ones are waited for and
+        # their results dropped, so the pool is free for the next request
+        running = [future for future in pending if not future.cancel()]
+        wait(running)
+
+    candidates = []
+    for i, tally in tallies.items():
+        half = tally.half_width() if tally.n else math.inf
+        mean = tally.mean()
+        candidates.append({
+            "discard": ALL_TILES[i],
+            "expected_tai": mean,
+            "win_rate": tally.wins / tally.n if tally.n else 0.0,
+            "ci_low": mean - half if tally.n > 1 else None,
+            "ci_high": mean + half if tally.n > 1 else None,
+            "simulations": tally.n,
+            "pruned": i not in active
+        })
+    candidates.sort(key=lambda c: (-c["expected_tai"], -c["win_rate"], TILE_INDEX[c["discard"]]))
+
+    return {
+        "winning": False,
+        "best_discard": candidates[0]["discard"] if candidates else None,
+        "candidates": candidates,
+        "simulations": sum(t.n for t in tallies.values()),
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+        "stopped": stopped
+    }
@@ -0,0 +1,230 @@
+import threading
+import time
+
+import config.server_config as server_config
+import engine.metrics as metrics
+import engine.model as model
+import rules.win_checker as win_checker
+from cache.lru import LRUCache
+from engine.canonical import canonical_key, from_canonical_tile, to_canonical_tile
+from representation.hand import Hand
+from rules.scoring_profile import ScoringProfile, default_profile
+
+# ----------------------------
+# Canonical-hand prediction cache
+# ----------------------------
+#
+# Win checks and tai are suit-blind, so they are cached under the suit
+# canonical key and shared by every relabelling of BAM/CHAR/DOT. Model
+# discards are only shared that way when engine.model.SUIT_SYMMETRIC is
+# set; otherwise they are cached under the hand's own counts. Win results
+# are also keyed by the scoring profile of the request's game context.
+
+PREDICT_CACHE = LRUCache(
+    server_config.get_predict_cache_size(),
+    ttl=server_config.get_predict_cache_ttl()
+)
+
+NOT_WINNING = "not_winning"
+
+_timing_lock = threading.Lock()
+_timing = {
+    "hit_seconds": 0.0,
+    "miss_seconds": 0.0,
+    "hit_count": 0,
+    "miss_count": 0
+}
+
+
+def _copy_result(result: dict) -> dict:
+    return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+
+def _record(kind: str, seconds: float) -> None:
+    with _timing_lock:
+        _timing[f"{kind}_seconds"] += seconds
+        _timing[f"{kind}_count"] += 1
+
+
+def cached_predict_best_discard(hand_obj, profile: ScoringProfile = None) -> dict:
+    """
+    predict_best_discard with results cached by canonical hand.
+    """
+    start = time.perf_counter()
+    profile = profile or default_profile()
+    try:
+        hand = hand_obj if isinstance(hand_obj, Hand) else Hand.from_dict(hand_obj)
+    except ValueError:
+        return model.predict_best_discard(hand_obj, profile)
+    if isinstance(hand_obj, Hand):
+        hand_obj = hand_obj.to_dict()
+
+    key, perm = canonical_key(hand)
+
+    rules_key = ("rules", profile, key)
+    rules_entry = PREDICT_CACHE.get(rules_key)
+    if rules_entry is None:
+        with metrics.stage("is_winning"):
+            winning = win_checker.is_winning(hand)
+        if winning:
+            rules_entry = model.predict_best_discard(hand_obj, profile)
+        else:
+            rules_entry = NOT_WINNING
+        PREDICT_CACHE.put(rules_key, rules_entry)
+        if rules_entry is not NOT_WINNING:
+            _record("miss", time.perf_counter() - start)
+            return _copy_result(rules_entry)
+    elif rules_entry is not NOT_WINNING:
+        _record("hit", time.perf_counter() - start)
+        return _copy_result(rules_entry)
+
+    # Model discard: suit-specific unless the model says otherwise
+    if model.SUIT_SYMMETRIC:
+        discard_key = ("discard", model.model_version(), key)
+    else:
+        discard_key = ("discard", model.model_version(), hand.counts.tobytes())
+
+    result = PREDICT_CACHE.get(discard_key)
+    if result is None:
+        result = model.predict_best_discard(hand_obj)
+        if model.SUIT_SYMMETRIC and result.get("best_discard"):
+            stored = {**result, "best_discard": to_canonical_tile(result["best_discard"], perm)}
+        else:
+            stored = result
+        PREDICT_CACHE.put(discard_key, stored)
+        _record("miss", time.perf_counter() - start)
+        return result
+
+    result = _copy_result(result)
+    if model.SUIT_SYMMETRIC and result.get("best_discard"):
+        result["best_discard"] = from_canonical_tile(result["best_discard"], perm)
+    _record("hit", time.perf_counter() - start)
+    return result
+
+
+def _lookup(hand: Hand, profile: ScoringProfile):
+    """
+    (result, keys) for a Hand: result is the cached answer or None, keys
+    what _store needs on a miss.
+    """
+    key, perm = canonical_key(hand)
+    rules_key = ("rules", profile, key)
+    rules_entry = PREDICT_CACHE.get(rules_key)
+    if model.SUIT_SYMMETRIC:
+        discard_key = ("discard", model.model_version(), key)
+    else:
+        discard_key = ("discard", model.model_version(), hand.counts.tobytes())
+    keys = (rules_key, discard_key, perm, rules_entry)
+
+    if rules_entry is None:
+        return None, keys
+    if rules_entry is not NOT_WINNING:
+        return _copy_result(rules_entry), keys
+
+    result = PREDICT_CACHE.get(discard_key)
+    if result is None:
+        return None, keys
+    result = _copy_result(result)
+    if model.SUIT_SYMMETRIC and result.get("best_discard"):
+        result["best_discard"] = from_canonical_tile(result["best_discard"], perm)
+    return result, keys
+
+
+def _store(keys, result: dict) -> None:
+    rules_key, discard_key, perm, rules_entry = keys
+    if result.get("winning"):
+        PREDICT_CACHE.put(rules_key, result)
+        return
+    if rules_entry is None:
+        PREDICT_CACHE.put(rules_key, NOT_WINNING)
+    if model.SUIT_SYMMETRIC and result.get("best_discard"):
+        result = {**result, "best_discard": to_canonical_tile(result["best_discard"], perm)}
+    PREDICT_CACHE.put(discard_key, result)
+
+
+def cached_predict_best_discards(hand_objs: list, profiles: list = None) -> list:
+    """
+    Batch version of cached_predict_best_discard: cache hits are answered
+    directly and all misses go through one predict_best_discards call.
+    profiles optionally gives each hand its own scoring profile.
+    """
+    start = time.perf_counter()
+    results = [None] * len(hand_objs)
+    profiles = [p or default_profile() for p in profiles or [None] * len(hand_objs)]
+    misses, miss_hands, miss_keys = [], [], []
+
+    for i, (hand_obj, profile) in enumerate(zip(hand_objs, profiles)):
+        lookup_start = time.perf_counter()
+        try:
+            hand = hand_obj if isinstance(hand_obj, Hand) else Hand.from_dict(hand_obj)
+        except ValueError:
+            results[i] = model.predict_best_discard(hand_obj, profile)
+            continue
+        result, keys = _lookup(hand, profile)
+        if result is not None:
+            results[i] = result
+            _record("hit", time.perf_counter() - lookup_start)
+            continue
+        misses.append(i)
+        miss_hands.append(hand.to_dict())
+        miss_keys.append(keys)
+
+    if misses:
+        miss_profiles = [profiles[i] for i in misses]
+        predicted = model.predict_best_discards(miss_hands, miss_profiles)
+        for i, keys, result in zip(misses, miss_keys, predicted):
+            _store(keys, result)
+            results[i] = result
+
+    # The batch's time is shared out between its misses
+    elapsed = time.perf_counter() - start
+    for _ in misses:
+        _record("miss", elapsed / len(misses))
+    return results
+
+
+def clear_prediction_cache() -> None:
+    PREDICT_CACHE.clear()
+    with _timing_lock:
+        for k in _timing:
+            _timing[k] = 0 if k.endswith("count") else 0.0
+
+
+def prediction_cache_stats() -> dict:
+    """
+    Cache counters plus hit rate and the latency hits saved, estimated
+    from the average cost of a miss.
+    """
+    stats = PREDICT_CACHE.stats()
+    with _timing_lock:
+        timing = dict(_timing)
+
+    requests = timing["hit_count"] + timing["miss_count"]
+    avg_hit = timing["hit_seconds"] / timing["hit_count"] if timing["hit_count"] else 0.0
+    avg_miss = timing["miss_seconds"] / timing["miss_count"] if timing["miss_count"] else 0.0
+
+    stats.update({
+        "requests": requests,
+        "hit_rate": timing["hit_count"] / requests if requests else 0.0,
+        "avg_hit_ms": avg_hit * 1000,
+        "avg_miss_ms": avg_miss * 1000,
+        "saved_seconds": max(avg_miss - avg_hit, 0.0) * timing["hit_count"]
+    })
+    return stats
+
+
+def _cache_metrics() -> list:
+    with _timing_lock:
+        hits, misses = _timing["hit_count"], _timing["miss_count"]
+    return [
+        ("mahjong_predict_cache_requests_total", "counter",
+         "Predictions answered from the canonical cache or computed.",
+         [({"result": "hit"}, hits), ({"result": "miss"}, misses)]),
+        ("mahjong_predict_cache_entries", "gauge",
+         "Entries in the prediction cache.", [({}, len(PREDICT_CACHE))]),
+        ("mahjong_predict_cache_evictions_total", "counter",
+         "Prediction cache evictions.", [({}, PREDICT_CACHE.evictions)])
+    ]
+
+
+metrics.register_collector(_cache_metrics)
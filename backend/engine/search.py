@@ -0,0 +1,318 @@
+import csv
+import itertools
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import config.server_config as server_config
+import rules.decomposition as decomp
+import rules.tai_calc as tai_calc
+import rules.win_checker as win_checker
+from engine.data.data_loader import parse_tiles
+from representation.all_tiles import ALL_TILES
+from representation.hand import Hand
+from representation.wall import create_full_wall
+from rules.scoring_profile import ScoringProfile, default_profile
+from rules.shanten import ShantenShape
+
+# ----------------------------
+# Expectimax discard search
+# ----------------------------
+#
+# Values are expected tai with r draws left in the game, looking d draws
+# ahead exactly:
+#
+#   V13(h, 0, r) = leaf(h, r)
+#   V13(h, d, r) = sum over winning draws t of p(t) * tai(h + t)
+#                + sum over useful draws t of p(t) * V14(h + t, d, r)
+#                + p(any other draw) * V13(h, d - 1, r - 1)
+#   V14(h, d, r) = max over discards x of V13(h - x, d - 1, r - 1)
+#
+# Draws that do not lower shanten are thrown straight back, so only useful
+# tiles branch, and V14 only tries discards that keep the lowest shanten.
+# p(t) is proportional to the live copies of t: the wall minus the tiles
+# held and the tiles the line has discarded (a discarded copy cannot be
+# drawn again; tiles drawn and thrown straight back are not tracked).
+# leaf(h, r) is the chance of winning within r draws times the
+# average tai of the waits when ready. Otherwise it is the chance of
+# drawing `shanten` useful tiles at the current ukeire and then one of
+# READY_WAITS winning tiles, times LEAF_TAI.
+#
+# Values are stored in a transposition table keyed by (canonical hand and
+# discards, d, r), and the draw outcomes by canonical hand and discards. With the
+# default full wall the live counts only depend on the hand, so suit
+# relabellings share entries.
+#
+# Iterative deepening searches d = 0, 1, 2, ... until max_depth or the
+# wall-clock budget, and answers with the deepest completed depth.
+
+LEAF_TAI = 1.0
+READY_WAITS = 6
+
+
+NO_DISCARDS = (0,) * decomp.NUM_TILE_TYPES
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _discarded(discards: tuple, tile: int) -> tuple:
+    return discards[:tile] + (discards[tile] + 1,) + discards[tile + 1:]
+
+
+def _win_chance(stages: int, q: float, q_win: float, draws: int) -> float:
+    """
+    Chance of `stages` successes at rate q, then one at rate q_win, within
+    `draws` draws.
+    """
+    if stages == 0:
+        return 1.0 - (1.0 - q_win) ** draws
+    if q <= 0.0:
+        return 0.0
+    chance = 0.0
+    # Negative binomial: the last stage completes on draw j
+    pmf = q ** stages
+    for j in range(stages, draws):
+        chance += pmf * (1.0 - (1.0 - q_win) ** (draws - j))
+        pmf *= j / (j - stages + 1) * (1.0 - q)
+    return chance
+
+
+class _Search:
+    def __init__(
+        self,
+        hand_obj: Hand,
+        tile_wall: Optional[Counter],
+        deadline: float,
+        profile: ScoringProfile
+    ):
+        self.hand = hand_obj
+        self.profile = profile
+        self.display = hand_obj.display_counts()
+        self.display_total = sum(self.display)
+        self.symmetric = tile_wall is None
+        wall = tile_wall if tile_wall is not None else create_full_wall(include_flowers=False)
+        self.wall = [wall[tile] - d for tile, d in zip(ALL_TILES, self.display)]
+        self.deadline = deadline
+        self.table = {}
+        self.outcomes = {}
+        self.win_tai = {}
+        self.nodes = 0
+
+    def key(self, counts: List[int], discards: tuple = NO_DISCARDS) -> bytes:
+        if not self.symmetric:
+            return bytes(counts) + bytes(discards)
+        blocks = sorted(
+            bytes(counts[s:s + decomp.NUM_RANKS]) + bytes(self.display[s:s + decomp.NUM_RANKS])
+            + bytes(discards[s:s + decomp.NUM_RANKS])
+            for s in range(0, decomp.NUM_SUITED, decomp.NUM_RANKS)
+        )
+        return b"".join(blocks) + bytes(counts[decomp.NUM_SUITED:]) + bytes(discards[decomp.NUM_SUITED:])
+
+    def tai(self, counts: List[int]) -> int:
+        key = self.key(counts)
+        tai = self.win_tai.get(key)
+        if tai is None:
+            won = self.hand.copy()
+            for i, c in enumerate(counts):
+                won.counts[i] = c
+            tai = tai_calc.calculate_max_tai(won, self.profile)["tai"]
+            self.win_tai[key] = tai
+        return tai
+
+    def draw_outcomes(self, shape: ShantenShape, discards: tuple, key: bytes) -> tuple:
+        """
+        (shanten, live total, winning draws [(copies, tai)], useful draws
+        [(tile, copies, shanten after)]) of a 13-tile hand after `discards`.
+        """
+        outcome = self.outcomes.get(key)
+        if outcome is not None:
+            return outcome
+
+        current = shape.shanten()
+        total = 0
+        wins, useful = [], []
+        for t, (w, c, d) in enumerate(zip(self.wall, shape.counts, discards)):
+            n = w - c - d
+            if n <= 0:
+                continue
+            total += n
+            after = shape.shanten_with(t, 1)
+            if after == -1:
+                shape.counts[t] += 1
+                wins.append((n, self.tai(shape.counts)))
+                shape.counts[t] -= 1
+            elif after < current:
+                useful.append((t, n, after))
+
+        outcome = (current, total, wins, useful)
+        self.outcomes[key] = outcome
+        return outcome
+
+    def leaf(self, outcome: tuple, draws: int) -> float:
+        current, total, wins, useful = outcome
+        if current == 0:
+            copies = sum(n for n, _ in wins)
+            if not copies:
+                return 0.0
+            average_tai = sum(n * tai for n, tai in wins) / copies
+            return average_tai * _win_chance(0, 0.0, copies / total, draws)
+        copies = sum(n for _, n, _ in useful)
+        return LEAF_TAI * _win_chance(current, copies / total, READY_WAITS / total, draws)
+
+    def v13(self, shape: ShantenShape, discards: tuple, depth: int, draws: int) -> float:
+        hand_key = self.key(shape.counts, discards)
+        key = (hand_key, depth, draws)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+
+        self.nodes += 1
+        if depth > 0 and time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        outcome = self.draw_outcomes(shape, discards, hand_key)
+        _, total, wins, useful = outcome
+        if draws <= 0 or total == 0:
+            value = 0.0
+        elif depth == 0:
+            value = self.leaf(outcome, draws)
+        else:
+            value = 0.0
+            stay = total
+            for n, tai in wins:
+                value += n * tai
+                stay -= n
+            for t, n, after in useful:
+                value += n * self.v14(shape.after(t, 1), discards, after, depth, draws)
+                stay -= n
+            if stay:
+                value += stay * self.v13(shape, discards, depth - 1, draws - 1)
+            value /= total
+
+        self.table[key] = value
+        return value
+
+    def v14(self, shape: ShantenShape, discards: tuple, best_shanten: int, depth: int, draws: int) -> float:
+        best = 0.0
+        for x, c in enumerate(shape.counts):
+            if c and shape.shanten_with(x, -1) == best_shanten:
+                value = self.v13(shape.after(x, -1), _discarded(discards, x), depth - 1, draws - 1)
+                best = max(best, value)
+        return best
+
+
+def search_best_discard(
+    hand_obj,
+    tile_wall: Counter = None,
+    budget_ms: Optional[float] = None,
+    max_depth: Optional[int] = None,
+    draws: Optional[int] = None,
+    profile: ScoringProfile = None
+) -> dict:
+    """
+    Iterative-deepening expectimax over the discards of a 14-tile hand,
+    with `draws` draws left in the game.
+
+    Returns {"winning": True, "tai", "breakdown"} for a winning hand, else
+    {"winning": False, "best_discard", "depth", "candidates": [{"discard",
+    "value"}], "nodes", "elapsed_ms"}, candidates best first. depth is the
+    deepest search that finished inside the budget; budget_ms=0 means no
+    time limit (offline labeling only: the API rejects it).
+    """
+    hand_obj = hand_obj if isinstance(hand_obj, Hand) else Hand.from_dict(hand_obj)
+    profile = profile or default_profile()
+    if win_checker.is_winning(hand_obj):
+        calc = tai_calc.calculate_max_tai(hand_obj, profile)
+        return {"winning": True, "tai": calc["tai"], "breakdown": calc["breakdown"]}
+
+    if budget_ms is None:
+        budget_ms = server_config.get_search_budget_ms()
+    if max_depth is None:
+        max_depth = server_config.get_search_max_depth()
+    if draws is None:
+        draws = server_config.get_search_draws()
+
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000 if budget_ms else float("inf")
+    search = _Search(hand_obj, tile_wall, deadline, profile)
+    root = ShantenShape(hand_obj.concealed_counts(), search.display_total)
+
+    candidates = None
+    completed = -1
+    for depth in range(max_depth + 1):
+        try:
+            values = [
+                (x, search.v13(root.after(x, -1), _discarded(NO_DISCARDS, x), depth, draws))
+                for x, c in enumerate(root.counts) if c
+            ]
+        except _Timeout:
+            break
+        candidates = values
+        completed = depth
+
+    candidates.sort(key=lambda item: (-item[1], item[0]))
+    return {
+        "winning": False,
+        "best_discard": ALL_TILES[candidates[0][0]],
+        "depth": completed,
+        "candidates": [{"discard": ALL_TILES[x], "value": v} for x, v in candidates],
+        "nodes": search.nodes,
+        "elapsed_ms": (time.perf_counter() - start) * 1000
+    }
+
+
+# ----------------------------
+# Offline labeling
+# ----------------------------
+
+def _label_row(args) -> str:
+    row, max_depth = args
+    concealed = parse_tiles(row["concealed"])
+    hand_obj = Hand.from_tiles(concealed, parse_tiles(row["flowers"]), parse_tiles(row["display"]))
+    result = search_best_discard(hand_obj, budget_ms=0, max_depth=max_depth)
+    if result["winning"]:
+        # Nothing to search: keep the heuristic label
+        from engine.data.raw_data_generator import calculate_best_discard
+        return calculate_best_discard(row["concealed"], row["flowers"])
+    return result["best_discard"]
+
+
+def label_csv(
+    input_path: str,
+    output_path: str,
+    max_depth: int = 1,
+    workers: int | None = None,
+    chunk_size: int = 64
+) -> int:
+    """
+    Labels every row of a generated hand CSV with the search's best
+    discard (no time limit, fixed depth). Returns the number of rows.
+    Rows are streamed through the pool a window at a time, so memory stays
+    bounded for any CSV size.
+    """
+    window_rows = chunk_size * (workers or os.cpu_count() or 1) * 4
+    count = 0
+    with open(input_path, newline="", encoding="utf-8") as f_in, \
+            open(output_path, "w", newline="", encoding="utf-8") as f_out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        reader = csv.DictReader(f_in)
+        writer = csv.DictWriter(f_out, fieldnames=["concealed", "display", "flowers", "best_discard"])
+        writer.writeheader()
+        while True:
+            rows = list(itertools.islice(reader, window_rows))
+            if not rows:
+                break
+            labels = pool.map(_label_row, [(row, max_depth) for row in rows], chunksize=chunk_size)
+            for row, label in zip(rows, labels):
+                writer.writerow({
+                    "concealed": row["concealed"],
+                    "display": row.get("display", ""),
+                    "flowers": row.get("flowers", ""),
+                    "best_discard": label
+                })
+            count += len(rows)
+    return count
@@ -0,0 +1,397 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import config.server_config as server_config
+import engine.metrics as metrics
+import rules.decomposition as decomp
+import rules.tai_calc as tai_calc
+import rules.win_checker as win_checker
+from engine.prediction_cache import cached_predict_best_discard
+from representation.all_tiles import ALL_TILES, FLOWERS, TILE_INDEX
+from representation.hand import DISPLAY_OFFSET, Hand
+from rules.scoring_profile import ScoringProfile, default_profile
+from rules.shanten import ShantenShape
+
+# ----------------------------
+# Live game sessions
+# ----------------------------
+#
+# A session keeps one player's hand, the tiles they have seen elsewhere
+# (other players' discards and melds, their own discards) and the
+# ShantenShape of the concealed tiles. Clients send small deltas:
+#
+#   {"op": "draw", "tile": "5_DOT"}
+#   {"op": "discard", "tile": "EAST"}
+#   {"op": "meld", "tiles": ["3_BAM", "4_BAM", "5_BAM"], "claimed": "4_BAM"}
+#   {"op": "flower", "tile": "blue_1"}
+#   {"op": "seen", "tiles": ["9_DOT", "RED"]}
+#
+# A draw or discard moves the shape with ShantenShape.after, which only
+# rebuilds the table of the component that changed. The shapes evaluated
+# for each candidate discard of a 14-tile hand are kept, so the discard
+# that follows reuses one instead of recomputing it. Live copies are 4
+# minus the tiles held, melded and seen.
+#
+# SessionStore bounds memory: at most max_sessions sessions (least
+# recently active evicted first) and none idle for longer than
+# idle_seconds. Sessions with a connected socket are never evicted. A
+# session is a few hundred bytes plus its shape tables.
+
+TOP_DISCARDS = 5
+MELD_SIZE = 3
+
+
+def _tile_id(tile) -> int:
+    i = TILE_INDEX.get(tile)
+    if i is None:
+        raise ValueError(f"Unknown tile: {tile}")
+    return i
+
+
+class GameSession:
+    __slots__ = (
+        "session_id", "hand", "seen", "profile", "shape", "candidates",
+        "moves", "last_active", "connected"
+    )
+
+    def __init__(self, session_id: str, hand_obj: Hand, profile: ScoringProfile = None):
+        self.session_id = session_id
+        self.connected = False
+        self.reset(hand_obj, profile)
+
+    def reset(self, hand_obj: Hand, profile: ScoringProfile = None) -> None:
+        held = [c + d for c, d in zip(hand_obj.concealed_counts(), hand_obj.display_counts())]
+        if hand_obj.concealed_size() == 0:
+            raise ValueError("Hand has no concealed tiles")
+        if max(held) > decomp.MAX_COPIES:
+            raise ValueError("Hand holds more than 4 copies of a tile")
+        if hand_obj.concealed_size() + hand_obj.display_size() > 14:
+            raise ValueError("Hand holds more than 14 tiles")
+        self.hand = hand_obj
+        self.seen = [0] * decomp.NUM_TILE_TYPES
+        self.profile = profile or default_profile()
+        self.shape = ShantenShape(hand_obj.concealed_counts(), hand_obj.display_size())
+        self.candidates = {}
+        self.moves = 0
+        self.last_active = time.monotonic()
+
+    # -------------------------
+    # Deltas
+    # -------------------------
+    def tile_count(self) -> int:
+        return sum(self.shape.counts) + self.shape.display_total
+
+    def unseen(self, tile_id: int, seen: List[int] = None) -> int:
+        """
+        Copies of a tile not held, melded or seen: the ones still live.
+        """
+        seen = seen if seen is not None else self.seen
+        return (
+            decomp.MAX_COPIES - self.shape.counts[tile_id]
+            - self.hand.counts[DISPLAY_OFFSET + tile_id] - seen[tile_id]
+        )
+
+    def apply(self, message: dict) -> None:
+        """
+        Applies one delta. Raises ValueError, leaving the session as it
+        was, when the delta is malformed or impossible.
+        """
+        op = message.get("op")
+        handler = _HANDLERS.get(op)
+        if handler is None:
+            raise ValueError(f"Unknown op: {op}")
+        handler(self, message)
+        self.moves += 1
+        self.last_active = time.monotonic()
+
+    def _draw(self, message: dict) -> None:
+        t = _tile_id(message.get("tile"))
+        if self.tile_count() % 3 != 1:
+            raise ValueError("Draw expected after a discard")
+        if self.unseen(t) <= 0:
+            raise ValueError(f"No copies of {ALL_TILES[t]} left")
+        self.hand.add_tile(t)
+        self.shape = self.shape.after(t, 1)
+        self.candidates = {}
+
+    def _discard(self, message: dict) -> None:
+        t = _tile_id(message.get("tile"))
+        if self.tile_count() % 3 != 2:
+            raise ValueError("Discard expected after a draw or meld")
+        if self.shape.counts[t] == 0:
+            raise ValueError(f"{ALL_TILES[t]} is not in the concealed hand")
+        self.hand.remove_tile(t)
+        shape = self.candidates.get(t)
+        self.shape = shape if shape is not None else self.shape.after(t, -1)
+        self.candidates = {}
+        self.seen[t] += 1
+
+    def _meld(self, message: dict) -> None:
+        tiles = [_tile_id(t) for t in message.get("tiles") or []]
+        if len(tiles) != MELD_SIZE:
+            raise ValueError("A meld is three tiles")
+        tiles.sort()
+        pong = tiles[0] == tiles[1] == tiles[2]
+        chow = (
+            tiles[2] < decomp.NUM_SUITED
+            and tiles[0] // decomp.NUM_RANKS == tiles[2] // decomp.NUM_RANKS
+            and tiles[1] == tiles[0] + 1 and tiles[2] == tiles[0] + 2
+        )
+        if not (pong or chow):
+            raise ValueError("A meld is a pong or a chow")
+        if self.tile_count() % 3 != 1:
+            raise ValueError("Melds are claimed after a discard")
+
+        claimed = _tile_id(message.get("claimed"))
+        if claimed not in tiles:
+            raise ValueError("The claimed tile must be part of the meld")
+        from_hand = list(tiles)
+        from_hand.remove(claimed)
+        needed = {t: from_hand.count(t) for t in from_hand}
+        if any(self.shape.counts[t] < n for t, n in needed.items()):
+            raise ValueError("Meld tiles are not in the concealed hand")
+
+        # The claimed discard leaves the seen pile (if reported) for the display
+        if self.seen[claimed] > 0:
+            self.seen[claimed] -= 1
+        elif self.unseen(claimed) <= 0:
+            raise ValueError(f"No copies of {ALL_TILES[claimed]} left")
+        for t in from_hand:
+            self.hand.remove_tile(t)
+        for t in tiles:
+            self.hand.add_display(t)
+        # Melds needed changes with the display: a fresh shape
+        self.shape = ShantenShape(self.hand.concealed_counts(), self.hand.display_size())
+        self.candidates = {}
+
+    def _flower(self, message: dict) -> None:
+        flower = message.get("tile")
+        if flower not in FLOWERS:
+            raise ValueError(f"Unknown flower: {flower}")
+        if self.hand.flower_counts()[FLOWERS.index(flower)]:
+            raise ValueError(f"{flower} is already held")
+        self.hand.add_flower(flower)
+
+    def _seen(self, message: dict) -> None:
+        tiles = [_tile_id(t) for t in message.get("tiles") or []]
+        seen = list(self.seen)
+        for t in tiles:
+            seen[t] += 1
+        if any(self.unseen(t, seen) < 0 for t in set(tiles)):
+            raise ValueError("More than 4 copies of a tile seen")
+        self.seen = seen
+
+    # -------------------------
+    # Advice
+    # -------------------------
+    def _not_live(self) -> List[int]:
+        """
+        Copies of each tile that cannot be drawn: held, melded or seen.
+        """
+        return [decomp.MAX_COPIES - self.unseen(t) for t in range(decomp.NUM_TILE_TYPES)]
+
+    def advice(self) -> dict:
+        count = self.tile_count()
+        if count % 3 == 2:
+            return self._discard_advice()
+        if count % 3 == 1:
+            return self._draw_advice()
+        return {"tiles": count}
+
+    def _discard_advice(self) -> dict:
+        if win_checker.is_winning(self.hand):
+            calc = tai_calc.calculate_max_tai(self.hand, self.profile)
+            return {
+                "tiles": self.tile_count(),
+                "winning": True,
+                "tai": calc["tai"],
+                "breakdown": calc["breakdown"]
+            }
+
+        shape = self.shape
+        shanten = {}
+        for t, c in enumerate(shape.counts):
+            if c:
+                candidate = self.candidates.get(t)
+                if candidate is None:
+                    candidate = self.candidates[t] = shape.after(t, -1)
+                shanten[t] = candidate.shanten()
+        best = min(shanten.values())
+
+        not_live = self._not_live()
+        discards = []
+        for t, s in shanten.items():
+            if s == best:
+                useful = self.candidates[t].useful_tiles(not_live)
+                discards.append({"discard": ALL_TILES[t], "shanten": s, "ukeire": sum(useful.values())})
+        discards.sort(key=lambda d: (-d["ukeire"], TILE_INDEX[d["discard"]]))
+
+        # Without a model file the shape advice still stands
+        try:
+            best_discard = cached_predict_best_discard(self.hand, self.profile).get("best_discard")
+        except FileNotFoundError:
+            best_discard = None
+        return {
+            "tiles": self.tile_count(),
+            "winning": False,
+            "best_discard": best_discard,
+            "shanten": best,
+            "discards": discards[:TOP_DISCARDS]
+        }
+
+    def _draw_advice(self) -> dict:
+        shanten = self.shape.shanten()
+        useful = self.shape.useful_tiles(self._not_live())
+        advice = {
+            "tiles": self.tile_count(),
+            "shanten": shanten,
+            "useful": useful,
+            "ukeire": sum(useful.values())
+        }
+        if shanten == 0:
+            waits = []
+            for tile, live in useful.items():
+                won = self.hand.copy()
+                won.add_tile(tile)
+                calc = tai_calc.calculate_max_tai(won, self.profile)
+                waits.append({"tile": tile, "tai": calc["tai"], "live": live})
+            waits.sort(key=lambda w: (-w["tai"], -w["live"]))
+            advice["waits"] = waits
+        return advice
+
+    def _snapshot(self) -> tuple:
+        # Deltas replace shape and candidates rather than mutate them
+        return (
+            self.hand.copy(), list(self.seen), self.profile, self.shape,
+            self.candidates, self.moves, self.last_active
+        )
+
+    def _restore(self, snapshot: tuple) -> None:
+        (
+            self.hand, self.seen, self.profile, self.shape,
+            self.candidates, self.moves, self.last_active
+        ) = snapshot
+
+    def apply_and_advise(self, message: dict) -> dict:
+        """
+        Applies one delta and returns the advice for the new state. If
+        either step raises, the session is left as it was.
+        """
+        with metrics.stage("session_move"):
+            snapshot = self._snapshot()
+            self.apply(message)
+            try:
+                return self.advice()
+            except Exception:
+                self._restore(snapshot)
+                raise
+
+    def reset_and_advise(self, hand_obj: Hand, profile: ScoringProfile = None) -> dict:
+        """
+        reset, then advice; the session is left as it was if either raises.
+        """
+        snapshot = self._snapshot()
+        try:
+            self.reset(hand_obj, profile)
+            return self.advice()
+        except Exception:
+            self._restore(snapshot)
+            raise
+
+
+_HANDLERS = {
+    "draw": GameSession._draw,
+    "discard": GameSession._discard,
+    "meld": GameSession._meld,
+    "flower": GameSession._flower,
+    "seen": GameSession._seen
+}
+
+
+class SessionStore:
+    """
+    Sessions by id, least recently active first.
+    """
+
+    def __init__(self, max_sessions: int = None, idle_seconds: float = None):
+        self.max_sessions = max_sessions or server_config.get_session_max()
+        self.idle_seconds = idle_seconds or server_config.get_session_idle_seconds()
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, hand_obj: Hand, profile: ScoringProfile = None) -> GameSession:
+        session = GameSession(uuid.uuid4().hex, hand_obj, profile)
+        self.evict_idle()
+        with self._lock:
+            while len(self._sessions) >= self.max_sessions:
+                # Least recently active first, never one with a live socket
+                victim = next((sid for sid, s in self._sessions.items() if not s.connected), None)
+                if victim is None:
+                    raise ValueError("Too many connected sessions")
+                del self._sessions[victim]
+                self.evicted_capacity += 1
+            self._sessions[session.session_id] = session
+            self.created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if not session.connected and time.monotonic() - session.last_active > self.idle_seconds:
+                del self._sessions[session_id]
+                self.evicted_idle += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def touch(self, session: GameSession) -> None:
+        session.last_active = time.monotonic()
+        with self._lock:
+            if session.session_id in self._sessions:
+                self._sessions.move_to_end(session.session_id)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self) -> int:
+        """
+        Drops sessions idle for longer than idle_seconds, except those
+        with a connected socket. Returns how many.
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = 0
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if session.last_active > cutoff:
+                    break
+                # A live socket keeps its session however long the player thinks
+                if session.connected:
+                    continue
+                del self._sessions[session_id]
+                evicted += 1
+            self.evicted_idle += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "connected": sum(s.connected for s in self._sessions.values()),
+                "max_sessions": self.max_sessions,
+                "idle_seconds": self.idle_seconds,
+                "created": self.created,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity
+            }
@@ -0,0 +1,198 @@
+# =========================
+# Standard library imports
+# =========================
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# =========================
+# Third-party imports
+# =========================
+import joblib
+import numpy as np
+
+# =========================
+# Project imports
+# =========================
+import engine.forest as forest
+from engine.encoder import encode_features
+from engine.model import split_dataset
+
+# =========================
+# Hyperparameter sweep
+# =========================
+#
+# Every configuration of the grid is fitted on the train/test split of
+# train_best_discard_model (engine.model.split_dataset: labeled rows, the
+# held-out hash bucket as test set), in parallel, one core per fit. Serving costs are then measured one configuration at a time so
+# timings do not contend: file size, load time, single-row p50/p99 latency
+# and batch throughput, for both the joblib model and its flat export.
+# Saved models carry the serving n_jobs (SERVING_N_JOBS, as in
+# train_best_discard_model); the joblib model is timed with it and with
+# n_jobs=1. The flat forest is what the server loads when exported, and
+# does not thread. The report marks the configurations on the accuracy /
+# flat p99 latency / flat file size frontier.
+
+DEFAULT_GRID = {
+    "n_estimators": [25, 50, 100],
+    "max_depth": [10, 20, None],
+    "min_samples_leaf": [5],
+    "encoding": ["counts"]
+}
+
+LATENCY_ROWS = 500
+BATCH_ROWS = 10_000
+# n_jobs of the forests train_best_discard_model saves and the server loads
+SERVING_N_JOBS = -1
+
+def grid_configs(grid: dict) -> list:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def _fit_config(args) -> dict:
+    """
+    Fits one configuration and saves both model formats under work_dir.
+    Runs in a worker process.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    index, config, csv_path, max_rows, test_size, work_dir = args
+    X_train, X_test, y_train, y_test = split_dataset(csv_path, max_rows, test_size)
+    X_train = encode_features(X_train, config["encoding"])
+    X_test = encode_features(X_test, config["encoding"])
+
+    model = RandomForestClassifier(
+        n_estimators=config["n_estimators"],
+        max_depth=config["max_depth"],
+        min_samples_leaf=config["min_samples_leaf"],
+        n_jobs=1,
+        random_state=42
+    )
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    accuracy = float(np.mean(model.predict(X_test) == y_test))
+
+    # Fitted on one core so fits run side by side; saved as production saves it
+    model.n_jobs = SERVING_N_JOBS
+    model_path = Path(work_dir) / f"config-{index}.joblib"
+    joblib.dump(model, model_path)
+    forest.export_forest(model, model_path.with_suffix(".npz"))
+
+    return {
+        "id": index,
+        "config": config,
+        "accuracy": accuracy,
+        "fit_seconds": fit_seconds,
+        "node_count": int(sum(e.tree_.node_count for e in model.estimators_)),
+        "model_path": str(model_path)
+    }
+
+def _serving_stats(
+    path: Path,
+    load,
+    X_test: np.ndarray,
+    latency_rows: int,
+    batch_rows: int,
+    n_jobs: int | None = None
+) -> dict:
+    start = time.perf_counter()
+    model = load(path)
+    load_seconds = time.perf_counter() - start
+    if n_jobs is not None:
+        model.n_jobs = n_jobs
+
+    latencies = []
+    for row in X_test[:latency_rows]:
+        start = time.perf_counter()
+        model.predict(row[None, :])
+        latencies.append(time.perf_counter() - start)
+
+    batch = X_test[:batch_rows]
+    start = time.perf_counter()
+    model.predict(batch)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "file_bytes": os.path.getsize(path),
+        "load_seconds": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "batch_rows_per_s": len(batch) / batch_seconds if batch_seconds else None
+    }
+
+def _frontier(results: list) -> list:
+    """
+    Ids of results no other result beats on accuracy, flat p99 latency and
+    flat file size at once.
+    """
+    def dominates(a, b):
+        better_or_equal = (
+            a["accuracy"] >= b["accuracy"]
+            and a["flat"]["p99_ms"] <= b["flat"]["p99_ms"]
+            and a["flat"]["file_bytes"] <= b["flat"]["file_bytes"]
+        )
+        strictly = (
+            a["accuracy"] > b["accuracy"]
+            or a["flat"]["p99_ms"] < b["flat"]["p99_ms"]
+            or a["flat"]["file_bytes"] < b["flat"]["file_bytes"]
+        )
+        return better_or_equal and strictly
+
+    return [r["id"] for r in results if not any(dominates(o, r) for o in results if o is not r)]
+
+def run_sweep(
+    csv_path,
+    report_path="sweep_report.json",
+    grid: dict | None = None,
+    max_rows: int | None = None,
+    test_size: float = 0.2,
+    workers: int | None = None,
+    latency_rows: int = LATENCY_ROWS,
+    batch_rows: int = BATCH_ROWS
+) -> dict:
+    """
+    Runs the grid (defaults to DEFAULT_GRID) and writes a JSON report:
+    {"dataset", "grid", "results": [...], "frontier": [ids]}. test_size
+    only applies when no labeled row falls in the held-out bucket.
+    """
+    grid = grid or DEFAULT_GRID
+    configs = grid_configs(grid)
+    X_train, X_test, _, _ = split_dataset(csv_path, max_rows, test_size)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        jobs = [(i, c, csv_path, max_rows, test_size, work_dir) for i, c in enumerate(configs)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_config, jobs))
+
+        for result in results:
+            encoded = encode_features(X_test, result["config"]["encoding"])
+            model_path = Path(result.pop("model_path"))
+            result["joblib"] = _serving_stats(
+                model_path, joblib.load, encoded, latency_rows, batch_rows, n_jobs=SERVING_N_JOBS
+            )
+            result["joblib_n_jobs_1"] = _serving_stats(
+                model_path, joblib.load, encoded, latency_rows, batch_rows, n_jobs=1
+            )
+            result["flat"] = _serving_stats(
+                model_path.with_suffix(".npz"), forest.load_forest, encoded, latency_rows, batch_rows
+            )
+
+    report = {
+        "dataset": {
+            "csv": str(csv_path),
+            "train_rows": len(X_train),
+            "test_rows": len(X_test)
+        },
+        "grid": grid,
+        "serving_n_jobs": SERVING_N_JOBS,
+        "results": results,
+        "frontier": _frontier(results)
+    }
+    Path(report_path).write_text(json.dumps(report, indent=2))
+    return report
@@ -8,4 +8,5 @@ FLOWERS = ["blue_1", "red_1",
         "blue_4", "red_4",
         "chicken", "cat", "centipede", "rat"]
 
-ALL_TILES = [f"{n}_{s}" for s in SUITS for n in NUMBERS] + WINDS + DRAGONS
\ No newline at end of file
+ALL_TILES = [f"{n}_{s}" for s in SUITS for n in NUMBERS] + WINDS + DRAGONS
+TILE_INDEX = {tile: i for i, tile in enumerate(ALL_TILES)}
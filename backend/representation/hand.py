@@ -1,5 +1,8 @@
+from array import array
 from collections import Counter
-from typing import List, Dict
+from typing import List, Dict, Union
+
+from representation.all_tiles import ALL_TILES, FLOWERS, TILE_INDEX
 
 # ----------------------------
 # Hand Representation & Helpers
@@ -30,17 +33,183 @@ def encode_hand(
         "flowers": Counter(flowers_list or [])
     }
 
-def possible_discards(hand: Dict[str, Counter]) -> List[str]:
+# ----------------------------
+# Compact Hand
+# ----------------------------
+
+NUM_TILE_TYPES = len(ALL_TILES)
+NUM_FLOWERS = len(FLOWERS)
+
+CONCEALED_OFFSET = 0
+DISPLAY_OFFSET = NUM_TILE_TYPES
+FLOWERS_OFFSET = 2 * NUM_TILE_TYPES
+HAND_SIZE = FLOWERS_OFFSET + NUM_FLOWERS
+
+FLOWER_INDEX = {flower: i for i, flower in enumerate(FLOWERS)}
+# Largest count an array('B') slot holds
+MAX_COUNT = 255
+
+
+def _tile_id(tile: Union[str, int]) -> int:
+    if isinstance(tile, int):
+        if not 0 <= tile < NUM_TILE_TYPES:
+            raise ValueError(f"Unknown tile id: {tile}")
+        return tile
+    try:
+        return TILE_INDEX[tile]
+    except KeyError:
+        raise ValueError(f"Unknown tile: {tile}") from None
+
+
+def _flower_id(flower: Union[str, int]) -> int:
+    if isinstance(flower, int):
+        if not 0 <= flower < NUM_FLOWERS:
+            raise ValueError(f"Unknown flower id: {flower}")
+        return flower
+    try:
+        return FLOWER_INDEX[flower]
+    except KeyError:
+        raise ValueError(f"Unknown flower: {flower}") from None
+
+
+def _increment(counts: array, i: int) -> None:
+    if counts[i] >= MAX_COUNT:
+        raise ValueError(f"More than {MAX_COUNT} copies of a tile")
+    counts[i] += 1
+
+
+class Hand:
+    """
+    Fixed-size hand backed by one array('B') of counts:
+    - [0, 34): concealed counts in ALL_TILES order
+    - [34, 68): display counts in ALL_TILES order
+    - [68, 80): flower counts in FLOWERS order
+
+    Tiles can be given as strings ("3_DOT") or as ALL_TILES ids.
+    Mutators work in place; use copy() for a new hand.
+    Hashes by content, so do not mutate a hand used as a dict key.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: array = None):
+        self.counts = counts if counts is not None else array("B", bytes(HAND_SIZE))
+
+    @classmethod
+    def from_tiles(
+        cls,
+        tile_list: List[str],
+        flowers_list: List[str] = None,
+        display_list: List[str] = None
+    ) -> "Hand":
+        hand = cls()
+        counts = hand.counts
+        for tile in tile_list:
+            _increment(counts, CONCEALED_OFFSET + _tile_id(tile))
+        for tile in display_list or []:
+            _increment(counts, DISPLAY_OFFSET + _tile_id(tile))
+        for flower in flowers_list or []:
+            _increment(counts, FLOWERS_OFFSET + _flower_id(flower))
+        return hand
+
+    @classmethod
+    def from_dict(cls, hand_obj: Dict[str, Counter]) -> "Hand":
+        hand = cls()
+        counts = hand.counts
+        for offset, part, to_id in (
+            (CONCEALED_OFFSET, "concealed", _tile_id),
+            (DISPLAY_OFFSET, "display", _tile_id),
+            (FLOWERS_OFFSET, "flowers", _flower_id)
+        ):
+            for tile, count in hand_obj.get(part, {}).items():
+                if count > MAX_COUNT:
+                    raise ValueError(f"More than {MAX_COUNT} copies of a tile")
+                if count > 0:
+                    counts[offset + to_id(tile)] = count
+        return hand
+
+    def to_dict(self) -> Dict[str, Counter]:
+        counts = self.counts
+        return {
+            "concealed": Counter({
+                t: counts[CONCEALED_OFFSET + i] for i, t in enumerate(ALL_TILES)
+                if counts[CONCEALED_OFFSET + i]
+            }),
+            "display": Counter({
+                t: counts[DISPLAY_OFFSET + i] for i, t in enumerate(ALL_TILES)
+                if counts[DISPLAY_OFFSET + i]
+            }),
+            "flowers": Counter({
+                f: counts[FLOWERS_OFFSET + i] for i, f in enumerate(FLOWERS)
+                if counts[FLOWERS_OFFSET + i]
+            })
+        }
+
+    def copy(self) -> "Hand":
+        return Hand(array("B", self.counts))
+
+    def concealed_counts(self) -> List[int]:
+        return self.counts[CONCEALED_OFFSET:DISPLAY_OFFSET].tolist()
+
+    def display_counts(self) -> List[int]:
+        return self.counts[DISPLAY_OFFSET:FLOWERS_OFFSET].tolist()
+
+    def flower_counts(self) -> List[int]:
+        return self.counts[FLOWERS_OFFSET:HAND_SIZE].tolist()
+
+    def concealed_size(self) -> int:
+        return sum(self.counts[CONCEALED_OFFSET:DISPLAY_OFFSET])
+
+    def display_size(self) -> int:
+        return sum(self.counts[DISPLAY_OFFSET:FLOWERS_OFFSET])
+
+    def flower_size(self) -> int:
+        return sum(self.counts[FLOWERS_OFFSET:HAND_SIZE])
+
+    def add_tile(self, tile: Union[str, int]) -> None:
+        _increment(self.counts, CONCEALED_OFFSET + _tile_id(tile))
+
+    def remove_tile(self, tile: Union[str, int]) -> None:
+        i = CONCEALED_OFFSET + _tile_id(tile)
+        if self.counts[i] > 0:
+            self.counts[i] -= 1
+
+    def add_display(self, tile: Union[str, int]) -> None:
+        _increment(self.counts, DISPLAY_OFFSET + _tile_id(tile))
+
+    def add_flower(self, flower: Union[str, int]) -> None:
+        _increment(self.counts, FLOWERS_OFFSET + _flower_id(flower))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Hand):
+            return NotImplemented
+        return self.counts == other.counts
+
+    def __hash__(self) -> int:
+        return hash(self.counts.tobytes())
+
+    def __repr__(self) -> str:
+        return f"Hand({dict(self.to_dict()['concealed'])})"
+
+
+def possible_discards(hand: Union[Dict[str, Counter], Hand]) -> List[str]:
     """
     Returns the list of tiles in the concealed hand that can be discarded.
     """
+    if isinstance(hand, Hand):
+        counts = hand.counts
+        return [t for i, t in enumerate(ALL_TILES) if counts[CONCEALED_OFFSET + i] > 0]
     return [tile for tile, count in hand["concealed"].items() if count > 0]
 
-def remove_tile(hand: Dict[str, Counter], tile: str) -> Dict[str, Counter]:
+def remove_tile(hand: Union[Dict[str, Counter], Hand], tile: str) -> Union[Dict[str, Counter], Hand]:
     """
     Returns a new hand dictionary with one instance of the tile removed from concealed.
     Does not modify the original hand.
     """
+    if isinstance(hand, Hand):
+        new_hand = hand.copy()
+        new_hand.remove_tile(tile)
+        return new_hand
     new_hand = hand.copy()
     new_hand["concealed"] = hand["concealed"].copy()
     if new_hand["concealed"][tile] > 0:
@@ -49,19 +218,27 @@ def remove_tile(hand: Dict[str, Counter], tile: str) -> Dict[str, Counter]:
             del new_hand["concealed"][tile]
     return new_hand
 
-def add_tile(hand: Dict[str, Counter], tile: str) -> Dict[str, Counter]:
+def add_tile(hand: Union[Dict[str, Counter], Hand], tile: str) -> Union[Dict[str, Counter], Hand]:
     """
     Returns a new hand dictionary with one instance of the tile added to concealed.
     """
+    if isinstance(hand, Hand):
+        new_hand = hand.copy()
+        new_hand.add_tile(tile)
+        return new_hand
     new_hand = hand.copy()
     new_hand["concealed"] = hand["concealed"].copy()
     new_hand["concealed"][tile] += 1
     return new_hand
 
-def add_flower(hand: Dict[str, Counter], flower_tile: str) -> Dict[str, Counter]:
+def add_flower(hand: Union[Dict[str, Counter], Hand], flower_tile: str) -> Union[Dict[str, Counter], Hand]:
     """
     Returns a new hand dictionary with a flower tile added.
     """
+    if isinstance(hand, Hand):
+        new_hand = hand.copy()
+        new_hand.add_flower(flower_tile)
+        return new_hand
     new_hand = hand.copy()
     new_hand["flowers"] = hand["flowers"].copy()
     new_hand["flowers"][flower_tile] += 1
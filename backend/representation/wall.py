@@ -1,8 +1,21 @@
 # representation/wall.py
+from array import array
 from collections import Counter
 from typing import List, Dict
 import random
 
+from representation.all_tiles import ALL_TILES, WINDS, DRAGONS, FLOWERS
+
+# Wall tile ids: ALL_TILES first, then FLOWERS
+NUM_TILE_TYPES = len(ALL_TILES)
+FLOWER_OFFSET = NUM_TILE_TYPES
+NUM_WALL_TYPES = NUM_TILE_TYPES + len(FLOWERS)
+WALL_NAMES = ALL_TILES + FLOWERS
+WALL_ID = {name: i for i, name in enumerate(WALL_NAMES)}
+
+COPIES = 4
+DEAD_WALL_SIZE = 16
+
 def create_full_wall(include_flowers: bool = True) -> Counter:
     """
     Create a full Mahjong tile set as a Counter.
@@ -17,12 +30,12 @@ def create_full_wall(include_flowers: bool = True) -> Counter:
         tiles += [f"{n}_BAM"] * 4
 
     # Winds and Dragons
-    tiles += ["east", "south", "west", "north"] * 4
-    tiles += ["red", "green", "white"] * 4
+    tiles += WINDS * 4
+    tiles += DRAGONS * 4
 
-    # Flowers (optional)
+    # Flowers and animals (optional), one of each
     if include_flowers:
-        tiles += [f"flower{i}" for i in range(1, 9)]  # 8 flowers total
+        tiles += FLOWERS
 
     return Counter(tiles)
 
@@ -42,12 +55,13 @@ def draw_tile(tile_wall: Counter) -> str:
     Randomly draws a tile from the wall according to remaining counts.
     Returns the tile string and updates the wall.
     """
-    if sum(tile_wall.values()) == 0:
+    tiles = [t for t, c in tile_wall.items() if c > 0]
+    counts = [tile_wall[t] for t in tiles]
+    if not tiles:
         raise ValueError("No tiles left in the wall")
 
-    # Flatten the Counter into a list weighted by count
-    all_tiles = list(tile_wall.elements())
-    tile = random.choice(all_tiles)
+    # One pass over the tile types, not over every copy
+    tile = tiles[weighted_draw(counts)]
 
     # Decrement the count
     tile_wall[tile] -= 1
@@ -56,8 +70,108 @@ def draw_tile(tile_wall: Counter) -> str:
 
     return tile
 
+def weighted_draw(counts: List[int], rng: random.Random = random) -> int:
+    """
+    Draws an index with probability proportional to counts and decrements it.
+    Used for partial information, where counts are the unseen copies.
+    """
+    total = sum(counts)
+    if total <= 0:
+        raise ValueError("No tiles left in the wall")
+
+    r = rng.randrange(total)
+    for i, c in enumerate(counts):
+        if r < c:
+            counts[i] -= 1
+            return i
+        r -= c
+    raise ValueError("Negative tile count in wall")
+
 def wall_to_list(tile_wall: Counter) -> List[str]:
     """
     Converts the Counter representation of the wall into a flat list of tiles.
     """
     return list(tile_wall.elements())
+
+
+class Wall:
+    """
+    Pre-shuffled wall of tile ids (see WALL_NAMES) drawn with a cursor.
+
+    Normal draws come from the front; flower replacements come from the
+    back, inside a dead wall of dead_wall tiles that is kept at a constant
+    size, so the live wall shrinks from both ends. Every draw is O(1).
+    """
+
+    __slots__ = ("tiles", "cursor", "tail", "dead_wall")
+
+    def __init__(self, tiles: array, dead_wall: int = DEAD_WALL_SIZE):
+        self.tiles = tiles
+        self.cursor = 0
+        self.tail = len(tiles)
+        self.dead_wall = dead_wall
+
+    @classmethod
+    def shuffled(
+        cls,
+        rng: random.Random = None,
+        include_flowers: bool = True,
+        dead_wall: int = DEAD_WALL_SIZE
+    ) -> "Wall":
+        ids = [i for i in range(NUM_TILE_TYPES) for _ in range(COPIES)]
+        if include_flowers:
+            ids += range(FLOWER_OFFSET, NUM_WALL_TYPES)
+        (rng or random).shuffle(ids)
+        return cls(array("B", ids), dead_wall)
+
+    @classmethod
+    def from_counts(
+        cls,
+        counts: List[int],
+        rng: random.Random = None,
+        dead_wall: int = 0
+    ) -> "Wall":
+        """
+        Shuffled wall holding counts[i] copies of tile id i, e.g. the tiles
+        a player has not seen. Draws are then weighted by count.
+        """
+        ids = [i for i, c in enumerate(counts) for _ in range(c)]
+        (rng or random).shuffle(ids)
+        return cls(array("B", ids), dead_wall)
+
+    def remaining(self) -> int:
+        """
+        Tiles left in the live wall.
+        """
+        return max(self.tail - self.dead_wall - self.cursor, 0)
+
+    def __len__(self) -> int:
+        return self.remaining()
+
+    def draw(self) -> int:
+        if self.tail - self.dead_wall <= self.cursor:
+            raise ValueError("No tiles left in the wall")
+        tile = self.tiles[self.cursor]
+        self.cursor += 1
+        return tile
+
+    def draw_replacement(self) -> int:
+        """
+        Draws from the back of the dead wall (flower replacement).
+        """
+        if self.tail - self.dead_wall <= self.cursor:
+            raise ValueError("No tiles left in the wall")
+        self.tail -= 1
+        return self.tiles[self.tail]
+
+    def remaining_counts(self) -> List[int]:
+        """
+        Copies of each tile id still in the wall, dead wall included.
+        """
+        counts = [0] * NUM_WALL_TYPES
+        for tile in self.tiles[self.cursor:self.tail]:
+            counts[tile] += 1
+        return counts
+
+    def to_counter(self) -> Counter:
+        return Counter(WALL_NAMES[t] for t in self.tiles[self.cursor:self.tail])
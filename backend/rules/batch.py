@@ -0,0 +1,200 @@
+from typing import Tuple
+
+import numpy as np
+
+import rules.decomposition as decomp
+from representation.all_tiles import ALL_TILES, FLOWERS
+from representation.hand import Hand
+from rules.scoring_profile import ScoringProfile, default_profile
+
+# ----------------------------
+# Batch win check & tai scoring
+# ----------------------------
+#
+# Hands are rows of NumPy count matrices, in ALL_TILES / FLOWERS order:
+# - concealed: (N, 34) uint8
+# - display:   (N, 34) uint8
+# - flowers:   (N, 12) uint8
+#
+# Scoring matches rules.tai_calc.calculate_tai on winning hands.
+
+NUM_TILE_TYPES = len(ALL_TILES)
+NUM_SUITED = decomp.NUM_SUITED
+NUM_RANKS = decomp.NUM_RANKS
+
+SUIT_TABLE = np.frombuffer(decomp.SUIT_TABLE, dtype=np.uint8)
+CHOW_TABLE = np.frombuffer(decomp.CHOW_TABLE, dtype=np.uint8)
+POW5 = np.array(decomp.POW5, dtype=np.int64)
+ORPHAN_IDS = np.array(decomp.ORPHAN_IDS)
+
+# One column per pattern in the flags matrix, holding the tai it scored
+PATTERNS = [
+    "seat_flowers",
+    "men_qing",
+    "thirteen_wonders",
+    "red_dragon_pong",
+    "green_dragon_pong",
+    "white_dragon_pong",
+    "seat_wind_pong",
+    "round_wind_pong",
+    "all_pongs",
+    "ping_hu",
+    "chou_ping_hu",
+    "full_flush",
+    "half_flush"
+]
+PATTERN_INDEX = {name: i for i, name in enumerate(PATTERNS)}
+
+
+def hands_to_matrices(hands: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds the concealed, display and flower matrices from dict hands or Hands.
+    """
+    n = len(hands)
+    concealed = np.zeros((n, NUM_TILE_TYPES), dtype=np.uint8)
+    display = np.zeros((n, NUM_TILE_TYPES), dtype=np.uint8)
+    flowers = np.zeros((n, len(FLOWERS)), dtype=np.uint8)
+
+    for row, hand_obj in enumerate(hands):
+        if not isinstance(hand_obj, Hand):
+            hand_obj = Hand.from_dict(hand_obj)
+        concealed[row] = hand_obj.concealed_counts()
+        display[row] = hand_obj.display_counts()
+        flowers[row] = hand_obj.flower_counts()
+
+    return concealed, display, flowers
+
+
+def _suit_keys(counts: np.ndarray) -> np.ndarray:
+    """
+    (N, 34) counts -> (N, 3) base-5 suit keys.
+    """
+    suited = counts[:, :NUM_SUITED].astype(np.int64).reshape(-1, decomp.NUM_SUITS, NUM_RANKS)
+    return suited @ POW5
+
+
+def _table_shape(flags: np.ndarray, honors: np.ndarray, honor_ok: np.ndarray) -> np.ndarray:
+    """
+    True where every suit and honor splits into blocks with exactly one pair.
+    flags is the (N, 3) table lookup, honors the (N, 7) honor counts.
+    """
+    suits_ok = (flags != 0).all(axis=1)
+    pairs = (flags & decomp.MELDS_AND_PAIR != 0).sum(axis=1) + (honors == 2).sum(axis=1)
+    return suits_ok & honor_ok & (pairs == 1)
+
+
+def _thirteen_wonders(concealed: np.ndarray) -> np.ndarray:
+    orphans = concealed[:, ORPHAN_IDS]
+    return (orphans > 0).all(axis=1) & ((orphans == 2).sum(axis=1) == 1)
+
+
+def _check_counts(concealed: np.ndarray) -> None:
+    if concealed.ndim != 2 or concealed.shape[1] != NUM_TILE_TYPES:
+        raise ValueError(f"Expected an (N, {NUM_TILE_TYPES}) count matrix")
+    if concealed.size and concealed.max() > decomp.MAX_COPIES:
+        raise ValueError("Counts above 4 are not supported in batch mode")
+
+
+def is_winning_batch(concealed: np.ndarray, display: np.ndarray) -> np.ndarray:
+    """
+    Vectorized win_checker.is_winning. Returns an (N,) bool vector.
+    """
+    _check_counts(concealed)
+    display_total = display.sum(axis=1, dtype=np.int64)
+    total = concealed.sum(axis=1, dtype=np.int64) + display_total
+
+    flags = SUIT_TABLE[_suit_keys(concealed)]
+    honors = concealed[:, NUM_SUITED:]
+    honor_ok = ((honors == 0) | (honors == 2) | (honors == 3)).all(axis=1)
+    standard = (display_total % 3 == 0) & _table_shape(flags, honors, honor_ok)
+
+    return (total == 14) & (standard | _thirteen_wonders(concealed))
+
+
+# Flags column of each entry of ScoringProfile.scoring_pongs
+PONG_COLUMNS = [
+    "green_dragon_pong",
+    "red_dragon_pong",
+    "white_dragon_pong",
+    "seat_wind_pong",
+    "round_wind_pong"
+]
+
+
+def calculate_tai_batch(
+    concealed: np.ndarray,
+    display: np.ndarray,
+    flowers: np.ndarray,
+    winning: np.ndarray = None,
+    profile: ScoringProfile = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized tai_calc.calculate_tai, for one game context (profile
+    defaults to the configured one).
+
+    Returns (tai, flags): tai is an (N,) int vector and flags an
+    (N, len(PATTERNS)) int matrix with the tai each pattern scored.
+    Rows that are not winning hands score 0.
+    """
+    if winning is None:
+        winning = is_winning_batch(concealed, display)
+    profile = profile or default_profile()
+
+    n = concealed.shape[0]
+    flags = np.zeros((n, len(PATTERNS)), dtype=np.int64)
+    col = PATTERN_INDEX
+
+    flags[:, col["seat_flowers"]] = flowers.astype(np.int64) @ np.array(profile.flower_weights, dtype=np.int64)
+
+    display_total = display.sum(axis=1, dtype=np.int64)
+    flags[:, col["men_qing"]] = display_total == 0
+
+    # Thirteen wonders ends scoring early, like calculate_tai
+    thirteen = _thirteen_wonders(concealed)
+    flags[:, col["thirteen_wonders"]] = thirteen * 13
+    rest = ~thirteen
+
+    melds = concealed.astype(np.int64) + display
+    for name, (tile_id, _) in zip(PONG_COLUMNS, profile.scoring_pongs):
+        flags[:, col[name]] = rest & (melds[:, tile_id] >= 3)
+
+    # All pongs: no suited tile held exactly once
+    all_pongs = ~(concealed[:, :NUM_SUITED] == 1).any(axis=1)
+    flags[:, col["all_pongs"]] = (rest & all_pongs) * 2
+
+    # Ping hu: chows plus one pair, display only suited triplets of one tile
+    suited_display = display[:, :NUM_SUITED]
+    display_ok = (
+        ((suited_display == 0) | (suited_display == 3)).all(axis=1)
+        & (display[:, NUM_SUITED:] == 0).all(axis=1)
+    )
+    honors = concealed[:, NUM_SUITED:]
+    honor_ok = ((honors == 0) | (honors == 2)).all(axis=1)
+    chow_flags = CHOW_TABLE[_suit_keys(concealed)]
+    total = concealed.sum(axis=1, dtype=np.int64) + display_total
+    ping_hu = rest & (total == 14) & display_ok & _table_shape(chow_flags, honors, honor_ok)
+    no_flowers = flowers.sum(axis=1) == 0
+    flags[:, col["ping_hu"]] = (ping_hu & no_flowers) * 4
+    flags[:, col["chou_ping_hu"]] = ping_hu & ~no_flowers
+
+    # Flushes: one suit present, with or without honors
+    suits_present = (
+        (concealed[:, :NUM_SUITED] > 0) | (display[:, :NUM_SUITED] > 0)
+    ).reshape(n, decomp.NUM_SUITS, NUM_RANKS).any(axis=2)
+    single_suit = suits_present.sum(axis=1) == 1
+    has_honor = ((concealed[:, NUM_SUITED:] > 0) | (display[:, NUM_SUITED:] > 0)).any(axis=1)
+    flags[:, col["full_flush"]] = (rest & single_suit & ~has_honor) * 4
+    flags[:, col["half_flush"]] = (rest & single_suit & has_honor) * 2
+
+    flags[~winning] = 0
+    return flags.sum(axis=1), flags
+
+
+def score_hands(hands: list, profile: ScoringProfile = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convenience wrapper: (winning, tai, flags) for a list of hands.
+    """
+    concealed, display, flowers = hands_to_matrices(hands)
+    winning = is_winning_batch(concealed, display)
+    tai, flags = calculate_tai_batch(concealed, display, flowers, winning, profile)
+    return winning, tai, flags
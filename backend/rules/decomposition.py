@@ -0,0 +1,305 @@
+from functools import lru_cache
+from itertools import product
+from typing import List, Optional, Tuple
+
+import representation.all_tiles as all_tiles
+
+# ----------------------------
+# Suit decomposition tables
+# ----------------------------
+#
+# Each numbered suit is packed into a 9-digit base-5 key (one digit per rank,
+# 1 at the most significant end), so a suit shape is a single integer below
+# 5 ** 9. SUIT_TABLE holds, for every key, whether that shape splits into
+# melds only or into melds plus exactly one pair.
+# CHOW_TABLE does the same for chows only.
+
+NUM_RANKS = 9
+NUM_SUITS = 3
+NUM_SUITED = NUM_RANKS * NUM_SUITS
+NUM_TILE_TYPES = len(all_tiles.ALL_TILES)
+MAX_COPIES = 4
+
+MELDS = 1
+MELDS_AND_PAIR = 2
+
+POW5 = [5 ** (NUM_RANKS - 1 - r) for r in range(NUM_RANKS)]
+NUM_SUIT_KEYS = 5 ** NUM_RANKS
+
+ORPHAN_IDS = [
+    all_tiles.TILE_INDEX[t]
+    for t in all_tiles.ALL_TILES
+    if t in all_tiles.WINDS or t in all_tiles.DRAGONS or t.split("_")[0] in ("1", "9")
+]
+
+ORPHAN_SET = frozenset(ORPHAN_IDS)
+
+
+def suit_key(counts: List[int], start: int) -> int:
+    """
+    Packs the 9 counts of the suit starting at `start` into a base-5 key.
+    """
+    key = 0
+    for c in counts[start:start + NUM_RANKS]:
+        key = key * 5 + c
+    return key
+
+
+def key_to_counts(key: int) -> List[int]:
+    """
+    Unpacks a base-5 suit key into its 9 rank counts.
+    """
+    counts = [0] * NUM_RANKS
+    for r in range(NUM_RANKS - 1, -1, -1):
+        key, counts[r] = divmod(key, 5)
+    return counts
+
+
+PONGS = [(r, r, r) for r in range(NUM_RANKS)]
+CHOWS = [(r, r + 1, r + 2) for r in range(NUM_RANKS - 2)]
+
+
+def _build_suit_table(melds: List[tuple]) -> bytearray:
+    table = bytearray(NUM_SUIT_KEYS)
+    counts = [0] * NUM_RANKS
+
+    def visit(start: int, n_melds: int) -> None:
+        key = suit_key(counts, 0)
+        table[key] |= MELDS
+
+        for r in range(NUM_RANKS):
+            if counts[r] + 2 <= MAX_COPIES:
+                table[key + 2 * POW5[r]] |= MELDS_AND_PAIR
+
+        if n_melds == 4:
+            return
+
+        for m in range(start, len(melds)):
+            meld = melds[m]
+            for r in meld:
+                counts[r] += 1
+            if all(counts[r] <= MAX_COPIES for r in meld):
+                visit(m, n_melds + 1)
+            for r in meld:
+                counts[r] -= 1
+
+    visit(0, 0)
+    return table
+
+
+SUIT_TABLE = _build_suit_table(PONGS + CHOWS)
+
+# Same flags, but for shapes built from chows only (Ping Hu)
+CHOW_TABLE = _build_suit_table(CHOWS)
+
+
+def hand_counts(counter) -> Optional[List[int]]:
+    """
+    Converts a tile Counter into a list of 34 counts in ALL_TILES order.
+
+    Returns None if the Counter holds a tile outside ALL_TILES or a count
+    outside 1..4, which the tables do not cover.
+    """
+    counts = [0] * NUM_TILE_TYPES
+    index = all_tiles.TILE_INDEX
+    for tile, count in counter.items():
+        i = index.get(tile)
+        if i is None or not 0 < count <= MAX_COPIES:
+            return None
+        counts[i] = count
+    return counts
+
+
+def is_complete(counts: List[int]) -> bool:
+    """
+    True if the counts split into melds plus exactly one pair.
+    """
+    pairs = 0
+    for start in range(0, NUM_SUITED, NUM_RANKS):
+        flags = SUIT_TABLE[suit_key(counts, start)]
+        if flags & MELDS_AND_PAIR:
+            pairs += 1
+        elif not flags & MELDS:
+            return False
+
+    for c in counts[NUM_SUITED:]:
+        if c == 2:
+            pairs += 1
+        elif c != 0 and c != 3:
+            return False
+
+    return pairs == 1
+
+
+def _honor_summary(counts: List[int]) -> Tuple[bool, int]:
+    pairs = 0
+    for c in counts[NUM_SUITED:]:
+        if c == 2:
+            pairs += 1
+        elif c != 0 and c != 3:
+            return False, 0
+    return True, pairs
+
+
+def completing_tiles(counts: List[int], display: Optional[List[int]] = None) -> List[int]:
+    """
+    Tile ids whose addition makes the counts split into melds plus one pair
+    (or thirteen wonders). Each draw only changes one suit key, so the other
+    components are looked up once. Tiles whose 4 copies are all held,
+    concealed or in the display counts, are skipped.
+    """
+    keys = [suit_key(counts, start) for start in range(0, NUM_SUITED, NUM_RANKS)]
+    summaries = []
+    for key in keys:
+        flags = SUIT_TABLE[key]
+        summaries.append((flags != 0, 1 if flags & MELDS_AND_PAIR else 0))
+    summaries.append(_honor_summary(counts))
+
+    others = []
+    for skip in range(NUM_SUITS + 1):
+        ok = all(summaries[c][0] for c in range(NUM_SUITS + 1) if c != skip)
+        pairs = sum(summaries[c][1] for c in range(NUM_SUITS + 1) if c != skip)
+        others.append((ok, pairs))
+
+    winning = []
+    for i in range(NUM_TILE_TYPES):
+        if counts[i] + (display[i] if display else 0) >= MAX_COPIES:
+            continue
+
+        component = min(i // NUM_RANKS, NUM_SUITS)
+        ok, pairs = others[component]
+        if ok:
+            if component < NUM_SUITS:
+                flags = SUIT_TABLE[keys[component] + POW5[i % NUM_RANKS]]
+                complete = flags != 0 and pairs + (1 if flags & MELDS_AND_PAIR else 0) == 1
+            else:
+                counts[i] += 1
+                honors_ok, honor_pairs = _honor_summary(counts)
+                counts[i] -= 1
+                complete = honors_ok and pairs + honor_pairs == 1
+            if complete:
+                winning.append(i)
+                continue
+
+        if counts[i] <= 1 and i in ORPHAN_SET:
+            counts[i] += 1
+            if is_thirteen_wonders(counts):
+                winning.append(i)
+            counts[i] -= 1
+
+    return winning
+
+
+def is_thirteen_wonders(counts: List[int]) -> bool:
+    """
+    True if all 13 terminals and honors are present with exactly one pair.
+    """
+    pairs = 0
+    for i in ORPHAN_IDS:
+        c = counts[i]
+        if c == 0:
+            return False
+        if c == 2:
+            pairs += 1
+    return pairs == 1
+
+
+# ----------------------------
+# Meld decompositions
+# ----------------------------
+#
+# A decomposition is (melds, pair): melds is a tuple of (kind, tile_id)
+# with kind PONG or CHOW (tile_id is the lowest tile of a chow), pair is
+# the tile_id of the pair or None.
+
+PONG = "pong"
+CHOW = "chow"
+
+Decomposition = Tuple[Tuple[Tuple[str, int], ...], Optional[int]]
+
+
+@lru_cache(maxsize=1 << 12)
+def suit_decompositions(key: int) -> Tuple[Decomposition, ...]:
+    """
+    Every way one suit shape splits into melds (plus a pair when the table
+    says it needs one). Tile ids are ranks 0..8; empty if the shape does
+    not split at all.
+    """
+    flags = SUIT_TABLE[key]
+    if not flags:
+        return ()
+    need_pair = bool(flags & MELDS_AND_PAIR)
+    counts = key_to_counts(key)
+    found = set()
+
+    def walk(r: int, melds: tuple, pair: Optional[int]) -> None:
+        while r < NUM_RANKS and counts[r] == 0:
+            r += 1
+        if r == NUM_RANKS:
+            if (pair is not None) == need_pair:
+                found.add((tuple(sorted(melds)), pair))
+            return
+
+        if need_pair and pair is None and counts[r] >= 2:
+            counts[r] -= 2
+            walk(r, melds, r)
+            counts[r] += 2
+        if counts[r] >= 3:
+            counts[r] -= 3
+            walk(r, melds + ((PONG, r),), pair)
+            counts[r] += 3
+        if r + 2 < NUM_RANKS and counts[r + 1] and counts[r + 2]:
+            counts[r] -= 1; counts[r + 1] -= 1; counts[r + 2] -= 1
+            walk(r, melds + ((CHOW, r),), pair)
+            counts[r] += 1; counts[r + 1] += 1; counts[r + 2] += 1
+
+    walk(0, (), None)
+    return tuple(sorted(found, key=lambda d: (d[0], -1 if d[1] is None else d[1])))
+
+
+def decompositions(counts: List[int], with_pair: bool = True) -> List[Decomposition]:
+    """
+    Every split of 34 counts into melds plus exactly one pair (or melds
+    only when with_pair is False). Uses SUIT_TABLE to reject shapes before
+    enumerating anything.
+    """
+    per_component = []
+    pairs = 0
+    for s in range(NUM_SUITS):
+        start = s * NUM_RANKS
+        key = suit_key(counts, start)
+        flags = SUIT_TABLE[key]
+        if not flags or (not with_pair and flags & MELDS_AND_PAIR):
+            return []
+        if flags & MELDS_AND_PAIR:
+            pairs += 1
+        per_component.append([
+            (tuple((kind, start + r) for kind, r in melds), None if pair is None else start + pair)
+            for melds, pair in suit_decompositions(key)
+        ])
+
+    honor_melds = []
+    honor_pair = None
+    for i in range(NUM_SUITED, NUM_TILE_TYPES):
+        c = counts[i]
+        if c == 3:
+            honor_melds.append((PONG, i))
+        elif c == 2 and with_pair:
+            honor_pair = i
+            pairs += 1
+        elif c != 0:
+            return []
+
+    if pairs != (1 if with_pair else 0):
+        return []
+
+    results = []
+    for combo in product(*per_component):
+        melds = tuple(honor_melds)
+        pair = honor_pair
+        for suit_melds, suit_pair in combo:
+            melds += suit_melds
+            if suit_pair is not None:
+                pair = suit_pair
+        results.append((melds, pair))
+    return results
@@ -0,0 +1,93 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import config.game_config as config
+from representation.all_tiles import FLOWERS, TILE_INDEX, WINDS
+
+# ----------------------------
+# Per-table scoring profiles
+# ----------------------------
+#
+# Everything tai scoring needs from the game context (seat wind, round
+# wind, seat number, flower usage), resolved once into tile ids and flower
+# weights. Profiles are immutable and cached per distinct context, so
+# tables with different winds and seats share them and scoring a hand is
+# index lookups only. Profiles are hashable and usable in cache keys.
+
+NUM_SEATS = 4
+# Order the dragon pongs appear in tai breakdowns
+PONG_DRAGONS = ("GREEN", "RED", "WHITE")
+
+
+class ScoringProfile(NamedTuple):
+    seat_wind: str
+    round_wind: str
+    seat_number: int
+    use_flowers: bool
+    # (tile id, breakdown label) of every pong worth 1 tai, dragons first
+    scoring_pongs: Tuple[Tuple[int, str], ...]
+    # Tai per flower, in FLOWERS order
+    flower_weights: Tuple[int, ...]
+
+
+def flower_weight(flower: str, seat_number: int) -> int:
+    """
+    Tai of one flower for a seat: animals always score, flowers when their
+    number is the seat number.
+    """
+    parts = flower.split("_")
+    if len(parts) != 2:
+        return 1
+    return int(parts[1].isdigit() and int(parts[1]) == seat_number)
+
+
+@lru_cache(maxsize=256)
+def _build(seat_wind: str, round_wind: str, seat_number: int, use_flowers: bool) -> ScoringProfile:
+    for name, wind in (("seat_wind", seat_wind), ("round_wind", round_wind)):
+        if wind not in WINDS:
+            raise ValueError(f"Unknown {name}: {wind}")
+    if not 1 <= seat_number <= NUM_SEATS:
+        raise ValueError(f"seat_number must be between 1 and {NUM_SEATS}")
+
+    scoring_pongs = tuple((TILE_INDEX[d], f"Pong of {d} Dragon") for d in PONG_DRAGONS) + (
+        (TILE_INDEX[seat_wind], "Seat Wind Pong"),
+        (TILE_INDEX[round_wind], "Round Wind Pong")
+    )
+    flower_weights = tuple(
+        flower_weight(f, seat_number) if use_flowers else 0 for f in FLOWERS
+    )
+    return ScoringProfile(
+        seat_wind, round_wind, seat_number, use_flowers, scoring_pongs, flower_weights
+    )
+
+
+def scoring_profile(
+    seat_wind: Optional[str] = None,
+    round_wind: Optional[str] = None,
+    seat_number: Optional[int] = None,
+    use_flowers: Optional[bool] = None
+) -> ScoringProfile:
+    """
+    Cached profile for a game context; unset fields come from
+    config.game_config. Raises ValueError for an unknown wind or seat.
+    """
+    return _build(
+        seat_wind if seat_wind is not None else config.get_seat_wind(),
+        round_wind if round_wind is not None else config.get_round_wind(),
+        int(seat_number if seat_number is not None else config.get_seat_number()),
+        bool(use_flowers if use_flowers is not None else config.get_use_flowers())
+    )
+
+
+def default_profile() -> ScoringProfile:
+    return scoring_profile()
+
+
+def profile_cache_stats() -> dict:
+    info = _build.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize
+    }
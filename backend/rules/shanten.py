@@ -0,0 +1,402 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import rules.decomposition as decomp
+from representation.all_tiles import ALL_TILES
+from representation.hand import Hand
+
+# ----------------------------
+# Shanten & ukeire
+# ----------------------------
+#
+# The hand is split into four independent components (three suits and the
+# honors). Each component gets a small table, cached by its shape key:
+#
+#   table[p][b] = best value of b blocks taken from this component,
+#                 where p = 1 if the component also supplies the pair
+#
+# A block is a meld (worth 2) or a partial meld (worth 1), and the pair is
+# worth 1. Merging the four tables gives the best total value V, and the
+# shanten number is 2 * melds_needed - V (so -1 means the hand is complete).
+# Candidate discards and draws only change one component, so the other
+# three tables come straight from the cache.
+
+MAX_BLOCKS = 4
+NEG = -100
+HONOR_COMPONENT = decomp.NUM_SUITS
+
+Table = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def _block_options(counts: List[int], suited: bool) -> set:
+    """
+    Every (melds, partials, pair) split of one component.
+    """
+    results = set()
+    n = len(counts)
+
+    def walk(i: int, m: int, t: int, p: int) -> None:
+        while i < n and counts[i] == 0:
+            i += 1
+        if i == n:
+            results.add((m, min(t, MAX_BLOCKS), p))
+            return
+
+        c = counts[i]
+
+        # Pong
+        if c >= 3:
+            counts[i] -= 3
+            walk(i, m + 1, t, p)
+            counts[i] += 3
+
+        # Chow
+        if suited and i + 2 < n and counts[i + 1] and counts[i + 2]:
+            counts[i] -= 1; counts[i + 1] -= 1; counts[i + 2] -= 1
+            walk(i, m + 1, t, p)
+            counts[i] += 1; counts[i + 1] += 1; counts[i + 2] += 1
+
+        # Pair, as the head or as a partial pong
+        if c >= 2:
+            counts[i] -= 2
+            walk(i, m, t + 1, p)
+            if p == 0:
+                walk(i, m, t, 1)
+            counts[i] += 2
+
+        # Partial chows (edge/open and closed waits)
+        if suited:
+            for gap in (1, 2):
+                if i + gap < n and counts[i + gap]:
+                    counts[i] -= 1; counts[i + gap] -= 1
+                    walk(i, m, t + 1, p)
+                    counts[i] += 1; counts[i + gap] += 1
+
+        # Leave one copy isolated
+        counts[i] -= 1
+        walk(i, m, t, p)
+        counts[i] += 1
+
+    walk(0, 0, 0, 0)
+    return results
+
+
+def _options_to_table(options: set) -> Table:
+    table = [[NEG] * (MAX_BLOCKS + 1), [NEG] * (MAX_BLOCKS + 1)]
+    for m, t, p in options:
+        for b in range(min(m + t, MAX_BLOCKS) + 1):
+            value = b + min(m, b) + p
+            if value > table[p][b]:
+                table[p][b] = value
+    return tuple(table[0]), tuple(table[1])
+
+
+@lru_cache(maxsize=1 << 14)
+def _run_table(counts: Tuple[int, ...]) -> Table:
+    """
+    Block table of one run of ranks, keyed by its counts.
+    """
+    return _options_to_table(_block_options(list(counts), True))
+
+
+def _suit_runs(counts: List[int]) -> List[Tuple[int, ...]]:
+    """
+    The suit split at every gap of two or more missing ranks. No meld or
+    partial meld spans such a gap, so the runs are independent.
+    """
+    runs = []
+    i = 0
+    while i < decomp.NUM_RANKS:
+        if counts[i] == 0:
+            i += 1
+            continue
+        end = k = i
+        while k + 1 < decomp.NUM_RANKS:
+            if counts[k + 1]:
+                k += 1
+            elif k + 2 < decomp.NUM_RANKS and counts[k + 2]:
+                k += 2
+            else:
+                break
+            end = k
+        runs.append(tuple(counts[i:end + 1]))
+        i = end + 1
+    return runs
+
+
+@lru_cache(maxsize=1 << 16)
+def suit_table(key: int) -> Table:
+    """
+    Block table of one suit, keyed by its base-5 suit key: the merge of
+    the tables of its runs, which many suits share.
+    """
+    table = _run_table(())
+    for run in _suit_runs(decomp.key_to_counts(key)):
+        table = _merge(table, _run_table(run))
+    return table
+
+
+@lru_cache(maxsize=1 << 10)
+def honor_table(honor_counts: Tuple[int, ...]) -> Table:
+    """
+    Block table of the honors, keyed by their sorted counts.
+    """
+    return _options_to_table(_block_options(list(honor_counts), False))
+
+
+@lru_cache(maxsize=1 << 16)
+def _merge(a: Table, b: Table) -> Table:
+    merged = [[NEG] * (MAX_BLOCKS + 1), [NEG] * (MAX_BLOCKS + 1)]
+    for pa in (0, 1):
+        for pb in (0, 1 - pa):
+            row_a, row_b, out = a[pa], b[pb], merged[pa + pb]
+            for ba in range(MAX_BLOCKS + 1):
+                va = row_a[ba]
+                if va == NEG:
+                    continue
+                for bb in range(MAX_BLOCKS + 1 - ba):
+                    vb = row_b[bb]
+                    if vb != NEG and va + vb > out[ba + bb]:
+                        out[ba + bb] = va + vb
+    return tuple(merged[0]), tuple(merged[1])
+
+
+def _component_tables(counts: List[int]) -> List[Table]:
+    tables = [
+        suit_table(decomp.suit_key(counts, start))
+        for start in range(0, decomp.NUM_SUITED, decomp.NUM_RANKS)
+    ]
+    tables.append(honor_table(tuple(sorted(counts[decomp.NUM_SUITED:]))))
+    return tables
+
+
+def _component_of(tile_id: int) -> int:
+    return min(tile_id // decomp.NUM_RANKS, HONOR_COMPONENT)
+
+
+def _component_table(counts: List[int], component: int) -> Table:
+    if component == HONOR_COMPONENT:
+        return honor_table(tuple(sorted(counts[decomp.NUM_SUITED:])))
+    return suit_table(decomp.suit_key(counts, component * decomp.NUM_RANKS))
+
+
+def _rest_tables(tables: List[Table]) -> List[Table]:
+    """
+    For every component, the merge of the other three.
+    """
+    rest = []
+    for skip in range(len(tables)):
+        merged = None
+        for i, table in enumerate(tables):
+            if i != skip:
+                merged = table if merged is None else _merge(merged, table)
+        rest.append(merged)
+    return rest
+
+
+def _standard_shanten(table: Table, melds_needed: int) -> int:
+    best = max(max(table[0][:melds_needed + 1]), max(table[1][:melds_needed + 1]))
+    return 2 * melds_needed - best
+
+
+def _thirteen_shanten(counts: List[int]) -> int:
+    kinds = 0
+    pair = 0
+    for i in decomp.ORPHAN_IDS:
+        if counts[i]:
+            kinds += 1
+            if counts[i] >= 2:
+                pair = 1
+    return 13 - kinds - pair
+
+
+def _hand_parts(hand_obj) -> Tuple[List[int], List[int]]:
+    """
+    Concealed and display counts (ALL_TILES order) of a dict hand or Hand.
+    """
+    if isinstance(hand_obj, Hand):
+        concealed = hand_obj.concealed_counts()
+        if max(concealed) > decomp.MAX_COPIES:
+            raise ValueError("Hand holds more than 4 copies of a tile")
+        return concealed, hand_obj.display_counts()
+
+    parts = []
+    for part in ("concealed", "display"):
+        counts = [0] * decomp.NUM_TILE_TYPES
+        for tile, count in hand_obj[part].items():
+            i = decomp.all_tiles.TILE_INDEX.get(tile)
+            if i is None:
+                raise ValueError(f"Unknown tile: {tile}")
+            if not 0 <= count <= decomp.MAX_COPIES:
+                raise ValueError(f"Invalid count {count} for tile {tile}")
+            counts[i] = count
+        parts.append(counts)
+    return parts[0], parts[1]
+
+
+class ShantenShape:
+    """
+    Concealed counts with their component tables, so that shanten after
+    replacing one component only costs a single merge. The suit keys and
+    the thirteen-wonders shanten are kept alongside, so a one-tile change
+    neither repacks a suit nor rescans the orphans when it cannot matter.
+    """
+
+    def __init__(
+        self,
+        counts: List[int],
+        display_total: int,
+        tables: List[Table] = None,
+        keys: List[int] = None
+    ):
+        self.counts = counts
+        self.display_total = display_total
+        self.melds_needed = max(0, 4 - display_total // 3)
+        self.closed = display_total == 0
+        self.keys = keys if keys is not None else [
+            decomp.suit_key(counts, start) for start in range(0, decomp.NUM_SUITED, decomp.NUM_RANKS)
+        ]
+        self.tables = tables if tables is not None else _component_tables(counts)
+        self.rest = _rest_tables(self.tables)
+        self.thirteen = _thirteen_shanten(counts) if self.closed else None
+
+    def _changed_table(self, counts: List[int], tile_id: int, delta: int) -> Tuple[int, int, Table]:
+        """
+        (component, suit key or -1, table) of tile_id's component once
+        counts holds the delta.
+        """
+        component = _component_of(tile_id)
+        if component == HONOR_COMPONENT:
+            return component, -1, honor_table(tuple(sorted(counts[decomp.NUM_SUITED:])))
+        key = self.keys[component] + delta * decomp.POW5[tile_id % decomp.NUM_RANKS]
+        return component, key, suit_table(key)
+
+    def after(self, tile_id: int, delta: int) -> "ShantenShape":
+        """
+        New shape with delta copies of tile_id added, reusing the tables
+        of the untouched components.
+        """
+        counts = list(self.counts)
+        counts[tile_id] += delta
+        component, key, table = self._changed_table(counts, tile_id, delta)
+        tables = list(self.tables)
+        tables[component] = table
+        keys = self.keys
+        if key >= 0:
+            keys = list(keys)
+            keys[component] = key
+        return ShantenShape(counts, self.display_total, tables, keys)
+
+    def shanten(self) -> int:
+        value = _standard_shanten(
+            _merge(self.rest[HONOR_COMPONENT], self.tables[HONOR_COMPONENT]),
+            self.melds_needed
+        )
+        if self.closed:
+            value = min(value, self.thirteen)
+        return value
+
+    def shanten_with(self, tile_id: int, delta: int) -> int:
+        """
+        Shanten after adding delta copies of tile_id.
+        """
+        counts = self.counts
+        counts[tile_id] += delta
+        component, _, table = self._changed_table(counts, tile_id, delta)
+        value = _standard_shanten(_merge(self.rest[component], table), self.melds_needed)
+        # Thirteen wonders moves by at most |delta|
+        if self.closed and self.thirteen - abs(delta) < value:
+            value = min(value, _thirteen_shanten(counts))
+        counts[tile_id] -= delta
+        return value
+
+    def useful_ids(self) -> List[int]:
+        """
+        Tile ids whose draw lowers shanten. A missing tile with no
+        neighbours within two ranks can only stay isolated, so it is
+        skipped unless it can still help thirteen wonders.
+        """
+        counts = self.counts
+        current = self.shanten()
+        # One draw lowers thirteen-wonders shanten by at most one
+        thirteen = self.closed and _thirteen_shanten(counts) <= current
+        useful = []
+        for i in range(decomp.NUM_TILE_TYPES):
+            c = counts[i]
+            if c >= decomp.MAX_COPIES:
+                continue
+            if c == 0 and not (thirteen and i in decomp.ORPHAN_SET):
+                if i >= decomp.NUM_SUITED:
+                    continue
+                start = i - i % decomp.NUM_RANKS
+                low = max(start, i - 2)
+                high = min(start + decomp.NUM_RANKS, i + 3)
+                if not any(counts[low:high]):
+                    continue
+            if self.shanten_with(i, 1) < current:
+                useful.append(i)
+        return useful
+
+    def useful_tiles(self, held: List[int]) -> Dict[str, int]:
+        """
+        Tiles that lower shanten, with copies not in `held`.
+        """
+        return {
+            ALL_TILES[i]: decomp.MAX_COPIES - held[i]
+            for i in self.useful_ids() if held[i] < decomp.MAX_COPIES
+        }
+
+
+def shanten(hand_obj) -> int:
+    """
+    Number of tiles the hand is away from ready (0 = ready, -1 = winning).
+    Accepts the dict hand form or a Hand.
+    """
+    concealed, display = _hand_parts(hand_obj)
+    return ShantenShape(concealed, sum(display)).shanten()
+
+
+def useful_tiles(hand_obj) -> Dict[str, int]:
+    """
+    Tiles whose draw lowers the shanten of the hand, mapped to the number
+    of copies not already held in concealed or display.
+    """
+    concealed, display = _hand_parts(hand_obj)
+    held = [c + d for c, d in zip(concealed, display)]
+    return ShantenShape(concealed, sum(display)).useful_tiles(held)
+
+
+def evaluate_discards(hand_obj) -> List[dict]:
+    """
+    Shanten and useful tiles after each possible discard, best first
+    (lowest shanten, then most live useful tiles).
+    """
+    concealed, display = _hand_parts(hand_obj)
+    held = [c + d for c, d in zip(concealed, display)]
+    display_total = sum(display)
+    base = ShantenShape(concealed, display_total)
+
+    results = []
+    for i, tile in enumerate(ALL_TILES):
+        if concealed[i] == 0:
+            continue
+
+        # Only the discarded tile's component changes
+        shape = base.after(i, -1)
+        useful = shape.useful_tiles(held)
+        results.append({
+            "discard": tile,
+            "shanten": shape.shanten(),
+            "ukeire": sum(useful.values()),
+            "useful": useful
+        })
+
+    results.sort(key=lambda r: (r["shanten"], -r["ukeire"]))
+    return results
+
+
+def best_discard(hand_obj) -> str:
+    """
+    Discard that leaves the lowest shanten and the most live useful tiles.
+    """
+    return evaluate_discards(hand_obj)[0]["discard"]
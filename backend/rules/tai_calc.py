@@ -1,20 +1,24 @@
-import config.game_config as config
 from collections import Counter
+import rules.decomposition as decomp
+from representation.all_tiles import ALL_TILES, FLOWERS
+from representation.hand import Hand
+from rules.scoring_profile import ScoringProfile, default_profile, flower_weight
 
 SUITS = ["DOT", "CHAR", "BAM"]
 DRAGONS = ["GREEN", "RED", "WHITE"]
 WINDS = ["EAST", "SOUTH", "WEST", "NORTH"]
+FLOWER_INDEX = {flower: i for i, flower in enumerate(FLOWERS)}
 
 
-def calculate_tai(hand_obj):
+def calculate_tai(hand_obj, profile: ScoringProfile = None):
+    if isinstance(hand_obj, Hand):
+        hand_obj = hand_obj.to_dict()
+    profile = profile or default_profile()
+
     concealed = hand_obj["concealed"]
     display = hand_obj["display"]
     flowers = hand_obj["flowers"]
 
-    seat_wind = config.get_seat_wind()
-    round_wind = config.get_round_wind()
-    seat_number = config.get_seat_number()
-
     tai = 0
     breakdown = []
 
@@ -26,20 +30,7 @@ def calculate_tai(hand_obj):
     # Flower tai (seat-based)
     # -------------------------
 
-    flower_tai = 0
-
-    for flower, count in flowers.items():
-        parts = flower.split("_")
-        if len(parts) != 2:
-            flower_tai += count
-            continue
-
-        color, num = parts
-        if not num.isdigit():
-            continue
-
-        if int(num) == seat_number:
-            flower_tai += count
+    flower_tai = _flower_tai(flowers, profile)
 
     if flower_tai > 0:
         tai += flower_tai
@@ -59,24 +50,11 @@ def calculate_tai(hand_obj):
     # Meld analysis
     melds = get_all_melds(concealed, display)
 
-    # Dragon pongs
-    for d in DRAGONS:
-        tile = f"{d}"
-        if melds.get(tile, 0) >= 3:
+    # Dragon, seat wind and round wind pongs
+    for tile_id, label in profile.scoring_pongs:
+        if melds.get(ALL_TILES[tile_id], 0) >= 3:
             tai += 1
-            breakdown.append(f"Pong of {d} Dragon")
-
-    # Seat wind pong
-    seat_tile = f"{seat_wind}_WIND"
-    if melds.get(seat_tile, 0) >= 3:
-        tai += 1
-        breakdown.append("Seat Wind Pong")
-
-    # Round wind pong
-    round_tile = f"{round_wind}_WIND"
-    if melds.get(round_tile, 0) >= 3:
-        tai += 1
-        breakdown.append("Round Wind Pong")
+            breakdown.append(label)
 
     # All Pongs (Peng Peng Hu)
     if is_all_pongs(concealed, display):
@@ -100,6 +78,128 @@ def calculate_tai(hand_obj):
     return {"tai": tai, "breakdown": breakdown}
 
 
+# -------------------------
+# Decomposition-based scoring
+# -------------------------
+
+def calculate_max_tai(hand_obj, profile: ScoringProfile = None):
+    """
+    Scores every meld decomposition of a winning hand in one pass and
+    returns the best one:
+    {"tai": int, "breakdown": [...], "melds": [...], "pair": tile}
+
+    Hand-level patterns (flowers, Men Qing, flushes) are computed once;
+    pongs, All Pongs and Ping Hu are judged per decomposition, so hands
+    that split more than one way get their maximum tai. Falls back to
+    calculate_tai for hands without a standard decomposition or with more
+    than 4 copies of a tile. profile defaults to the configured game
+    context.
+    """
+    profile = profile or default_profile()
+    if not isinstance(hand_obj, Hand):
+        try:
+            hand_obj = Hand.from_dict(hand_obj)
+        except ValueError:
+            return calculate_tai(hand_obj, profile)
+
+    concealed = hand_obj.concealed_counts()
+    display = hand_obj.display_counts()
+
+    # The suit tables only cover up to 4 copies of a tile
+    if max(concealed) > decomp.MAX_COPIES or max(display) > decomp.MAX_COPIES:
+        return calculate_tai(hand_obj, profile)
+    if decomp.is_thirteen_wonders(concealed):
+        return calculate_tai(hand_obj, profile)
+
+    hand_splits = decomp.decompositions(concealed)
+    display_splits = decomp.decompositions(display, with_pair=False)
+    if not hand_splits or not display_splits:
+        return calculate_tai(hand_obj, profile)
+
+    # Hand-level patterns
+    base_tai = 0
+    base_breakdown = ["Winning hand"]
+
+    flower_tai = sum(w * c for w, c in zip(profile.flower_weights, hand_obj.flower_counts()))
+    if flower_tai > 0:
+        base_tai += flower_tai
+        base_breakdown.append(f"{flower_tai} Seat Flower/Animal Tai")
+
+    if sum(display) == 0:
+        base_tai += 1
+        base_breakdown.append("Men Qing (门清)")
+
+    flush_type = _flush_type([c + d for c, d in zip(concealed, display)])
+    no_flowers = hand_obj.flower_size() == 0
+
+    scoring_pongs = profile.scoring_pongs
+
+    best = None
+    for display_melds, _ in display_splits:
+        for hand_melds, pair in hand_splits:
+            melds = display_melds + hand_melds
+            tai = base_tai
+            breakdown = list(base_breakdown)
+
+            pongs = {tile_id for kind, tile_id in melds if kind == decomp.PONG}
+            for tile_id, label in scoring_pongs:
+                if tile_id in pongs:
+                    tai += 1
+                    breakdown.append(label)
+
+            if len(pongs) == len(melds):
+                tai += 2
+                breakdown.append("All Pongs (碰碰胡)")
+            elif not pongs:
+                tai += 4 if no_flowers else 1
+                breakdown.append("Ping Hu (平胡)" if no_flowers else "Chou Ping Hu (臭平胡)")
+
+            if flush_type == "FULL":
+                tai += 4
+                breakdown.append("Full Flush (清一色)")
+            elif flush_type == "HALF":
+                tai += 2
+                breakdown.append("Half Flush (混一色)")
+
+            if best is None or tai > best[0]:
+                best = (tai, breakdown, melds, pair)
+
+    tai, breakdown, melds, pair = best
+    return {
+        "tai": tai,
+        "breakdown": breakdown,
+        "melds": [_meld_name(kind, tile_id) for kind, tile_id in melds],
+        "pair": ALL_TILES[pair]
+    }
+
+
+def _flower_tai(flowers, profile: ScoringProfile):
+    flower_tai = 0
+    for flower, count in flowers.items():
+        i = FLOWER_INDEX.get(flower)
+        if i is not None:
+            flower_tai += profile.flower_weights[i] * count
+        elif profile.use_flowers:
+            flower_tai += flower_weight(flower, profile.seat_number) * count
+    return flower_tai
+
+
+def _flush_type(counts):
+    suits = sum(
+        1 for start in range(0, decomp.NUM_SUITED, decomp.NUM_RANKS)
+        if any(counts[start:start + decomp.NUM_RANKS])
+    )
+    if suits != 1:
+        return None
+    return "HALF" if any(counts[decomp.NUM_SUITED:]) else "FULL"
+
+
+def _meld_name(kind, tile_id):
+    if kind == decomp.CHOW:
+        return "Chow " + " ".join(ALL_TILES[tile_id + k] for k in range(3))
+    return f"Pong {ALL_TILES[tile_id]}"
+
+
 # -------------------------
 # Helper functions
 # -------------------------
@@ -0,0 +1,40 @@
+from collections import Counter
+from typing import List
+
+import rules.tai_calc as tai_calc
+import rules.win_checker as win_checker
+from representation.hand import Hand
+from representation.wall import create_full_wall, remove_hand_from_wall
+from rules.scoring_profile import ScoringProfile
+
+
+def find_waits(hand_obj, tile_wall: Counter = None, profile: ScoringProfile = None) -> List[dict]:
+    """
+    Every tile that completes a 13-tile hand, with the tai it would score
+    and the copies still live in the wall:
+    [{"tile": str, "tai": int, "breakdown": [...], "live": int}, ...]
+
+    tile_wall defaults to a full wall; the hand's own tiles are removed
+    with remove_hand_from_wall. Sorted by tai, then live copies. Tai are
+    scored with profile (default: the configured game context).
+    """
+    if isinstance(hand_obj, Hand):
+        hand_obj = hand_obj.to_dict()
+
+    if tile_wall is None:
+        tile_wall = create_full_wall(include_flowers=False)
+    remaining = remove_hand_from_wall(tile_wall, hand_obj)
+
+    waits = []
+    for tile in win_checker.winning_tiles(hand_obj):
+        completed = {**hand_obj, "concealed": hand_obj["concealed"] + Counter([tile])}
+        calc = tai_calc.calculate_max_tai(completed, profile)
+        waits.append({
+            "tile": tile,
+            "tai": calc["tai"],
+            "breakdown": calc["breakdown"],
+            "live": max(remaining[tile], 0)
+        })
+
+    waits.sort(key=lambda w: (-w["tai"], -w["live"]))
+    return waits
@@ -1,15 +1,89 @@
 from collections import Counter
-from functools import lru_cache
+
+import config.server_config as server_config
+import rules.decomposition as decomp
+from cache.lru import LRUCache
+from representation.all_tiles import ALL_TILES, TILE_INDEX
+from representation.hand import Hand
 
 SUITS = ["DOT", "CHAR", "BAM"]
 DRAGONS = ["GREEN", "RED", "WHITE"]
 WINDS = ["EAST", "SOUTH", "WEST", "NORTH"]
 
+# Bounded memo for can_form_melds, keyed by packed counts
+MELD_CACHE = LRUCache(server_config.get_meld_cache_size())
+
 def is_winning(hand_obj) -> bool:
     """
     Check if the hand is a winning hand.
     - Includes both concealed and displayed tiles.
     - Pair must come from concealed tiles.
+
+    Uses the precomputed suit tables in rules.decomposition. Hands the
+    tables do not cover (unknown tiles, odd counts) go to the reference
+    checker.
+    """
+    if isinstance(hand_obj, Hand):
+        counts = hand_obj.concealed_counts()
+        display_total = hand_obj.display_size()
+        if sum(counts) + display_total != 14:
+            return False
+        if max(counts) > decomp.MAX_COPIES:
+            return is_winning_reference(hand_obj.to_dict())
+    else:
+        concealed = hand_obj["concealed"]
+        display_total = sum(hand_obj["display"].values())
+        if sum(concealed.values()) + display_total != 14:
+            return False
+
+        counts = decomp.hand_counts(concealed)
+        if counts is None:
+            return is_winning_reference(hand_obj)
+
+    if decomp.is_thirteen_wonders(counts):
+        return True
+
+    return display_total % 3 == 0 and decomp.is_complete(counts)
+
+
+def winning_tiles(hand_obj) -> list:
+    """
+    Tiles that complete a hand of 13 tiles (concealed plus display),
+    found in one pass over the suit tables. Tiles whose 4 copies are all
+    held, concealed or displayed, are not waits.
+    """
+    if isinstance(hand_obj, Hand):
+        counts = hand_obj.concealed_counts()
+        display = hand_obj.display_counts()
+        display_total = sum(display)
+        if max(counts) > decomp.MAX_COPIES:
+            counts = None
+    else:
+        counts = decomp.hand_counts(hand_obj["concealed"])
+        display = decomp.hand_counts(hand_obj["display"])
+        display_total = sum(hand_obj["display"].values())
+
+    if counts is None or display is None:
+        if isinstance(hand_obj, Hand):
+            hand_obj = hand_obj.to_dict()
+        concealed = hand_obj["concealed"]
+        held = concealed + hand_obj["display"]
+        return [
+            tile for tile in ALL_TILES
+            if held[tile] < decomp.MAX_COPIES
+            and is_winning({**hand_obj, "concealed": concealed + Counter([tile])})
+        ]
+
+    if sum(counts) + display_total != 13 or display_total % 3:
+        return []
+
+    return [ALL_TILES[i] for i in decomp.completing_tiles(counts, display)]
+
+
+def is_winning_reference(hand_obj) -> bool:
+    """
+    Recursive reference version of is_winning.
+    Kept to cross-check the table-driven checker.
     """
     concealed = hand_obj["concealed"]
     display = hand_obj["display"]
@@ -61,11 +135,35 @@ def is_standard_win(hand_obj) -> bool:
     return False
 
 
-@lru_cache(maxsize=None)
+def meld_key(counter_frozen: frozenset, melds_needed: int):
+    """
+    Packs the counts into one int (3 bits per tile in ALL_TILES order, then
+    3 bits for melds_needed). Falls back to the frozenset for tiles or
+    counts that do not fit.
+    """
+    key = 0
+    for tile, count in counter_frozen:
+        i = TILE_INDEX.get(tile)
+        if i is None or not 0 < count < 8:
+            return counter_frozen, melds_needed
+        key |= count << (3 * i)
+    return (key << 3) | melds_needed
+
+
 def can_form_melds(counter_frozen: frozenset, melds_needed: int) -> bool:
     """
     Recursively check if exactly 'melds_needed' melds can be formed from the counter
+    Results are memoized in MELD_CACHE.
     """
+    key = meld_key(counter_frozen, melds_needed)
+    result = MELD_CACHE.get(key)
+    if result is None:
+        result = _can_form_melds(counter_frozen, melds_needed)
+        MELD_CACHE.put(key, result)
+    return result
+
+
+def _can_form_melds(counter_frozen: frozenset, melds_needed: int) -> bool:
     counter = Counter(dict(counter_frozen))
 
     if melds_needed == 0:
@@ -110,6 +208,41 @@ def can_form_melds(counter_frozen: frozenset, melds_needed: int) -> bool:
     return False
 
 
+def meld_cache_stats() -> dict:
+    return MELD_CACHE.stats()
+
+
+def warm_meld_cache(limit: int = None) -> int:
+    """
+    Pre-fills MELD_CACHE with the smallest meld-only suit shapes, which are
+    the ones every larger shape recurses into. Returns the number of
+    shapes visited.
+    """
+    if limit is None:
+        limit = server_config.get_meld_cache_warmup()
+    limit = min(limit, MELD_CACHE.maxsize)
+
+    keys = [
+        key for key in range(decomp.NUM_SUIT_KEYS)
+        if decomp.SUIT_TABLE[key] & decomp.MELDS
+    ]
+    keys.sort(key=lambda k: sum(decomp.key_to_counts(k)))
+
+    visited = 0
+    for key in keys:
+        ranks = decomp.key_to_counts(key)
+        melds = sum(ranks) // 3
+        for suit in SUITS:
+            if visited >= limit:
+                return visited
+            counter = frozenset(
+                (f"{r + 1}_{suit}", c) for r, c in enumerate(ranks) if c
+            )
+            can_form_melds(counter, melds)
+            visited += 1
+    return visited
+
+
 def is_thirteen_wonders(counter: Counter) -> bool:
     required = set()
     for suit in SUITS:
@@ -129,3 +262,42 @@ def is_thirteen_wonders(counter: Counter) -> bool:
     # Exactly one pair among them
     pair_count = sum(1 for t in required if counter[t] == 2)
     return pair_count == 1
+
+
+def verify_against_reference() -> int:
+    """
+    Cross-checks is_winning against is_winning_reference on every
+    single-suit shape of at most 14 tiles, alone or with a RED pair, the
+    rest of the 14 padded with WEST display tiles. Mixed-suit hands and
+    honor melds are not enumerated here; tests/test_win_checker.py checks
+    them on random hands. Returns the number of hands checked.
+    """
+    checked = 0
+    for key in range(decomp.NUM_SUIT_KEYS):
+        ranks = decomp.key_to_counts(key)
+        total = sum(ranks)
+        if total > 14:
+            continue
+
+        for suit in SUITS:
+            concealed = Counter({
+                f"{r + 1}_{suit}": c for r, c in enumerate(ranks) if c
+            })
+            for pair in (None, "RED"):
+                hand = Counter(concealed)
+                if pair is not None:
+                    hand[pair] += 2
+                size = sum(hand.values())
+                if size > 14 or (14 - size) % 3:
+                    continue
+
+                hand_obj = {
+                    "concealed": hand,
+                    "display": Counter({"WEST": 14 - size}),
+                    "flowers": Counter()
+                }
+                if is_winning(hand_obj) != is_winning_reference(hand_obj):
+                    raise AssertionError(f"Win table mismatch for {dict(hand)}")
+                checked += 1
+
+    return checked
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend modules import each other as top-level packages (api,
+# engine, rules...), as they do when the server runs from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--slow", action="store_true", help="Also run the exhaustive checks")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: exhaustive check, run with --slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--slow"):
+        return
+    skip = pytest.mark.skip(reason="exhaustive check, run with --slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def served_model(tmp_path_factory):
+    """
+    The model predictions go through: the trained one when present, else
+    a small forest trained on generated hands.
+    """
+    import engine.data.raw_data_generator as generator
+    import engine.model as model
+
+    if model.file_version() is None:
+        pytest.importorskip("sklearn")
+        work = tmp_path_factory.mktemp("model")
+        generator.generate_hands(str(work / "raw.csv"), 2_000, seed=0, workers=1)
+        generator.process_csv(str(work / "raw.csv"), str(work / "labeled.csv"))
+        model.train_best_discard_model(work / "labeled.csv", work / "model.joblib", n_estimators=10)
+        model.load_model(work / "model.npz")
+    return model.get_model()
@@ -0,0 +1,63 @@
+import random
+from collections import Counter
+
+import rules.decomposition as decomp
+from representation.all_tiles import ALL_TILES, FLOWERS
+
+SUITS = ["DOT", "CHAR", "BAM"]
+WALL = [t for t in ALL_TILES for _ in range(decomp.MAX_COPIES)]
+
+# ----------------------------
+# Random hands for the tests
+# ----------------------------
+
+
+def hand(concealed, display=(), flowers=()) -> dict:
+    return {"concealed": Counter(concealed), "display": Counter(display), "flowers": Counter(flowers)}
+
+
+def random_meld(rng: random.Random) -> list:
+    if rng.random() < 0.5:
+        return [rng.choice(ALL_TILES)] * 3
+    suit = rng.choice(SUITS)
+    start = rng.randint(1, 7)
+    return [f"{r}_{suit}" for r in range(start, start + 3)]
+
+
+def winning_shape(rng: random.Random):
+    """
+    (melds, pair): four melds and a pair over every suit and the honors,
+    at most 4 copies of a tile.
+    """
+    while True:
+        melds = [random_meld(rng) for _ in range(4)]
+        pair = [rng.choice(ALL_TILES)] * 2
+        counts = Counter(pair + [t for m in melds for t in m])
+        if max(counts.values()) <= decomp.MAX_COPIES:
+            return melds, pair
+
+
+def winning_hand(rng: random.Random, displayed_melds: int = 0, max_flowers: int = 0) -> dict:
+    melds, pair = winning_shape(rng)
+    display = [t for m in melds[:displayed_melds] for t in m]
+    concealed = pair + [t for m in melds[displayed_melds:] for t in m]
+    flowers = rng.sample(FLOWERS, rng.randint(0, max_flowers))
+    return hand(concealed, display, flowers)
+
+
+def random_tiles(rng: random.Random, n: int) -> list:
+    return rng.sample(WALL, n)
+
+
+def sample_hands(seed: int, n: int = 300) -> list:
+    """
+    n winning hands (some melds displayed, some flowers) and n random
+    14-tile hands with three tiles in the display.
+    """
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(n):
+        hands.append(winning_hand(rng, rng.randint(0, 2), max_flowers=2))
+        tiles = random_tiles(rng, 14)
+        hands.append(hand(tiles[3:], tiles[:3]))
+    return hands
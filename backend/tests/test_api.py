@@ -0,0 +1,274 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.app as app
+import engine.model as model
+import engine.prediction_cache as prediction_cache
+
+READY_13 = [
+    "1_DOT", "2_DOT", "3_DOT", "4_DOT", "5_DOT", "6_DOT", "7_DOT", "8_DOT", "9_DOT",
+    "EAST", "EAST", "RED", "RED"
+]
+
+
+@pytest.fixture(scope="module")
+def client(served_model):
+    with TestClient(app.app) as c:
+        yield c
+
+
+def _wait_for_warm_up(timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while app.READINESS["warmup_seconds"] is None:
+        assert time.monotonic() < deadline, "warm-up did not finish"
+        time.sleep(0.05)
+
+
+# -------------------------
+# /health and /ready
+# -------------------------
+def test_health(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json() == {"status": "alive"}
+
+
+def test_ready_without_a_model_file(client, monkeypatch, tmp_path):
+    _wait_for_warm_up()
+    monkeypatch.setattr(model, "MODEL", None)
+    monkeypatch.setattr(model, "MODEL_PATH", tmp_path / "missing.joblib")
+    monkeypatch.setattr(model, "FOREST_PATH", tmp_path / "missing.npz")
+
+    r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["model"] == "absent"
+    assert r.json()["ready"] is False
+
+
+def test_ready_once_the_model_is_loaded(client):
+    _wait_for_warm_up()
+
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["model"] is True
+
+
+# -------------------------
+# /waits
+# -------------------------
+def test_waits_of_a_ready_hand(client):
+    r = client.post("/waits", json={"concealed": READY_13})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["tenpai"] is True
+    assert {w["tile"] for w in body["waits"]} == {"EAST", "RED"}
+
+
+def test_waits_counts_display_tiles(client):
+    r = client.post("/waits", json={"concealed": READY_13[3:], "display": READY_13[:3]})
+    assert r.status_code == 200
+    assert r.json()["tenpai"] is True
+
+
+def test_waits_rejects_wrong_tile_count(client):
+    r = client.post("/waits", json={"concealed": READY_13 + ["GREEN"]})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("concealed", [
+    READY_13[:12] + ["FOO"],
+    ["RED"] * 5 + READY_13[:8]
+])
+def test_waits_rejects_bad_hands(client, concealed):
+    r = client.post("/waits", json={"concealed": concealed})
+    assert r.status_code == 400
+
+
+def test_waits_accepts_null_display(client):
+    r = client.post("/waits", json={"concealed": READY_13, "display": None, "flowers": None})
+    assert r.status_code == 200
+    assert r.json()["tenpai"] is True
+
+    r = client.post("/waits", json={"concealed": READY_13[:12], "display": None})
+    assert r.status_code == 400
+
+
+# -------------------------
+# /predict/search and /predict/simulate
+# -------------------------
+HAND_14 = READY_13 + ["GREEN"]
+WINNING_14 = READY_13 + ["EAST"]
+
+
+@pytest.mark.parametrize("path", ["/predict/search", "/predict/simulate"])
+def test_discard_search_accepts_null_display(client, path):
+    r = client.post(path, params={"budget_ms": 50}, json={"concealed": HAND_14, "display": None})
+    assert r.status_code == 200
+    assert r.json()["best_discard"] in HAND_14
+
+
+@pytest.mark.parametrize("path", ["/predict/search", "/predict/simulate"])
+def test_discard_search_rejects_wrong_tile_count(client, path):
+    r = client.post(path, json={"concealed": READY_13, "display": None})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/predict/search", "/predict/simulate"])
+@pytest.mark.parametrize("concealed", [
+    READY_13 + ["FOO"],
+    ["1_DOT"] * 5 + READY_13[1:10]
+])
+def test_discard_search_rejects_bad_hands(client, path, concealed):
+    r = client.post(path, params={"budget_ms": 50}, json={"concealed": concealed})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"budget_ms": 0}, {"budget_ms": -5}, {"max_depth": -1}])
+def test_search_rejects_unbounded_queries(client, params):
+    r = client.post("/predict/search", params=params, json={"concealed": HAND_14})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"budget_ms": 0}, {"budget_ms": -5}, {"max_draws": 0}])
+def test_simulate_rejects_unbounded_queries(client, params):
+    r = client.post("/predict/simulate", params=params, json={"concealed": HAND_14})
+    assert r.status_code == 400
+
+
+def test_simulate_clamps_to_the_server_limits(client, monkeypatch):
+    monkeypatch.setenv("MAHJONG_SIMULATION_MAX_BUDGET_MS", "50")
+    r = client.post("/predict/simulate", params={"budget_ms": 10**9}, json={"concealed": HAND_14})
+    assert r.status_code == 200
+    assert r.json()["elapsed_ms"] < 5000
+
+
+def test_search_clamps_to_the_server_limits(client, monkeypatch):
+    monkeypatch.setenv("MAHJONG_SEARCH_MAX_BUDGET_MS", "50")
+    monkeypatch.setenv("MAHJONG_SEARCH_DEPTH_LIMIT", "1")
+    r = client.post("/predict/search", params={"budget_ms": 10**9, "max_depth": 50}, json={"concealed": HAND_14})
+    assert r.status_code == 200
+    assert r.json()["depth"] <= 1
+    assert r.json()["elapsed_ms"] < 1000
+
+
+# -------------------------
+# /predict
+# -------------------------
+def test_predict_discard_and_win(client):
+    r = client.post("/predict", json={"concealed": HAND_14})
+    assert r.status_code == 200
+    assert r.json()["winning"] is False
+    assert r.json()["best_discard"] in HAND_14
+
+    r = client.post("/predict", json={"concealed": WINNING_14, "display": None})
+    assert r.status_code == 200
+    assert r.json()["winning"] is True
+    assert r.json()["tai"] > 0 and r.json()["breakdown"]
+
+
+@pytest.mark.parametrize("concealed", [
+    [],
+    ["NOT_A_TILE"] + READY_13,
+    ["RED"] * 5 + READY_13[:9],
+    READY_13 + ["GREEN", "GREEN"],
+    ["1_DOT"] * 300
+])
+def test_predict_rejects_bad_hands(client, concealed):
+    r = client.post("/predict", json={"concealed": concealed})
+    assert r.status_code == 400
+
+
+# -------------------------
+# /predict/batch
+# -------------------------
+def test_predict_batch_matches_single_predictions(client):
+    hands = [{"concealed": HAND_14}, {"concealed": WINNING_14}, {"concealed": READY_13[1:] + ["GREEN", "WHITE"]}]
+    r = client.post("/predict/batch", json={"hands": hands})
+    assert r.status_code == 200
+    assert r.json()["results"] == [client.post("/predict", json=h).json() for h in hands]
+
+
+def test_predict_batch_names_the_bad_hand(client):
+    r = client.post("/predict/batch", json={"hands": [{"concealed": HAND_14}, {"concealed": []}]})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Hand 1:")
+
+
+# -------------------------
+# /cache/stats
+# -------------------------
+def test_cache_stats(client):
+    client.post("/predict", json={"concealed": HAND_14})
+    client.post("/predict", json={"concealed": HAND_14})
+
+    body = client.get("/cache/stats").json()
+    assert set(body) == {"meld_cache", "predict_cache", "scoring_profiles", "sessions"}
+    assert body["predict_cache"]["hits"] >= 1
+
+
+# -------------------------
+# /metrics
+# -------------------------
+def test_metrics(client):
+    client.post("/predict", json={"concealed": HAND_14})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert "mahjong_predict_cache_requests_total" in r.text
+
+
+# -------------------------
+# /ws/session
+# -------------------------
+def test_session_socket_flow(client):
+    with client.websocket_connect("/ws/session") as ws:
+        ws.send_json({"op": "draw", "tile": "EAST"})
+        assert "error" in ws.receive_json()
+
+        ws.send_json({"op": "start", "concealed": ["1_DOT"] * 300})
+        assert "error" in ws.receive_json()
+
+        ws.send_json({"op": "start", "concealed": READY_13})
+        started = ws.receive_json()
+        assert started["advice"]["shanten"] == 0
+
+        ws.send_json({"op": "draw", "tile": "GREEN"})
+        body = ws.receive_json()
+        assert body["moves"] == 1
+        assert body["advice"]["discards"][0]["discard"] == "GREEN"
+
+        ws.send_json({"op": "discard", "tile": "WHITE"})
+        assert "error" in ws.receive_json()
+        session_id = started["session_id"]
+
+    # The session outlives the socket and can be resumed
+    with client.websocket_connect(f"/ws/session?session_id={session_id}") as ws:
+        ws.send_json({"op": "discard", "tile": "GREEN"})
+        assert ws.receive_json()["advice"]["tiles"] == 13
+
+
+def test_session_socket_survives_a_missing_model(client, monkeypatch, tmp_path):
+    _wait_for_warm_up()
+    prediction_cache.clear_prediction_cache()
+    monkeypatch.setattr(model, "MODEL", None)
+    monkeypatch.setattr(model, "MODEL_PATH", tmp_path / "missing.joblib")
+    monkeypatch.setattr(model, "FOREST_PATH", tmp_path / "missing.npz")
+
+    with client.websocket_connect("/ws/session") as ws:
+        ws.send_json({"op": "start", "concealed": READY_13})
+        assert ws.receive_json()["advice"]["shanten"] == 0
+
+        # The shape advice is answered without the model's pick
+        ws.send_json({"op": "draw", "tile": "GREEN"})
+        body = ws.receive_json()
+        assert body["moves"] == 1
+        assert body["advice"]["best_discard"] is None
+        assert body["advice"]["discards"][0]["discard"] == "GREEN"
+
+        ws.send_json({"op": "discard", "tile": "GREEN"})
+        body = ws.receive_json()
+        assert body["moves"] == 2
+        assert body["advice"]["tiles"] == 13
@@ -0,0 +1,29 @@
+import pytest
+
+import rules.batch as batch
+import rules.tai_calc as tai_calc
+import rules.win_checker as win_checker
+from hands import sample_hands
+from rules.scoring_profile import scoring_profile
+
+PROFILES = [
+    scoring_profile(seat_wind="EAST", round_wind="EAST", seat_number=1),
+    scoring_profile(seat_wind="WEST", round_wind="SOUTH", seat_number=3, use_flowers=True)
+]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_is_winning_batch_matches_is_winning(seed):
+    hands = sample_hands(seed)
+    concealed, display, _ = batch.hands_to_matrices(hands)
+    winning = batch.is_winning_batch(concealed, display)
+    assert winning.tolist() == [win_checker.is_winning(h) for h in hands]
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_tai_batch_matches_calculate_tai(profile):
+    hands = sample_hands(10)
+    winning, tai, _ = batch.score_hands(hands, profile)
+    for h, won, t in zip(hands, winning, tai):
+        expected = tai_calc.calculate_tai(h, profile)["tai"] if won else 0
+        assert t == expected, dict(h["concealed"])
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from api.batching import MicroBatcher
+
+
+def _double(items):
+    if any(item < 0 for item in items):
+        raise ValueError("negative item")
+    return [item * 2 for item in items]
+
+
+def _submit_all(batcher, items):
+    async def run():
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(item) for item in items), return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(run())
+
+
+def test_batches_concurrent_requests():
+    batcher = MicroBatcher(_double, max_size=8, max_wait_ms=50)
+    results = _submit_all(batcher, list(range(8)))
+
+    assert results == [i * 2 for i in range(8)]
+    assert batcher.stats()["largest_batch"] > 1
+    assert batcher.split_batches == 0
+
+
+def test_poisoned_item_only_fails_its_own_future():
+    batcher = MicroBatcher(_double, max_size=16, max_wait_ms=50)
+    items = [1, 2, 3, -1, 4, 5, 6, 7, 8]
+    results = _submit_all(batcher, items)
+
+    assert isinstance(results[3], ValueError)
+    assert [r for i, r in enumerate(results) if i != 3] == [2, 4, 6, 8, 10, 12, 14, 16]
+    assert batcher.split_batches >= 1
+
+
+def test_submit_requires_running_batcher():
+    batcher = MicroBatcher(_double, max_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit(1))
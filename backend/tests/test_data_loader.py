@@ -0,0 +1,71 @@
+import csv
+
+import numpy as np
+import pytest
+
+import engine.data.data_loader as dl
+import engine.data.raw_data_generator as generator
+
+
+@pytest.fixture
+def labeled_csv(tmp_path):
+    raw = tmp_path / "raw.csv"
+    labeled = tmp_path / "labeled.csv"
+    generator.write_random_hands_to_csv(str(raw), 300)
+    generator.process_csv(str(raw), str(labeled))
+    return labeled
+
+
+def test_cached_dataset_matches_the_csv(labeled_csv, tmp_path):
+    X_csv, y_csv = dl.load_training_data(labeled_csv)
+    X, y = dl.load_dataset(labeled_csv, cache_root=tmp_path / "cache", mmap=True)
+
+    assert isinstance(X, np.memmap) and X.dtype == np.uint8 and y.dtype == np.int8
+    np.testing.assert_array_equal(X, X_csv)
+    np.testing.assert_array_equal(y, y_csv)
+
+    X_head, y_head = dl.load_dataset(labeled_csv, max_rows=10, cache_root=tmp_path / "cache")
+    np.testing.assert_array_equal(X_head, X_csv[:10])
+    assert len(y_head) == 10
+
+
+def test_conversion_chunks_do_not_change_the_dataset(labeled_csv, tmp_path):
+    whole = dl.convert_csv_to_dataset(labeled_csv, tmp_path / "a")
+    chunked = dl.convert_csv_to_dataset(labeled_csv, tmp_path / "b", chunk_rows=7)
+    for name in ("X.npy", "y.npy"):
+        assert (whole / name).read_bytes() == (chunked / name).read_bytes()
+
+
+def test_cache_is_reused_until_the_csv_changes(labeled_csv, tmp_path):
+    cache = tmp_path / "cache"
+    first = dl.convert_csv_to_dataset(labeled_csv, cache)
+    mtime = (first / "X.npy").stat().st_mtime_ns
+    assert dl.convert_csv_to_dataset(labeled_csv, cache) == first
+    assert (first / "X.npy").stat().st_mtime_ns == mtime
+
+    # Relabel one row: a new cache entry with the new label
+    _, y_before = dl.load_dataset(labeled_csv, cache_root=cache)
+    with open(labeled_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for tile in dl.parse_tiles(rows[0]["concealed"]):
+        rows[0]["best_discard"] = tile
+        if dl.parse_row(rows[0])[1] != y_before[0]:
+            break
+    with open(labeled_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    second = dl.convert_csv_to_dataset(labeled_csv, cache)
+    assert second != first
+    _, y = dl.load_dataset(labeled_csv, cache_root=cache)
+    assert y[0] == dl.parse_row(rows[0])[1] != y_before[0]
+
+
+def test_chunks_cover_the_dataset_in_order(labeled_csv, tmp_path):
+    X, y = dl.load_dataset(labeled_csv, cache_root=tmp_path)
+    chunks = list(dl.iter_dataset_chunks(labeled_csv, chunk_rows=64, cache_root=tmp_path))
+
+    assert [len(c_y) for _, c_y in chunks] == [64] * (len(y) // 64) + [len(y) % 64]
+    np.testing.assert_array_equal(np.vstack([c_X for c_X, _ in chunks]), X)
+    np.testing.assert_array_equal(np.concatenate([c_y for _, c_y in chunks]), y)
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+
+import rules.batch as batch
+from engine import encoder
+from hands import sample_hands
+from representation.all_tiles import TILE_INDEX
+from representation.hand import Hand
+
+
+def test_encode_batch_matches_encode_hand():
+    hands = sample_hands(0, 100)
+    expected = np.array([encoder.encode_hand(h) for h in hands], dtype=np.uint8)
+    compact = [Hand.from_dict(h) for h in hands]
+
+    assert encoder.encode_batch(hands).dtype == np.uint8
+    np.testing.assert_array_equal(encoder.encode_batch(hands), expected)
+    np.testing.assert_array_equal(encoder.encode_batch(compact), expected)
+
+    mixed = [h if random.Random(i).random() < 0.5 else c for i, (h, c) in enumerate(zip(hands, compact))]
+    np.testing.assert_array_equal(encoder.encode_batch(mixed), expected)
+
+
+def test_encode_batch_of_nothing():
+    assert encoder.encode_batch([]).shape == (0, encoder.ENCODED_SIZE)
+
+
+def test_encode_matrices_matches_encode_batch():
+    hands = [Hand.from_dict(h) for h in sample_hands(1, 50)]
+    concealed, display, _ = batch.hands_to_matrices(hands)
+    np.testing.assert_array_equal(encoder.encode_matrices(concealed, display), encoder.encode_batch(hands))
+
+
+def test_tile_slots_come_from_the_shared_tile_index():
+    for slot, tile in enumerate(encoder.ALL_TILES):
+        assert encoder.encode_single_tile(tile) == slot
+        assert encoder.ENCODER_ORDER[slot] == TILE_INDEX[tile]
+    assert encoder.encode_single_tile("NOT_A_TILE") is None
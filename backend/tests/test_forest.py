@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.ensemble import RandomForestClassifier
+
+import engine.forest as forest
+from engine.encoder import ENCODED_SIZE
+
+
+def _data(seed, n=3_000, classes=14):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 5, size=(n, ENCODED_SIZE), dtype=np.uint8)
+    # Labels depend on the features, with noise, like discard positions
+    y = (X[:, :classes].argmax(axis=1) + (rng.random(n) < 0.2) * rng.integers(0, classes, n)) % classes
+    return X, y
+
+
+def _model(seed, X, y, n_estimators=15):
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=12, min_samples_leaf=2, random_state=seed)
+    return model.fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y = _data(0)
+    return _model(0, X, y), _data(1)[0]
+
+
+def test_full_precision_forest_matches_sklearn(fitted):
+    model, X_test = fitted
+    flat = forest.FlatForest.from_model(model, compact=False)
+
+    np.testing.assert_allclose(flat.predict_proba(X_test), model.predict_proba(X_test), rtol=0, atol=1e-12)
+    assert (flat.predict(X_test) == model.predict(X_test)).all()
+
+
+def test_compact_forest_predicts_like_sklearn(fitted):
+    model, X_test = fitted
+    flat = forest.FlatForest.from_model(model, compact=True)
+
+    assert (flat.predict(X_test) == model.predict(X_test)).all()
+    np.testing.assert_allclose(flat.predict_proba(X_test), model.predict_proba(X_test), atol=1e-6)
+    # Single rows take the small-batch path
+    for row in X_test[:50]:
+        assert flat.predict(row) == model.predict(row[None, :])
+
+
+def test_save_and_load_round_trip(fitted, tmp_path):
+    model, X_test = fitted
+    path = tmp_path / "forest.npz"
+    saved = forest.export_forest(model, path)
+    loaded = forest.load_forest(path)
+
+    assert loaded.n_trees == saved.n_trees == len(model.estimators_)
+    assert (loaded.predict(X_test) == model.predict(X_test)).all()
+
+
+def test_combined_forest_averages_every_tree(fitted):
+    model, X_test = fitted
+    X, y = _data(2)
+    # A sub-forest that never saw the last classes
+    partial = _model(2, X[y < 10], y[y < 10], n_estimators=5)
+
+    combined = forest.combine_forests([
+        forest.FlatForest.from_model(model, compact=False),
+        forest.FlatForest.from_model(partial, compact=False)
+    ])
+    padded = np.zeros((len(X_test), len(model.classes_)))
+    padded[:, np.searchsorted(model.classes_, partial.classes_)] = partial.predict_proba(X_test)
+    expected = (model.predict_proba(X_test) * 15 + padded * 5) / 20
+
+    assert combined.n_trees == 20
+    np.testing.assert_allclose(combined.predict_proba(X_test), expected, atol=1e-12)
+
+
+def test_compact_feature_type_fits_wide_inputs():
+    rng = np.random.default_rng(3)
+    X = rng.integers(0, 5, size=(1_000, 300), dtype=np.uint8)
+    # Only the last columns carry the label, so the trees split on them
+    y = X[:, -3:].argmax(axis=1)
+    model = RandomForestClassifier(n_estimators=5, max_depth=8, random_state=3).fit(X, y)
+
+    flat = forest.FlatForest.from_model(model, compact=True)
+    assert flat.feature.dtype == np.uint16
+    assert (flat.predict(X) == model.predict(X)).all()
+    assert forest.FlatForest.from_model(_model(0, *_data(0)), compact=True).feature.dtype == np.uint8
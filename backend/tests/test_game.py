@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+import engine.game as game
+from representation.all_tiles import ALL_TILES
+from rules.shanten import best_discard
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shanten_policy_matches_best_discard(seed):
+    rng = random.Random(seed)
+    wall = [i for i in range(len(ALL_TILES)) for _ in range(4)]
+    for _ in range(40):
+        player = game.Player(0)
+        for tile in rng.sample(wall, 14):
+            player.add(tile)
+        chosen = game.shanten_discard(player, 0, rng)
+        assert ALL_TILES[chosen] == best_discard(player.to_hand())
+
+
+def test_shanten_policy_matches_best_discard_across_turns():
+    # The policy reuses the shape it left last turn
+    def checked(player, drawn, rng):
+        chosen = game.shanten_discard(player, drawn, rng)
+        assert ALL_TILES[chosen] == best_discard(player.to_hand())
+        return chosen
+
+    for seed in range(3):
+        game.play_game(random.Random(seed), policy=checked, score=False)
+
+
+def test_shanten_policy_games_mostly_end_in_a_win():
+    summary = game.simulate_games(40, seed=3, policy=game.shanten_discard)
+    assert summary["wins"] >= 20
+    assert summary["avg_tai"] > 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_table_policy_throws_the_lowest_keep_value(seed):
+    rng = random.Random(seed)
+    wall = [i for i in range(len(ALL_TILES)) for _ in range(4)]
+
+    def value(player, tile):
+        c = player.concealed[tile]
+        if tile >= game.NUM_SUITED:
+            return game.HONOR_VALUE[c]
+        suit, rank = divmod(tile, game.NUM_RANKS)
+        counts = player.concealed[suit * game.NUM_RANKS:(suit + 1) * game.NUM_RANKS]
+        window = [counts[r] if 0 <= r < game.NUM_RANKS else 0 for r in range(rank - 2, rank + 3)]
+        return game.keep_value(window, rank)
+
+    for _ in range(40):
+        player = game.Player(0)
+        for tile in rng.sample(wall, 14):
+            player.add(tile)
+        held = [t for t in range(len(ALL_TILES)) if player.concealed[t]]
+        lowest = min(value(player, t) for t in held)
+        assert value(player, game.table_discard(player, 0, rng)) == lowest
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_wins_with_matches_a_full_win_check(seed):
+    rng = random.Random(seed)
+    wall = [i for i in range(len(ALL_TILES)) for _ in range(4)]
+    for _ in range(200):
+        player = game.Player(0)
+        # One suit and two honors, so many hands are one tile from a win
+        suit = rng.randrange(3) * 36
+        for tile in rng.sample(wall[suit:suit + 36] + wall[108:116], 13):
+            player.add(tile)
+        for tile in range(len(ALL_TILES)):
+            if player.concealed[tile] < 4:
+                player.add(tile)
+                expected = player.is_winning()
+                player.remove(tile)
+                assert player.wins_with(tile) == expected
+
+
+def test_default_policy_plays_a_thousand_games_a_second():
+    summary = game.simulate_games(2000, seed=3)
+    assert summary["games_per_second"] >= 1000
+    assert summary["wins"] >= 800
+    assert summary["avg_tai"] > 0
+
+
+def test_random_policy_is_still_available():
+    result = game.play_game(random.Random(0), policy=game.random_discard)
+    assert result["turns"] > 0
@@ -0,0 +1,17 @@
+import engine.data.raw_data_generator as generator
+
+
+def test_output_does_not_depend_on_the_pool(tmp_path):
+    num_hands = generator.IN_PROCESS_MAX_HANDS + 1_000
+    pooled, in_process = tmp_path / "pooled.csv", tmp_path / "in_process.csv"
+    generator.generate_hands(str(pooled), num_hands, seed=7, workers=2, chunk_size=5_000)
+    generator.generate_hands(str(in_process), num_hands, seed=7, workers=1, chunk_size=5_000)
+
+    assert pooled.read_text() == in_process.read_text()
+    assert len(pooled.read_text().splitlines()) == num_hands + 1
+
+
+def test_random_concealed_hand_is_sorted():
+    hand = generator.generate_random_concealed_hand()
+    assert len(hand) == generator.HAND_SIZE
+    assert hand == sorted(hand, key=generator.ALL_TILES.index)
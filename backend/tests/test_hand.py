@@ -0,0 +1,43 @@
+from collections import Counter
+
+import pytest
+
+from representation.all_tiles import ALL_TILES, FLOWERS, TILE_INDEX
+from representation.hand import MAX_COUNT, Hand
+
+
+def test_round_trips_through_dict():
+    h = Hand.from_tiles(["1_DOT", "1_DOT", "EAST"], ["blue_1"], ["5_BAM"] * 3)
+    assert Hand.from_dict(h.to_dict()) == h
+    assert h.to_dict()["concealed"] == Counter({"1_DOT": 2, "EAST": 1})
+
+
+def test_counts_past_the_array_limit_are_value_errors():
+    with pytest.raises(ValueError):
+        Hand.from_tiles(["1_DOT"] * (MAX_COUNT + 1))
+    with pytest.raises(ValueError):
+        Hand.from_tiles([], display_list=["1_DOT"] * (MAX_COUNT + 1))
+    with pytest.raises(ValueError):
+        Hand.from_dict({"concealed": Counter({"1_DOT": MAX_COUNT + 1})})
+
+    h = Hand.from_tiles(["1_DOT"] * MAX_COUNT)
+    with pytest.raises(ValueError):
+        h.add_tile("1_DOT")
+    assert h.concealed_counts()[TILE_INDEX["1_DOT"]] == MAX_COUNT
+
+
+def test_unknown_tiles_are_value_errors():
+    with pytest.raises(ValueError):
+        Hand.from_tiles(["FOO"])
+    with pytest.raises(ValueError):
+        Hand.from_tiles([], ["not_a_flower"])
+
+
+@pytest.mark.parametrize("tile", [-1, len(ALL_TILES)])
+def test_out_of_range_ids_are_value_errors(tile):
+    with pytest.raises(ValueError):
+        Hand.from_tiles([tile])
+    with pytest.raises(ValueError):
+        Hand().add_tile(tile)
+    with pytest.raises(ValueError):
+        Hand.from_tiles([], [len(FLOWERS)])
@@ -0,0 +1,67 @@
+import csv
+import json
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+import engine.data.raw_data_generator as generator
+import engine.model as model
+
+
+@pytest.fixture
+def labeled_csv(tmp_path):
+    raw = tmp_path / "raw.csv"
+    labeled = tmp_path / "labeled.csv"
+    generator.write_random_hands_to_csv(str(raw), 600)
+    generator.process_csv(str(raw), str(labeled))
+    return labeled
+
+
+def test_holdout_masks_are_disjoint(labeled_csv):
+    train, test = model.holdout_masks(labeled_csv)
+    with open(labeled_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert len(train) == len(test) == len(rows)
+    assert test.any() and train.any()
+    assert not (train & test).any()
+    for row, is_train, is_test in zip(rows, train, test):
+        labeled = bool(row["best_discard"].strip())
+        assert is_test == (labeled and model.is_holdout(model.row_key(row)))
+        assert is_train == (labeled and not model.is_holdout(model.row_key(row)))
+
+
+def test_full_training_never_includes_holdout_rows(labeled_csv, tmp_path):
+    model.train_best_discard_model(labeled_csv, tmp_path / "model.joblib", n_estimators=5)
+    manifest = json.loads((tmp_path / "model.manifest.json").read_text())
+
+    assert manifest["base_rows"]
+    assert not any(model.is_holdout(key) for key in manifest["base_rows"])
+
+
+def test_incremental_training_picks_up_newly_labeled_rows(labeled_csv, tmp_path):
+    with open(labeled_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    labels = [row["best_discard"] for row in rows]
+    for row in rows[:100]:
+        row["best_discard"] = ""
+    _write_rows(labeled_csv, rows)
+    model.train_best_discard_model(labeled_csv, tmp_path / "model.joblib", n_estimators=5)
+
+    for row, label in zip(rows[:100], labels):
+        row["best_discard"] = label
+    _write_rows(labeled_csv, rows)
+    relabeled = {model.row_key(row) for row in rows[:100] if row["best_discard"]}
+    result = model.train_incremental(labeled_csv, tmp_path / "model.npz", max_accuracy_drop=1.0)
+
+    assert result["status"] == "updated"
+    assert result["new_rows"] == len({key for key in relabeled if not model.is_holdout(key)})
+    assert model.train_incremental(labeled_csv, tmp_path / "model.npz")["status"] == "up_to_date"
+
+
+def _write_rows(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
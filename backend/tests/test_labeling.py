@@ -0,0 +1,47 @@
+import csv
+
+import numpy as np
+import pandas as pd
+
+import engine.data.raw_data_generator as generator
+
+SEED = 1234
+NUM_HANDS = 5_000
+
+
+def _scalar_labels(rows):
+    return [generator.calculate_best_discard(r["concealed"], r["flowers"] or None) for r in rows]
+
+
+def test_process_csv_matches_scalar_labeler(tmp_path):
+    raw, labeled = tmp_path / "raw.csv", tmp_path / "labeled.csv"
+    generator.generate_hands(str(raw), NUM_HANDS, seed=SEED, workers=1)
+    generator.process_csv(str(raw), str(labeled), chunk_rows=1_000)
+
+    with open(labeled, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == NUM_HANDS
+    assert [r["best_discard"] for r in rows] == _scalar_labels(rows)
+
+
+def test_ties_go_to_the_first_tile():
+    # Both isolated terminals score 100 + 10 (off-suit); 1_BAM comes first
+    hand = "1_BAM;1_CHAR;2_DOT;3_DOT;4_DOT;5_DOT;6_DOT;7_DOT;8_DOT;9_DOT;5_DOT;5_DOT;9_DOT;9_DOT"
+    assert generator.calculate_best_discard(hand, None) == "1_BAM"
+    counts = generator.tiles_to_counts(pd.Series([hand]))
+    assert generator.ALL_TILES[generator.best_discard_ids(counts, np.array([False]))[0]] == "1_BAM"
+
+
+def test_label_dataset_matches_scalar_labeler(tmp_path):
+    out = tmp_path / "hands"
+    generator.generate_hands(str(out), 2_000, fmt="npy", seed=SEED, workers=1)
+    y = generator.label_dataset(str(out))
+
+    X = np.load(out / "X.npy")
+    flowers = np.load(out / "flowers.npy")
+    to_all_tiles = np.argsort(generator.ENCODER_ORDER)
+    for features, has, label in zip(X, flowers, y):
+        counts = features[:generator.NUM_TILE_TYPES][to_all_tiles]
+        tiles = [t for t, c in zip(generator.ALL_TILES, counts) for _ in range(c)]
+        discard = generator.calculate_best_discard(";".join(tiles), "x" if has.any() else None)
+        assert label == tiles.index(discard)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from cache.lru import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(10, ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.expirations == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_put_refreshes_ttl():
+    cache = LRUCache(10, ttl=0.15)
+    cache.put("a", 1)
+    time.sleep(0.1)
+    cache.put("a", 2)
+    time.sleep(0.1)
+    assert cache.get("a") == 2
+
+
+def test_no_ttl_never_expires():
+    cache = LRUCache(10)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") == 1
+    assert cache.expirations == 0
+
+
+def test_resize_and_clear():
+    cache = LRUCache(4)
+    for i in range(4):
+        cache.put(i, i)
+    cache.resize(2)
+    assert len(cache) == 2 and 3 in cache and 0 not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 0
+
+
+def test_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+    with pytest.raises(ValueError):
+        LRUCache(1).resize(0)
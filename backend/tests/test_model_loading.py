@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.ensemble import RandomForestClassifier
+
+import engine.forest as forest
+import engine.model as model
+
+
+@pytest.fixture
+def flat_path(tmp_path, monkeypatch):
+    # load_model swaps the globals: the served model comes back afterwards
+    monkeypatch.setattr(model, "MODEL", model.MODEL)
+    monkeypatch.setattr(model, "MODEL_INFO", model.MODEL_INFO)
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 5, size=(200, 8), dtype=np.uint8)
+    fitted = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, X[:, 0] % 3)
+    path = tmp_path / "model.npz"
+    forest.export_forest(fitted, path)
+    return path
+
+
+def test_load_model_swaps_in_the_flat_forest(flat_path):
+    loaded = model.load_model(flat_path)
+
+    assert model.get_model() is loaded
+    assert isinstance(loaded, forest.FlatForest)
+    info = model.model_info()
+    assert info["format"] == "flat" and info["path"] == str(flat_path)
+    assert info["version"] == model.file_version(flat_path)
+
+
+def test_reload_only_when_the_version_changes(flat_path):
+    first = model.load_model(flat_path)
+    assert model.reload_if_changed(flat_path) is False
+    assert model.get_model() is first
+
+    flat_path.with_name(flat_path.name + ".version").write_text("v2\n")
+    assert model.reload_if_changed(flat_path) is True
+    assert model.get_model() is not first
+    assert model.model_version() == "v2"
+
+
+def test_missing_model_is_not_reloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "MODEL_INFO", model.MODEL_INFO)
+    assert model.file_version(tmp_path / "missing.npz") is None
+    assert model.reload_if_changed(tmp_path / "missing.npz") is False
+
+
+def test_flat_forest_weights_are_memory_mapped(flat_path):
+    in_memory = forest.load_forest(flat_path)
+    loaded = model.load_model(flat_path, mmap=True)
+
+    assert model.model_info()["mmap"] is True
+    for name in forest.ARRAYS + ("children",):
+        array = getattr(loaded, name)
+        assert not array.flags.owndata and not array.flags.writeable
+        np.testing.assert_array_equal(array, getattr(in_memory, name))
+
+    X = np.random.default_rng(1).integers(0, 5, size=(50, 8), dtype=np.uint8)
+    np.testing.assert_array_equal(loaded.predict(X), in_memory.predict(X))
+
+
+def test_a_new_forest_file_is_unpacked_again(flat_path):
+    first = forest.unpack_forest(flat_path)
+    assert forest.unpack_forest(flat_path) == first
+
+    rng = np.random.default_rng(2)
+    X = rng.integers(0, 5, size=(200, 8), dtype=np.uint8)
+    forest.export_forest(RandomForestClassifier(n_estimators=2, random_state=1).fit(X, X[:, 1] % 2), flat_path)
+    second = forest.unpack_forest(flat_path)
+    assert second != first
+    assert not first.exists()
@@ -0,0 +1,59 @@
+from math import comb
+
+import pytest
+
+import engine.monte_carlo as monte_carlo
+from representation.all_tiles import TILE_INDEX
+from representation.hand import Hand
+
+# Ready on EAST or RED once GREEN goes
+READY_13 = [
+    "1_DOT", "2_DOT", "3_DOT", "4_DOT", "5_DOT", "6_DOT", "7_DOT", "8_DOT", "9_DOT",
+    "EAST", "EAST", "RED", "RED"
+]
+HAND_14 = Hand.from_tiles(READY_13 + ["GREEN"])
+
+
+def test_ready_hand_wins_at_the_hypergeometric_rate():
+    live = monte_carlo.live_wall_counts(HAND_14)
+    wall, waits, draws = sum(live), live[TILE_INDEX["EAST"]] + live[TILE_INDEX["RED"]], 10
+    expected = 1 - comb(wall - waits, draws) / comb(wall, draws)
+
+    n, wins, total, _ = monte_carlo.simulate_discard(HAND_14, TILE_INDEX["GREEN"], live, 2_000, draws, seed=0)
+    assert n == 2_000
+    assert wins / n == pytest.approx(expected, abs=0.04)
+    assert total >= wins
+
+
+def test_simulations_are_reproducible_with_a_seed():
+    live = monte_carlo.live_wall_counts(HAND_14)
+    runs = [monte_carlo.simulate_discard(HAND_14, TILE_INDEX["9_DOT"], live, 300, 15, seed=7) for _ in range(2)]
+    assert runs[0] == runs[1]
+
+
+def test_evaluator_keeps_the_ready_shape():
+    result = monte_carlo.evaluate_discards_mc(HAND_14, budget_ms=60_000, max_draws=20, workers=1, seed=0)
+
+    assert result["winning"] is False
+    assert result["best_discard"] == "GREEN"
+    best = result["candidates"][0]
+    assert best["discard"] == "GREEN" and not best["pruned"]
+    assert best["ci_low"] <= best["expected_tai"] <= best["ci_high"]
+    assert all(c["expected_tai"] <= best["expected_tai"] for c in result["candidates"])
+    assert result["simulations"] == sum(c["simulations"] for c in result["candidates"])
+
+
+def test_winning_hand_is_scored_not_simulated():
+    result = monte_carlo.evaluate_discards_mc(Hand.from_tiles(READY_13 + ["EAST"]), workers=1, seed=0)
+    assert result["winning"] is True and result["tai"] > 0
+
+
+def test_pool_run_stops_near_its_budget():
+    result = monte_carlo.evaluate_discards_mc(HAND_14, budget_ms=200, max_draws=20, workers=2, seed=0)
+    assert result["stopped"] in ("budget", "separated", "max_simulations")
+    assert result["elapsed_ms"] < 5_000
+
+    # Nothing from the stopped run is left running in the pool
+    pool = monte_carlo._get_pool(2)
+    assert pool.submit(sum, [1, 2]).result(timeout=5) == 3
+    monte_carlo.shutdown_pool()
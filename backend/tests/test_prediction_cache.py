@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+import engine.model as model
+import engine.prediction_cache as prediction_cache
+from hands import hand, random_tiles, winning_hand
+from representation.hand import Hand
+from rules.scoring_profile import scoring_profile
+
+EAST = scoring_profile(seat_wind="EAST", round_wind="EAST", seat_number=1)
+WEST = scoring_profile(seat_wind="WEST", round_wind="SOUTH", seat_number=3)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(served_model):
+    prediction_cache.clear_prediction_cache()
+    yield
+    prediction_cache.clear_prediction_cache()
+
+
+def _relabel(tiles, mapping):
+    out = []
+    for t in tiles:
+        rank, _, suit = t.partition("_")
+        out.append(f"{rank}_{mapping[suit]}" if suit in mapping else t)
+    return out
+
+
+def _hands(seed, n=40):
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(n):
+        hands.append(winning_hand(rng, rng.randint(0, 1)))
+        hands.append(hand(random_tiles(rng, 14)))
+    return hands
+
+
+def test_cached_result_matches_the_model_and_hits_the_second_time():
+    for h in _hands(0):
+        expected = model.predict_best_discard(h, EAST)
+        assert prediction_cache.cached_predict_best_discard(h, EAST) == expected
+
+        hits = prediction_cache.PREDICT_CACHE.hits
+        assert prediction_cache.cached_predict_best_discard(h, EAST) == expected
+        assert prediction_cache.PREDICT_CACHE.hits > hits
+
+    assert prediction_cache.prediction_cache_stats()["hit_rate"] == pytest.approx(0.5)
+
+
+def test_suit_relabelling_shares_the_win_entry():
+    h = winning_hand(random.Random(1))
+    tiles = list(h["concealed"].elements())
+    relabelled = Hand.from_tiles(_relabel(tiles, {"DOT": "CHAR", "CHAR": "BAM", "BAM": "DOT"}))
+
+    first = prediction_cache.cached_predict_best_discard(Hand.from_tiles(tiles), EAST)
+    assert first["winning"] is True
+    size = len(prediction_cache.PREDICT_CACHE)
+    hits = prediction_cache.PREDICT_CACHE.hits
+
+    assert prediction_cache.cached_predict_best_discard(relabelled, EAST) == first
+    assert len(prediction_cache.PREDICT_CACHE) == size
+    assert prediction_cache.PREDICT_CACHE.hits == hits + 1
+
+
+def test_profiles_are_cached_separately():
+    # EAST pongs score for the East seat and round only
+    tiles = ["EAST"] * 3 + ["1_DOT", "2_DOT", "3_DOT", "4_BAM", "5_BAM", "6_BAM",
+                            "7_CHAR", "8_CHAR", "9_CHAR", "RED", "RED"]
+    east = prediction_cache.cached_predict_best_discard(Hand.from_tiles(tiles), EAST)
+    west = prediction_cache.cached_predict_best_discard(Hand.from_tiles(tiles), WEST)
+
+    assert east == model.predict_best_discard(Hand.from_tiles(tiles).to_dict(), EAST)
+    assert west == model.predict_best_discard(Hand.from_tiles(tiles).to_dict(), WEST)
+    assert east["tai"] > west["tai"]
+
+
+def test_batch_matches_single_predictions():
+    hands = _hands(2)
+    profiles = [EAST if i % 2 else WEST for i in range(len(hands))]
+    expected = [model.predict_best_discard(h, p) for h, p in zip(hands, profiles)]
+
+    # Half of the hands already cached, the rest predicted in one call
+    for h, p in zip(hands[::2], profiles[::2]):
+        prediction_cache.cached_predict_best_discard(h, p)
+    assert prediction_cache.cached_predict_best_discards(hands, profiles) == expected
+    assert prediction_cache.cached_predict_best_discards(hands, profiles) == expected
+
+
+def test_results_are_copies():
+    h = winning_hand(random.Random(3))
+    first = prediction_cache.cached_predict_best_discard(h, EAST)
+    first["breakdown"].append("Tampered")
+    first["tai"] = -1
+
+    second = prediction_cache.cached_predict_best_discard(h, EAST)
+    assert "Tampered" not in second["breakdown"]
+    assert second["tai"] >= 0
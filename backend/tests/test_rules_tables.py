@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+import rules.decomposition as decomp
+
+
+def _splits(counts, melds, pair_left):
+    """
+    Recursive reference: counts split into the melds (plus one pair when
+    pair_left).
+    """
+    r = next((i for i, c in enumerate(counts) if c), None)
+    if r is None:
+        return not pair_left
+    for meld in melds:
+        if meld[0] != r or any(counts[i] < meld.count(i) for i in meld):
+            continue
+        for i in meld:
+            counts[i] -= 1
+        ok = _splits(counts, melds, pair_left)
+        for i in meld:
+            counts[i] += 1
+        if ok:
+            return True
+    if pair_left and counts[r] >= 2:
+        counts[r] -= 2
+        ok = _splits(counts, melds, False)
+        counts[r] += 2
+        return ok
+    return False
+
+
+def _table_keys(rng, n):
+    keys = set()
+    while len(keys) < n:
+        counts = [0] * decomp.NUM_RANKS
+        # Half random shapes, half built from melds so both flags show up
+        if rng.random() < 0.5:
+            for _ in range(rng.randint(1, 14)):
+                r = rng.randrange(decomp.NUM_RANKS)
+                counts[r] = min(counts[r] + 1, decomp.MAX_COPIES)
+        else:
+            for _ in range(rng.randint(0, 4)):
+                meld = rng.choice(decomp.PONGS + decomp.CHOWS)
+                for r in meld:
+                    counts[r] += 1
+            if rng.random() < 0.5:
+                counts[rng.randrange(decomp.NUM_RANKS)] += 2
+        if max(counts) <= decomp.MAX_COPIES and sum(counts) <= 14:
+            keys.add(decomp.suit_key(counts, 0))
+    return sorted(keys)
+
+
+@pytest.mark.parametrize("table, melds", [
+    (decomp.SUIT_TABLE, decomp.PONGS + decomp.CHOWS),
+    (decomp.CHOW_TABLE, decomp.CHOWS)
+])
+def test_suit_table_flags_match_recursive_split(table, melds):
+    for key in _table_keys(random.Random(0), 3_000):
+        counts = decomp.key_to_counts(key)
+        assert bool(table[key] & decomp.MELDS) == _splits(list(counts), melds, False), counts
+        assert bool(table[key] & decomp.MELDS_AND_PAIR) == _splits(list(counts), melds, True), counts
+
+
+def test_suit_key_round_trip():
+    rng = random.Random(1)
+    for _ in range(1_000):
+        counts = [rng.randint(0, decomp.MAX_COPIES) for _ in range(decomp.NUM_RANKS)]
+        assert decomp.key_to_counts(decomp.suit_key(counts, 0)) == counts
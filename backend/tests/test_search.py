@@ -0,0 +1,107 @@
+import csv
+
+import pytest
+
+import engine.data.raw_data_generator as generator
+import engine.search as search
+from engine.data.data_loader import parse_tiles
+from representation.all_tiles import TILE_INDEX
+from representation.hand import Hand
+from rules.scoring_profile import default_profile
+from rules.shanten import ShantenShape
+
+READY_13 = [
+    "1_DOT", "2_DOT", "3_DOT", "4_DOT", "5_DOT", "6_DOT", "7_DOT", "8_DOT", "9_DOT",
+    "EAST", "EAST", "RED", "RED"
+]
+# Far from ready: deep searches take long
+SCATTERED = [
+    "1_DOT", "3_DOT", "5_DOT", "7_BAM", "8_BAM", "9_BAM", "2_CHAR", "2_CHAR", "4_CHAR", "6_CHAR",
+    "EAST", "SOUTH", "RED", "GREEN"
+]
+
+
+def _relabel(tiles):
+    swap = {"DOT": "BAM", "BAM": "DOT"}
+    out = []
+    for t in tiles:
+        rank, _, suit = t.partition("_")
+        out.append(f"{rank}_{swap[suit]}" if suit in swap else t)
+    return out
+
+
+@pytest.mark.parametrize("max_depth", range(4))
+def test_unlimited_budget_reaches_max_depth(max_depth):
+    result = search.search_best_discard(Hand.from_tiles(READY_13 + ["GREEN"]), budget_ms=0, max_depth=max_depth)
+
+    assert result["depth"] == max_depth
+    assert result["best_discard"] == "GREEN"
+    assert [c["value"] for c in result["candidates"]] == sorted((c["value"] for c in result["candidates"]), reverse=True)
+
+
+def test_ready_value_is_the_same_at_every_depth():
+    # Keeping the ready shape: the leaf's win chance is already exact
+    values = [
+        search.search_best_discard(Hand.from_tiles(READY_13 + ["GREEN"]), budget_ms=0, max_depth=d)["candidates"][0]["value"]
+        for d in range(4)
+    ]
+    assert values == pytest.approx([values[0]] * 4)
+
+
+def test_deeper_searches_visit_more_nodes():
+    nodes = [search.search_best_discard(Hand.from_tiles(SCATTERED), budget_ms=0, max_depth=d)["nodes"] for d in range(3)]
+    assert nodes == sorted(nodes) and nodes[0] < nodes[-1]
+
+
+def test_budget_stops_deepening():
+    result = search.search_best_discard(Hand.from_tiles(SCATTERED), budget_ms=20, max_depth=12)
+
+    # Depth 0 always finishes, so there is an answer even past the budget
+    assert 0 <= result["depth"] < 12
+    assert result["best_discard"] in SCATTERED
+    assert result["elapsed_ms"] < 1_000
+
+
+def test_suit_relabelling_gives_the_same_values():
+    a = search.search_best_discard(Hand.from_tiles(SCATTERED), budget_ms=0, max_depth=1)
+    b = search.search_best_discard(Hand.from_tiles(_relabel(SCATTERED)), budget_ms=0, max_depth=1)
+    assert sorted(c["value"] for c in a["candidates"]) == pytest.approx(sorted(c["value"] for c in b["candidates"]))
+    assert b["best_discard"] == _relabel([a["best_discard"]])[0]
+
+
+def test_label_csv_labels_every_row_with_the_search(tmp_path):
+    raw = tmp_path / "raw.csv"
+    labeled = tmp_path / "labeled.csv"
+    generator.write_random_hands_to_csv(str(raw), 30)
+
+    # Windows of 2 * 1 * 4 rows: several pool rounds
+    assert search.label_csv(str(raw), str(labeled), max_depth=0, workers=1, chunk_size=2) == 30
+
+    with open(raw, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    with open(labeled, newline="", encoding="utf-8") as f:
+        out = list(csv.DictReader(f))
+    assert [r["concealed"] for r in out] == [r["concealed"] for r in rows]
+    for row, labeled_row in zip(rows, out):
+        hand_obj = Hand.from_tiles(parse_tiles(row["concealed"]), parse_tiles(row["flowers"]), parse_tiles(row["display"]))
+        result = search.search_best_discard(hand_obj, budget_ms=0, max_depth=0)
+        if not result["winning"]:
+            assert labeled_row["best_discard"] == result["best_discard"]
+        assert labeled_row["best_discard"] in parse_tiles(row["concealed"])
+
+
+def test_discarded_copies_are_not_drawn_again():
+    # Broke a RED pong: the discarded RED is dead, one RED and two EAST win
+    hand_obj = Hand.from_tiles(READY_13 + ["RED"])
+    s = search._Search(hand_obj, None, float("inf"), default_profile())
+    shape = ShantenShape(Hand.from_tiles(READY_13).concealed_counts(), 0)
+    red = TILE_INDEX["RED"]
+
+    fresh = s.draw_outcomes(shape, search.NO_DISCARDS, s.key(shape.counts))
+    discards = search._discarded(search.NO_DISCARDS, red)
+    after = s.draw_outcomes(shape, discards, s.key(shape.counts, discards))
+
+    assert sorted(n for n, _ in fresh[2]) == [2, 2]
+    assert sorted(n for n, _ in after[2]) == [1, 2]
+    assert after[1] == fresh[1] - 1
+    assert s.key(shape.counts, discards) != s.key(shape.counts)
@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+
+import pytest
+
+import rules.decomposition as decomp
+import rules.win_checker as win_checker
+from hands import random_tiles, sample_hands, winning_hand
+from representation.all_tiles import ALL_TILES
+from rules.shanten import ShantenShape, shanten, useful_tiles
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_shanten_is_minus_one_exactly_for_wins(seed):
+    for h in sample_hands(seed, 200):
+        assert (shanten(h) == -1) == win_checker.is_winning(h), dict(h["concealed"])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_shape_matches_fresh_shape(seed):
+    rng = random.Random(seed)
+    counts = [0] * decomp.NUM_TILE_TYPES
+    for t in random_tiles(rng, 13):
+        counts[ALL_TILES.index(t)] += 1
+    shape = ShantenShape(list(counts), 0)
+
+    for _ in range(60):
+        draw = rng.choice([i for i, c in enumerate(counts) if c < decomp.MAX_COPIES])
+        assert shape.shanten_with(draw, 1) == shape.after(draw, 1).shanten()
+        counts[draw] += 1
+        shape = shape.after(draw, 1)
+        assert shape.shanten() == ShantenShape(list(counts), 0).shanten()
+
+        discard = rng.choice([i for i, c in enumerate(counts) if c])
+        counts[discard] -= 1
+        shape = shape.after(discard, -1)
+        assert shape.shanten() == ShantenShape(list(counts), 0).shanten()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_useful_tiles_match_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        h = winning_hand(rng, rng.randint(0, 1))
+        h["concealed"] = h["concealed"] - Counter([rng.choice(list(h["concealed"].elements()))])
+
+        current = shanten(h)
+        held = h["concealed"] + h["display"]
+        lowering = {
+            t: decomp.MAX_COPIES - held[t] for t in ALL_TILES
+            if held[t] < decomp.MAX_COPIES
+            and shanten({**h, "concealed": h["concealed"] + Counter([t])}) < current
+        }
+        assert useful_tiles(h) == lowering
+
+
+ORPHANS_12 = [
+    "1_DOT", "9_DOT", "1_BAM", "9_BAM", "1_CHAR", "9_CHAR",
+    "EAST", "SOUTH", "WEST", "NORTH", "RED", "GREEN"
+]
+
+
+@pytest.mark.parametrize("tiles", [ORPHANS_12 + ["5_DOT"], ORPHANS_12 + ["RED"]])
+def test_useful_ids_keep_missing_orphans(tiles):
+    counts = [0] * decomp.NUM_TILE_TYPES
+    for t in tiles:
+        counts[ALL_TILES.index(t)] += 1
+    shape = ShantenShape(counts, 0)
+    current = shape.shanten()
+    lowering = [
+        i for i in range(decomp.NUM_TILE_TYPES)
+        if counts[i] < decomp.MAX_COPIES and shape.shanten_with(i, 1) < current
+    ]
+    assert shape.useful_ids() == lowering
+    assert ALL_TILES.index("WHITE") in lowering
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_useful_ids_match_every_draw_on_random_hands(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        counts = [0] * decomp.NUM_TILE_TYPES
+        for t in random_tiles(rng, 13):
+            counts[ALL_TILES.index(t)] += 1
+        shape = ShantenShape(counts, 0)
+        current = shape.shanten()
+        assert shape.useful_ids() == [
+            i for i in range(decomp.NUM_TILE_TYPES)
+            if counts[i] < decomp.MAX_COPIES and shape.shanten_with(i, 1) < current
+        ]
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("sklearn")
+
+import engine.data.raw_data_generator as generator
+import engine.model as model
+import engine.sweep as sweep
+
+
+def test_sweep_scores_on_the_served_model_split(tmp_path):
+    raw = tmp_path / "raw.csv"
+    labeled = tmp_path / "labeled.csv"
+    generator.write_random_hands_to_csv(str(raw), 500)
+    generator.process_csv(str(raw), str(labeled))
+
+    grid = {"n_estimators": [3, 5], "max_depth": [6], "min_samples_leaf": [5], "encoding": ["counts"]}
+    report = sweep.run_sweep(labeled, tmp_path / "report.json", grid, workers=1, latency_rows=5, batch_rows=50)
+
+    train, test = model.holdout_masks(labeled)
+    assert report["dataset"]["train_rows"] == train.sum()
+    assert report["dataset"]["test_rows"] == test.sum()
+    assert [r["id"] for r in report["results"]] == [0, 1]
+    assert report["frontier"]
+    for result in report["results"]:
+        assert {"joblib", "joblib_n_jobs_1", "flat"} <= set(result)
@@ -0,0 +1,23 @@
+import rules.tai_calc as tai_calc
+from hands import hand
+from rules.scoring_profile import scoring_profile
+
+PROFILE = scoring_profile(seat_wind="EAST", round_wind="EAST", seat_number=1)
+
+
+def test_max_tai_scores_the_best_decomposition():
+    # 1-2-3 x3 splits as three chows or as three pongs
+    tiles = ["1_DOT"] * 3 + ["2_DOT"] * 3 + ["3_DOT"] * 3 + ["EAST"] * 3 + ["RED"] * 2
+    calc = tai_calc.calculate_max_tai(hand(tiles), PROFILE)
+    assert "All Pongs (碰碰胡)" in calc["breakdown"]
+    assert "Seat Wind Pong" in calc["breakdown"] and "Round Wind Pong" in calc["breakdown"]
+
+    ping_hu = ["1_DOT", "2_DOT", "3_DOT", "4_BAM", "5_BAM", "6_BAM", "7_CHAR", "8_CHAR", "9_CHAR",
+               "2_DOT", "3_DOT", "4_DOT", "5_CHAR", "5_CHAR"]
+    assert "Ping Hu (平胡)" in tai_calc.calculate_max_tai(hand(ping_hu), PROFILE)["breakdown"]
+
+
+def test_max_tai_falls_back_past_four_copies():
+    # The reference checker calls this a win; the suit tables stop at 4 copies
+    tiles = ["1_DOT"] * 5 + ["2_DOT", "3_DOT", "4_DOT"] + ["EAST"] * 3 + ["RED"] * 3
+    assert tai_calc.calculate_max_tai(hand(tiles), PROFILE) == tai_calc.calculate_tai(hand(tiles), PROFILE)
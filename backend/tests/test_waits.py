@@ -0,0 +1,37 @@
+import random
+from collections import Counter
+
+import pytest
+
+import rules.decomposition as decomp
+import rules.win_checker as win_checker
+from hands import hand, winning_hand
+from representation.all_tiles import ALL_TILES
+from representation.hand import Hand
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_winning_tiles_match_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        h = winning_hand(rng, rng.randint(0, 1))
+        # Drop one concealed tile: 13 tiles, often ready
+        h["concealed"] = h["concealed"] - Counter([rng.choice(list(h["concealed"].elements()))])
+
+        held = h["concealed"] + h["display"]
+        expected = [t for t in ALL_TILES
+                    if held[t] < decomp.MAX_COPIES
+                    and win_checker.is_winning({**h, "concealed": h["concealed"] + Counter([t])})]
+        assert sorted(win_checker.winning_tiles(h)) == sorted(expected)
+        assert sorted(win_checker.winning_tiles(Hand.from_dict(h))) == sorted(expected)
+
+
+def test_tiles_held_four_times_are_not_waits():
+    # Single wait on 4_DOT with its pong in the display: no copy is left
+    concealed = ["1_BAM", "2_BAM", "3_BAM", "7_CHAR", "8_CHAR", "9_CHAR", "EAST", "EAST", "EAST", "4_DOT"]
+    h = hand(concealed, ["4_DOT"] * 3)
+    assert win_checker.winning_tiles(h) == []
+    assert win_checker.winning_tiles(Hand.from_dict(h)) == []
+
+    h = hand(concealed[:-1] + ["5_DOT"], ["4_DOT"] * 3)
+    assert win_checker.winning_tiles(h) == ["5_DOT"]
@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+import pytest
+
+import rules.decomposition as decomp
+import rules.win_checker as win_checker
+from hands import WALL, hand, winning_shape
+from representation.all_tiles import ALL_TILES
+from representation.hand import Hand
+
+HONORS = win_checker.WINDS + win_checker.DRAGONS
+SEEDS = range(20)
+
+
+def _random_hands(rng, displayed_melds):
+    """
+    A winning hand with displayed_melds of its melds in the display, and
+    the same hand with one concealed tile swapped for a random one.
+    """
+    melds, pair = winning_shape(rng)
+    display = [t for m in melds[:displayed_melds] for t in m]
+    concealed = pair + [t for m in melds[displayed_melds:] for t in m]
+    yield hand(concealed, display)
+
+    swapped = list(concealed)
+    swapped[rng.randrange(len(swapped))] = rng.choice(ALL_TILES)
+    if max(Counter(swapped + display).values()) <= decomp.MAX_COPIES:
+        yield hand(swapped, display)
+
+
+def _assert_agrees(hand_obj):
+    expected = win_checker.is_winning_reference(hand_obj)
+    assert win_checker.is_winning(hand_obj) == expected, dict(hand_obj["concealed"])
+    compact = Hand.from_dict(hand_obj)
+    assert win_checker.is_winning(compact) == expected, dict(hand_obj["concealed"])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("displayed_melds", [0, 1, 2])
+def test_matches_reference_on_mixed_suit_and_honor_hands(seed, displayed_melds):
+    rng = random.Random(seed * 10 + displayed_melds)
+    wins = 0
+    for _ in range(200):
+        for hand_obj in _random_hands(rng, displayed_melds):
+            _assert_agrees(hand_obj)
+            wins += win_checker.is_winning_reference(hand_obj)
+    assert wins >= 200
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_reference_on_random_tiles(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        tiles = rng.sample(WALL, 14)
+        _assert_agrees(hand(tiles, []))
+        _assert_agrees(hand(tiles[3:], tiles[:3]))
+
+
+def test_honor_melds_and_thirteen_wonders():
+    honors = hand(["EAST"] * 3 + ["RED"] * 3 + ["WHITE"] * 3 + ["NORTH"] * 3 + ["GREEN"] * 2, [])
+    wonders = [f"{r}_{s}" for s in win_checker.SUITS for r in (1, 9)] + HONORS
+    for hand_obj in (honors, hand(wonders + ["EAST"], [])):
+        assert win_checker.is_winning_reference(hand_obj)
+        _assert_agrees(hand_obj)
+
+
+@pytest.mark.slow
+def test_verify_against_reference():
+    assert win_checker.verify_against_reference() > 0
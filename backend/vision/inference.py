@@ -1,31 +1,58 @@
-import torch
+import logging
+import threading
+
 from PIL import Image
-import torchvision.transforms as T
-from model import TileCNN
 
 MODEL_PATH = "tile_cnn.pth"
 IMAGE_SIZE = 128
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+logger = logging.getLogger(__name__)
+
+# torch and the checkpoint are loaded on first use (or by load_classifier
+# from a warm-up task), not at import time
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def load_classifier():
+    """
+    (model, classes, transform, device), loading the checkpoint once.
+    """
+    global _classifier
+    if _classifier is not None:
+        return _classifier
+
+    with _classifier_lock:
+        if _classifier is None:
+            import torch
+            import torchvision.transforms as T
+            from model import TileCNN
+
+            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-checkpoint = torch.load(MODEL_PATH, map_location=device)
-classes = checkpoint["classes"]
-num_classes = len(classes)
-print("Classes in checkpoint:", checkpoint["classes"])
+            checkpoint = torch.load(MODEL_PATH, map_location=device)
+            classes = checkpoint["classes"]
+            logger.info("Loaded %s with classes %s", MODEL_PATH, classes)
 
-model = TileCNN(num_classes).to(device)
-model.load_state_dict(checkpoint["model_state"])
-model.eval()
+            model = TileCNN(len(classes)).to(device)
+            model.load_state_dict(checkpoint["model_state"])
+            model.eval()
+
+            transform = T.Compose([
+                T.Resize((IMAGE_SIZE, IMAGE_SIZE)),
+                T.ToTensor()
+            ])
+            _classifier = (model, classes, transform, device)
+    return _classifier
 
-transform = T.Compose([
-    T.Resize((IMAGE_SIZE, IMAGE_SIZE)),
-    T.ToTensor()
-])
 
 def classify_tile_image(tile_img_np):
     """
     tile_img_np: numpy array (RGB crop from extract_tile_images)
     """
+    import torch
+
+    model, classes, transform, device = load_classifier()
     img = Image.fromarray(tile_img_np).convert("RGB")
     img = transform(img).unsqueeze(0).to(device)
 